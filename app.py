@@ -1,15 +1,55 @@
 # app.py
 
+import os
+
 import streamlit as st
 import pandas as pd
 
-from utils.pipeline import run_full_pipeline
+from utils.artifacts import warm_up
+from utils.service_client import PredictionClient, get_service_url
+from utils.singleflight import run_full_pipeline_coalesced
+from utils.tracing import start_metrics_server, trace
 
 # ---------------------------------------------------------
 # Título y descripción
 # ---------------------------------------------------------
 st.set_page_config(page_title="Predicción Oscar Mejor Película", page_icon="🎬")
 
+
+# ---------------------------------------------------------
+# Artefactos: se cargan una vez y se comparten entre sesiones
+# ---------------------------------------------------------
+@st.cache_resource(show_spinner="Cargando modelo y embeddings...")
+def cargar_artefactos():
+    return warm_up()
+
+
+# Con SUBTEXT_SERVICE_URL las predicciones las hace el servicio
+# (utils/service.py) y esta app no carga el modelo
+SERVICE_URL = get_service_url()
+
+
+@st.cache_resource
+def cliente_servicio(url):
+    return PredictionClient(url)
+
+
+if SERVICE_URL is None:
+    cargar_artefactos()
+
+
+# ---------------------------------------------------------
+# Métricas Prometheus (opcional): SUBTEXT_METRICS_PORT=9108
+# (SUBTEXT_METRICS_HOST=0.0.0.0 para exponerlas fuera de la máquina)
+# ---------------------------------------------------------
+@st.cache_resource
+def iniciar_servidor_metricas(port):
+    return start_metrics_server(port)
+
+
+if os.environ.get("SUBTEXT_METRICS_PORT"):
+    iniciar_servidor_metricas(int(os.environ["SUBTEXT_METRICS_PORT"]))
+
 st.title("🎬 Predicción de nominación al Oscar – Mejor Película")
 st.write(
     "Ingresa el nombre de una película y el modelo estimará la probabilidad "
@@ -21,20 +61,29 @@ st.write(
 # ---------------------------------------------------------
 st.sidebar.header("Configuración de API keys")
 
-# Opción 1: usar st.secrets (recomendado en Streamlit Cloud)
-use_secrets = st.sidebar.checkbox(
-    "Usar API keys desde `st.secrets`", value=True
-)
-
-if use_secrets:
-    OMDB_API_KEY = st.secrets["OMDB_API_KEY"]
-    TMDB_API_KEY = st.secrets["TMDB_API_KEY"]
+if SERVICE_URL is not None:
+    # Las API keys las tiene el servicio
+    st.sidebar.info(f"Predicciones servidas por {SERVICE_URL}")
+    OMDB_API_KEY = TMDB_API_KEY = None
 else:
-    OMDB_API_KEY = st.sidebar.text_input("OMDb API Key", type="password")
-    TMDB_API_KEY = st.sidebar.text_input("TMDb API Key", type="password")
+    # Opción 1: usar st.secrets (recomendado en Streamlit Cloud)
+    use_secrets = st.sidebar.checkbox(
+        "Usar API keys desde `st.secrets`", value=True
+    )
+
+    if use_secrets:
+        OMDB_API_KEY = st.secrets["OMDB_API_KEY"]
+        TMDB_API_KEY = st.secrets["TMDB_API_KEY"]
+    else:
+        OMDB_API_KEY = st.sidebar.text_input("OMDb API Key", type="password")
+        TMDB_API_KEY = st.sidebar.text_input("TMDb API Key", type="password")
+
+show_timings = st.sidebar.checkbox("Mostrar desglose de tiempos", value=False)
 
-# Validación simple
-if not OMDB_API_KEY or not TMDB_API_KEY:
+# Validación simple (con servicio no hacen falta keys locales)
+faltan_keys = SERVICE_URL is None and (not OMDB_API_KEY or not TMDB_API_KEY)
+
+if faltan_keys:
     st.warning("Configura tus API keys de OMDb y TMDb en la barra lateral para poder hacer predicciones.")
 
 
@@ -46,16 +95,22 @@ movie_name = st.text_input("Nombre de la película", placeholder="Ejemplo: Oppen
 if st.button("Evaluar película"):
     if not movie_name.strip():
         st.error("Por favor ingresa un nombre de película válido.")
-    elif not OMDB_API_KEY or not TMDB_API_KEY:
+    elif faltan_keys:
         st.error("Faltan las API keys de OMDb o TMDb.")
     else:
         with st.spinner("Buscando información y generando predicción..."):
             try:
-                proba, poster_url, df_movie = run_full_pipeline(
-                    movie_name,
-                    omdb_key=OMDB_API_KEY,
-                    tmdb_key=TMDB_API_KEY
-                )
+                with trace("app") as pipeline_trace:
+                    if SERVICE_URL is not None:
+                        proba, poster_url, df_movie = cliente_servicio(SERVICE_URL).predict(movie_name)
+                    else:
+                        # Sesiones que piden la misma película a la vez
+                        # comparten una sola ejecución del pipeline
+                        proba, poster_url, df_movie = run_full_pipeline_coalesced(
+                            movie_name,
+                            omdb_key=OMDB_API_KEY,
+                            tmdb_key=TMDB_API_KEY
+                        )
             except Exception as e:
                 st.error(f"Ocurrió un error en el pipeline: {e}")
                 st.stop()
@@ -112,3 +167,15 @@ if st.button("Evaluar película"):
             # -------------------------------------------------
             with st.expander("Ver DataFrame completo usado por el modelo"):
                 st.dataframe(df_movie)
+
+        # -------------------------------------------------
+        # Desglose de tiempos por etapa (utils/tracing.py)
+        # -------------------------------------------------
+        if show_timings:
+            with st.expander("Desglose de tiempos", expanded=True):
+                st.caption(f"Total: {pipeline_trace.duration_s * 1000:.0f} ms")
+                df_trace = pd.DataFrame(pipeline_trace.rows())
+                # Con SUBTEXT_SERVICE_URL las etapas ocurren en el servicio
+                if not df_trace.empty:
+                    df_trace["duration_ms"] = (df_trace.pop("duration_s") * 1000).round(1)
+                    st.dataframe(df_trace)
@@ -0,0 +1,83 @@
+# tests/conftest.py
+#
+# Fixtures comunes: todo corre contra FakeApiServer (sin red) y sin
+# las cachés persistentes del proceso, para que cada test sea
+# determinista y no deje archivos en .cache/.
+
+import numpy as np
+import pytest
+
+import utils.feature_store as feature_store
+import utils.http_cache as http_cache
+import utils.http_client as http_client
+from utils.artifacts import registry
+from utils.director_profile import get_profile_cache
+from utils.embedding_store import EmbeddingTable
+from utils.fake_server import FakeApiServer, load_fixtures
+from utils.prediction_index import reset_prediction_index, set_prediction_index
+
+
+@pytest.fixture(scope="session", autouse=True)
+def embedding_table():
+    """
+    Tabla de embeddings fija (semilla 0) en lugar de la real: el
+    pickle GloVe del repo es solo un puntero LFS.
+    """
+    rng = np.random.default_rng(0)
+    table = EmbeddingTable(
+        rng.standard_normal((3000, 100)).astype(np.float32),
+        rng.random(3000) > 0.2
+    )
+
+    previous = registry._cache.get("embedding_index")
+    registry._cache["embedding_index"] = table
+    yield table
+
+    if previous is None:
+        registry._cache.pop("embedding_index", None)
+    else:
+        registry._cache["embedding_index"] = previous
+
+
+@pytest.fixture(autouse=True)
+def isolated(monkeypatch):
+    """
+    Sin caché HTTP, feature store ni índice de predicciones, sin
+    esperas entre reintentos y sin perfiles de director memoizados.
+    """
+    monkeypatch.setattr(http_cache, "_cache", False)
+    monkeypatch.setattr(feature_store, "_store", False)
+    monkeypatch.setattr(http_client, "BACKOFF_BASE", 0)
+    set_prediction_index(None)
+    get_profile_cache().clear()
+
+    yield
+
+    reset_prediction_index()
+    get_profile_cache().clear()
+
+
+@pytest.fixture
+def fake_api():
+    with FakeApiServer(load_fixtures()) as server:
+        yield server
+
+
+class FlakyApiServer(FakeApiServer):
+    """
+    FakeApiServer que responde 503 a las rutas que empiezan por
+    algún prefijo de `broken` ("/" rompe OMDb y TMDb).
+    """
+
+    broken = ()
+
+    def respond(self, path, params):
+        if any(path.startswith(prefix) for prefix in self.broken):
+            return 503, {"status_message": "Injected error"}, {}
+        return super().respond(path, params)
+
+
+@pytest.fixture
+def flaky_api():
+    with FlakyApiServer(load_fixtures()) as server:
+        yield server
@@ -0,0 +1,128 @@
+# tests/test_batch_runner.py
+
+import pandas as pd
+import pytest
+
+import utils.batch_runner as batch_runner
+import utils.http_client as http_client
+from utils.batch_runner import OUTPUT_COLUMNS, open_output, read_output, read_titles, run_job
+from utils.benchmark import fixture_titles
+from utils.rate_limit import TokenBucket
+
+
+@pytest.fixture
+def omdb_bucket(fake_api, monkeypatch):
+    """
+    Las URLs de FakeApiServer no son de una API conocida y no pasan
+    por ningún limitador: se conecta uno propio a las de OMDb.
+    """
+    bucket = TokenBucket(rate=1000, burst=1000, name="omdb")
+    monkeypatch.setattr(
+        http_client, "limiter_for_url",
+        lambda url: bucket if url == fake_api.omdb_url else None
+    )
+    return bucket
+
+
+@pytest.fixture
+def scored(monkeypatch):
+    """
+    Títulos que llegan a run_batch_pipeline, en orden.
+    """
+    titles = []
+    original = batch_runner.run_batch_pipeline
+
+    def run_batch_pipeline(chunk, *args, **kwargs):
+        titles.extend(chunk)
+        return original(chunk, *args, **kwargs)
+
+    monkeypatch.setattr(batch_runner, "run_batch_pipeline", run_batch_pipeline)
+    return titles
+
+
+def _output_path(tmp_path, fmt):
+    if fmt == "parquet":
+        pytest.importorskip("pyarrow")
+        return str(tmp_path / "resultados.parquet")
+    return str(tmp_path / "resultados.csv")
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_quota_mid_job_then_resume_writes_each_row_once(tmp_path, omdb_bucket, scored, fmt):
+    titles = fixture_titles()[:6]
+    input_path = tmp_path / "titulos.txt"
+    input_path.write_text("\n".join(titles) + "\n", encoding="utf-8")
+    output_path = _output_path(tmp_path, fmt)
+
+    # Se agota la cuota de OMDb justo después del primer bloque
+    def exhaust_quota(checkpoint):
+        omdb_bucket.daily_budget = 0
+
+    checkpoint = run_job(str(input_path), output_path, "k", "k", chunk_size=2, progress=exhaust_quota)
+
+    assert checkpoint["status"] == "quota_exhausted"
+    assert checkpoint["chunks_done"] == 1
+    assert checkpoint["rows_done"] == 2
+    assert scored == titles[:4]
+
+    # Un bloque escrito sin llegar a confirmarse en el checkpoint
+    # (p. ej. el proceso murió entre los dos pasos)
+    orphan = pd.DataFrame([[99, "huérfana", None, None, None, None]], columns=OUTPUT_COLUMNS)
+    open_output(output_path).write(orphan.astype(batch_runner.OUTPUT_DTYPES), 1)
+
+    # Cuota renovada: se reanuda sin repetir el primer bloque
+    omdb_bucket.daily_budget = None
+    del scored[:]
+    checkpoint = run_job(str(input_path), output_path, "k", "k", chunk_size=2)
+
+    assert checkpoint["status"] == "completed"
+    assert checkpoint["titles_done"] == len(titles)
+    assert "error" not in checkpoint
+    assert scored == titles[2:]
+
+    df = read_output(output_path)
+    assert df["row"].tolist() == list(range(len(titles)))
+    assert df["query_title"].tolist() == titles
+    assert df["error"].isna().all()
+
+
+def test_finished_job_is_not_rescored(tmp_path, fake_api, scored):
+    input_path = tmp_path / "titulos.txt"
+    input_path.write_text("Barbie\nOppenheimer\n", encoding="utf-8")
+    output_path = str(tmp_path / "resultados.csv")
+
+    run_job(str(input_path), output_path, "k", "k", chunk_size=1)
+    del scored[:]
+    checkpoint = run_job(str(input_path), output_path, "k", "k", chunk_size=1)
+
+    assert checkpoint["status"] == "completed"
+    assert scored == []
+    assert len(read_output(output_path)) == 2
+
+
+def test_checkpoint_of_another_input_is_rejected(tmp_path, fake_api):
+    first = tmp_path / "a.txt"
+    second = tmp_path / "b.txt"
+    first.write_text("Barbie\n", encoding="utf-8")
+    second.write_text("Barbie\n", encoding="utf-8")
+    output_path = str(tmp_path / "resultados.csv")
+
+    run_job(str(first), output_path, "k", "k")
+    with pytest.raises(ValueError):
+        run_job(str(second), output_path, "k", "k")
+
+
+def test_read_titles_counts_blank_lines(tmp_path):
+    csv_path = tmp_path / "titulos.csv"
+    csv_path.write_text('id,title\n1,Barbie\n\n2,Oppenheimer\n3,\n4,"Dune"\n', encoding="utf-8")
+    txt_path = tmp_path / "titulos.txt"
+    txt_path.write_text("Barbie\n\n  \nOppenheimer\n", encoding="utf-8")
+    jsonl_path = tmp_path / "titulos.jsonl"
+    jsonl_path.write_text('{"title": "Barbie"}\n\n{"title": "Dune"}\n', encoding="utf-8")
+
+    assert list(read_titles(str(csv_path))) == [(0, "Barbie"), (2, "Oppenheimer"), (4, "Dune")]
+    assert list(read_titles(str(txt_path))) == [(0, "Barbie"), (3, "Oppenheimer")]
+    assert list(read_titles(str(jsonl_path))) == [(0, "Barbie"), (2, "Dune")]
+
+    with pytest.raises(ValueError):
+        list(read_titles(str(csv_path), column="titulo"))
@@ -0,0 +1,20 @@
+# tests/test_benchmark.py
+
+import utils.feature_store as feature_store
+import utils.http_cache as http_cache
+from utils.benchmark import run_benchmarks
+from utils.prediction_index import PredictionIndex, get_prediction_index, set_prediction_index
+
+
+def test_caller_overrides_are_restored(monkeypatch):
+    cache, store, index = object(), object(), PredictionIndex()
+    monkeypatch.setattr(http_cache, "_cache", cache)
+    monkeypatch.setattr(feature_store, "_store", store)
+    set_prediction_index(index)
+
+    report = run_benchmarks(names=["clean_text"], repeat=1, warmup=0)
+
+    assert all("error" not in r for r in report["results"])
+    assert http_cache._cache is cache
+    assert feature_store._store is store
+    assert get_prediction_index() is index
@@ -0,0 +1,84 @@
+# tests/test_embeddings.py
+
+import numpy as np
+import pytest
+
+from utils.artifacts import get_tokenizer
+from utils.benchmark import fixture_plots
+from utils.embedding_store import GloveStore, build_embedding_table
+from utils.embeddings import plot_to_embedding, plots_to_embeddings
+from utils.text_processing import clean_text, remove_stopwords
+
+DIM = 100
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    return get_tokenizer()
+
+
+@pytest.fixture(scope="module")
+def glove(tokenizer):
+    """
+    Índice GloVe de juguete como dict: vectores fijos para una parte
+    del vocabulario, incluidas palabras con índice >= max_nb_words
+    (plot_to_embedding debe ignorarlas).
+    """
+    rng = np.random.default_rng(1)
+    words = [w for w, i in tokenizer.word_index.items() if i % 3 != 0]
+    return {w: rng.standard_normal(DIM).astype(np.float32) for w in words}
+
+
+@pytest.fixture(scope="module")
+def texts(tokenizer):
+    vocabulary = sorted(tokenizer.word_index, key=tokenizer.word_index.get)
+    rng = np.random.default_rng(2)
+
+    texts = [remove_stopwords(clean_text(plot)) for plot in fixture_plots()]
+    texts += [" ".join(rng.choice(vocabulary, size=rng.integers(1, 40))) for _ in range(50)]
+    # Solo palabras fuera de max_nb_words o desconocidas
+    texts += [" ".join(vocabulary[3000:3010]), "zzzqx qqwerty", ""]
+    return texts
+
+
+def _expected(texts, tokenizer, embedding_index):
+    return np.array([
+        plot_to_embedding(t, tokenizer, embedding_index, embedding_dim=DIM)
+        for t in texts
+    ])
+
+
+def test_batch_matches_one_by_one_with_dict(tokenizer, glove, texts):
+    expected = _expected(texts, tokenizer, glove)
+    got = plots_to_embeddings(texts, tokenizer, glove)
+
+    assert got.dtype == np.float32
+    np.testing.assert_allclose(got, expected, rtol=1e-5, atol=1e-6)
+    # Los textos sin palabras válidas quedan en cero
+    assert not got[-3:].any()
+
+
+def test_batch_matches_one_by_one_with_table(tokenizer, glove, texts):
+    table = build_embedding_table(tokenizer, glove)
+
+    expected = _expected(texts, tokenizer, glove)
+    np.testing.assert_allclose(_expected(texts, tokenizer, table), expected, rtol=1e-5, atol=1e-6)
+    np.testing.assert_allclose(plots_to_embeddings(texts, tokenizer, table), expected, rtol=1e-5, atol=1e-6)
+
+
+def test_batch_matches_one_by_one_with_glove_store(tokenizer, glove, texts):
+    words = list(glove)
+    store = GloveStore(np.stack([glove[w] for w in words]), words)
+
+    np.testing.assert_allclose(
+        plots_to_embeddings(texts, tokenizer, store),
+        _expected(texts, tokenizer, glove),
+        rtol=1e-5, atol=1e-6
+    )
+
+
+def test_non_strings_give_zero_rows(tokenizer, glove):
+    got = plots_to_embeddings([None, np.nan, "film"], tokenizer, glove)
+
+    assert got.shape == (3, DIM)
+    assert not got[:2].any()
@@ -0,0 +1,122 @@
+# tests/test_feature_store.py
+
+import numpy as np
+import pytest
+
+import utils.feature_store as feature_store
+from utils.artifacts import get_tokenizer
+from utils.director_profile import get_profile_cache
+from utils.embedding_store import EmbeddingTable
+from utils.feature_store import SQLiteFeatureStore, build_movie_features_cached
+from utils.pipeline import score_titles
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SQLiteFeatureStore(str(tmp_path / "features.sqlite"))
+
+
+def _build(title, store, embedding_index):
+    return build_movie_features_cached(title, get_tokenizer(), embedding_index, "k", "k", store)
+
+
+def _age(store, imdb_id):
+    # Todas las features pasan a estar caducadas
+    record, timestamps, embedding = store.get(imdb_id)
+    store.put(imdb_id, record, dict.fromkeys(timestamps, 0), embedding)
+
+
+# =========================================================
+# 1. Registros construidos con llamadas fallidas
+# =========================================================
+def test_records_built_from_failed_calls_are_not_stored(flaky_api, store, embedding_table):
+    flaky_api.broken = ("/3/person",)
+    record, _ = _build("Barbie", store, embedding_table)
+
+    # Se devuelve lo que se pudo calcular, pero no se guarda
+    assert record is not None
+    assert record["director_previous_movies"] == 0
+    assert len(store) == 0
+
+    flaky_api.broken = ()
+    get_profile_cache().clear()
+    record, _ = _build("Barbie", store, embedding_table)
+
+    assert record["director_previous_movies"] > 0
+    assert len(store) == 1
+    assert store.get(record["imdb_id"])[0]["director_previous_movies"] == record["director_previous_movies"]
+
+
+def test_failures_shared_through_the_batch_context_are_not_stored(flaky_api, store, monkeypatch):
+    # Oppenheimer y Tenet comparten director: la segunda película lee
+    # del FetchContext del batch la respuesta fallida de la primera
+    monkeypatch.setattr(feature_store, "_store", store)
+    flaky_api.broken = ("/3/person",)
+
+    records, _, _, _ = score_titles(["Oppenheimer", "Tenet"], "k", "k")
+
+    assert [r["error"] for r in records] == [None, None]
+    assert len(store) == 0
+
+
+# =========================================================
+# 2. Refresco de features volátiles
+# =========================================================
+def test_failed_refresh_keeps_previous_values_and_timestamps(flaky_api, store, embedding_table):
+    record, _ = _build("Oppenheimer", store, embedding_table)
+    imdb_id = record["imdb_id"]
+    _age(store, imdb_id)
+
+    flaky_api.broken = ("/",)
+    refreshed, _ = _build("Oppenheimer", store, embedding_table)
+
+    for feature in ("imdb_rating", "popularity", "ratio_utility"):
+        assert refreshed[feature] == record[feature]
+    stored, timestamps, _ = store.get(imdb_id)
+    assert stored["imdb_rating"] == record["imdb_rating"]
+    assert timestamps["imdb_rating"] == 0
+    assert timestamps["popularity"] == 0
+
+    # Cuando la API vuelve, se refrescan y se actualiza su timestamp
+    flaky_api.broken = ()
+    _build("Oppenheimer", store, embedding_table)
+    _, timestamps, _ = store.get(imdb_id)
+    assert timestamps["imdb_rating"] > 0
+    assert timestamps["popularity"] > 0
+
+
+def test_has_previous_rating_is_stored(fake_api, store, embedding_table):
+    record, _ = _build("Oppenheimer", store, embedding_table)
+
+    assert record["has_previous_rating"] is True
+    assert store.get(record["imdb_id"])[0]["has_previous_rating"] is True
+
+
+# =========================================================
+# 3. Embeddings y títulos
+# =========================================================
+def test_embedding_is_recomputed_when_the_artifacts_change(fake_api, store, embedding_table):
+    record, embedding = _build("Barbie", store, embedding_table)
+
+    same_record, same_embedding = _build("Barbie", store, embedding_table)
+    np.testing.assert_allclose(same_embedding, embedding)
+
+    # Misma tabla con otros vectores: la huella cambia
+    regenerated = EmbeddingTable(embedding_table.matrix * 2, embedding_table.mask)
+    _, new_embedding = _build("Barbie", store, regenerated)
+
+    np.testing.assert_allclose(new_embedding, 2 * embedding, rtol=1e-5)
+    np.testing.assert_allclose(store.get(record["imdb_id"])[2], new_embedding, rtol=1e-5)
+
+
+def test_known_titles_are_not_rewritten(fake_api, store, embedding_table, monkeypatch):
+    calls = []
+    remember_title = store.remember_title
+    monkeypatch.setattr(store, "remember_title", lambda *args: (calls.append(args), remember_title(*args)))
+
+    record, _ = _build("Barbie", store, embedding_table)
+    _build("Barbie", store, embedding_table)
+    _build("  barbie ", store, embedding_table)
+
+    assert calls == [("Barbie", record["imdb_id"])]
+    assert store.resolve_title("BARBIE") == record["imdb_id"]
@@ -0,0 +1,105 @@
+# tests/test_local_store.py
+
+import json
+
+import pytest
+
+from utils.build_dataframe import build_movie_record
+from utils.local_store import LocalMovieStore, ingest_dumps
+from utils.providers import LocalProvider
+
+
+def _write_tsv(path, header, rows):
+    lines = ["\t".join(header)] + ["\t".join(row) for row in rows]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+
+@pytest.fixture
+def store(tmp_path):
+    """
+    Dumps mínimos: una directora con dos películas el mismo año
+    (tt0000004 aparece antes que tt0000003 en el archivo), una
+    película sin director y otra sin año.
+    """
+    basics = _write_tsv(
+        tmp_path / "title.basics.tsv",
+        ["tconst", "titleType", "primaryTitle", "originalTitle", "isAdult",
+         "startYear", "endYear", "runtimeMinutes", "genres"],
+        [
+            ["tt0000004", "movie", "Second Story", "Second Story", "0", "2015", "\\N", "120", "Drama"],
+            ["tt0000003", "movie", "First Story", "First Story", "0", "2015", "\\N", "110", "Drama"],
+            ["tt0000002", "movie", "Early Work", "Early Work", "0", "2005", "\\N", "95", "Comedy"],
+            ["tt0000001", "movie", "Orphan Film", "Orphan Film", "0", "2010", "\\N", "90", "Drama,War"],
+            ["tt0000005", "movie", "Someday", "Someday", "0", "\\N", "\\N", "\\N", "\\N"],
+        ]
+    )
+    ratings = _write_tsv(
+        tmp_path / "title.ratings.tsv",
+        ["tconst", "averageRating", "numVotes"],
+        [
+            ["tt0000001", "5.0", "100"],
+            ["tt0000002", "7.0", "1000"],
+            ["tt0000003", "6.0", "2000"],
+            ["tt0000004", "8.0", "3000"],
+            ["tt0000005", "9.0", "50"],
+        ]
+    )
+    crew = _write_tsv(
+        tmp_path / "title.crew.tsv",
+        ["tconst", "directors", "writers"],
+        [
+            ["tt0000001", "\\N", "\\N"],
+            ["tt0000002", "nm0000001", "\\N"],
+            ["tt0000004", "nm0000001", "\\N"],
+            ["tt0000003", "nm0000001", "\\N"],
+            ["tt0000005", "nm0000001", "\\N"],
+        ]
+    )
+    names = _write_tsv(
+        tmp_path / "name.basics.tsv",
+        ["nconst", "primaryName", "birthYear", "deathYear", "primaryProfession", "knownForTitles"],
+        [["nm0000001", "Jane Doe", "1970", "\\N", "director", "\\N"]]
+    )
+    tmdb = tmp_path / "tmdb_movies.jsonl"
+    tmdb.write_text(json.dumps({
+        "id": 4, "imdb_id": "tt0000004", "overview": "A family drama about two sisters.",
+        "budget": 1000, "revenue": 3000, "popularity": 12.5, "release_date": "2015-11-20",
+        "production_companies": [{"name": "Warner Bros. Pictures"}],
+    }) + "\n", encoding="utf-8")
+
+    store = LocalMovieStore(str(tmp_path / "local.sqlite"))
+    ingest_dumps(store, basics, ratings, crew, names, str(tmdb))
+    return store
+
+
+def test_titles_without_year_are_not_found(store):
+    assert store.find_title("Someday") is None
+    assert LocalProvider(store).find_movie("Someday") is None
+
+
+def test_filmography_ties_are_ordered_by_tconst(store):
+    assert [row[0] for row in store.get_filmography("nm0000001")] == [
+        "tt0000002", "tt0000003", "tt0000004"
+    ]
+
+
+def test_previous_rating_uses_the_ordered_filmography(store):
+    record = build_movie_record("Second Story", None, None, provider=LocalProvider(store))
+
+    assert record["imdb_rating"] == 8.0
+    assert record["imdb_rating_prev"] == 6.0
+    assert record["has_previous_rating"] is True
+    assert record["director_previous_movies"] == 1
+    assert record["ratio_utility"] == 3.0
+
+
+def test_title_without_directors_is_scored(store):
+    record = build_movie_record("Orphan Film", None, None, provider=LocalProvider(store))
+
+    assert record is not None
+    assert record["imdb_rating"] == 5.0
+    assert record["imdb_rating_prev"] == 5.0
+    assert record["has_previous_rating"] is False
+    assert record["director_previous_movies"] is None
+    assert record["num_genres"] == 2
@@ -0,0 +1,33 @@
+# tests/test_preprocess.py
+
+import numpy as np
+
+from utils.artifacts import get_model, get_tokenizer
+from utils.benchmark import fixture_titles
+from utils.build_dataframe import build_movie_records, records_to_dataframe
+from utils.embeddings import plots_to_embeddings
+from utils.preprocess import assemble_feature_matrix, predict_proba_matrix, preprocess_movie_df
+
+
+def test_feature_matrix_matches_dataframe_path(fake_api, embedding_table):
+    """
+    El camino sin DataFrames debe predecir EXACTAMENTE lo mismo que
+    preprocess_movie_df + model.predict_proba.
+    """
+    model = get_model()
+    records = [
+        r for r in build_movie_records(fixture_titles(), "k", "k")
+        if r["error"] is None
+    ]
+    assert records
+
+    embeddings = plots_to_embeddings(
+        [r["final_plot"] for r in records], get_tokenizer(), embedding_table
+    )
+
+    expected = model.predict_proba(
+        preprocess_movie_df(records_to_dataframe(records, embeddings))
+    )[:, 1]
+    actual = predict_proba_matrix(model, assemble_feature_matrix(records, embeddings))
+
+    np.testing.assert_array_equal(actual, expected)
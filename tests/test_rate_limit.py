@@ -0,0 +1,121 @@
+# tests/test_rate_limit.py
+
+import datetime
+
+import pytest
+
+import utils.rate_limit as rate_limit
+from utils.rate_limit import QuotaExhaustedError, TokenBucket, api_for_url
+from utils.tracing import METRICS, stage, trace
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    Reloj falso: time.monotonic() devuelve now[0] y time.sleep() solo
+    apunta lo que se habría dormido.
+    """
+    now = [100.0]
+    sleeps = []
+    monkeypatch.setattr(rate_limit.time, "monotonic", lambda: now[0])
+    monkeypatch.setattr(rate_limit.time, "sleep", sleeps.append)
+    return now, sleeps
+
+
+def test_burst_is_served_without_waiting(clock):
+    _, sleeps = clock
+    bucket = TokenBucket(rate=2, burst=5)
+
+    assert [bucket.acquire() for _ in range(5)] == [0.0] * 5
+    assert sleeps == []
+
+
+def test_callers_queue_at_the_configured_rate(clock):
+    now, sleeps = clock
+    bucket = TokenBucket(rate=2, burst=1)
+
+    assert bucket.acquire() == 0.0
+    # Sin avanzar el reloj, cada llamada reserva el siguiente turno
+    assert bucket.acquire() == pytest.approx(0.5)
+    assert bucket.acquire() == pytest.approx(1.0)
+    assert sleeps == pytest.approx([0.5, 1.0])
+
+    # Con el tiempo se recuperan tokens (hasta burst)
+    now[0] += 10
+    assert bucket.acquire() == 0.0
+
+    stats = bucket.stats()
+    assert stats["acquired"] == 4
+    assert stats["waited"] == 2
+    assert stats["max_wait_seconds"] == pytest.approx(1.0)
+
+
+def test_daily_budget_raises_quota_exhausted(clock):
+    bucket = TokenBucket(rate=100, burst=100, daily_budget=3, name="omdb")
+
+    for _ in range(3):
+        bucket.acquire()
+
+    with pytest.raises(QuotaExhaustedError, match="omdb"):
+        bucket.acquire()
+    assert bucket.stats()["used_today"] == 3
+
+
+def test_daily_budget_resets_on_the_next_utc_day(clock, monkeypatch):
+    day = [datetime.date(2024, 3, 1)]
+    monkeypatch.setattr(TokenBucket, "_today", staticmethod(lambda: day[0]))
+
+    bucket = TokenBucket(rate=100, burst=100, daily_budget=1)
+    bucket.acquire()
+    with pytest.raises(QuotaExhaustedError):
+        bucket.acquire()
+
+    day[0] += datetime.timedelta(days=1)
+    bucket.acquire()
+    assert bucket.stats()["used_today"] == 1
+
+
+def _counter(name, api):
+    prefix = f'{name}{{api="{api}"}} '
+    for line in METRICS.render().splitlines():
+        if line.startswith(prefix):
+            return float(line[len(prefix):])
+    return 0.0
+
+
+def test_waits_are_exported_to_metrics_and_trace(clock):
+    bucket = TokenBucket(rate=2, burst=1, daily_budget=2, name="prueba")
+    before = {
+        metric: _counter(f"subtext_rate_limit_{metric}", "prueba")
+        for metric in ("acquired_total", "waited_total", "wait_seconds_total", "quota_exhausted_total")
+    }
+
+    with trace("test") as t:
+        with stage("omdb"):
+            bucket.acquire()
+            bucket.acquire()
+            with pytest.raises(QuotaExhaustedError):
+                bucket.acquire()
+
+    row = next(r for r in t.rows() if r["stage"] == "omdb")
+    assert row["rate_limit_waits"] == 1
+    assert row["rate_limit_wait_s"] == pytest.approx(0.5)
+
+    after = {metric: _counter(f"subtext_rate_limit_{metric}", "prueba") for metric in before}
+    assert after["acquired_total"] - before["acquired_total"] == 2
+    assert after["waited_total"] - before["waited_total"] == 1
+    assert after["wait_seconds_total"] - before["wait_seconds_total"] == pytest.approx(0.5)
+    assert after["quota_exhausted_total"] - before["quota_exhausted_total"] == 1
+
+
+def test_invalid_limits_are_rejected():
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0, burst=1)
+    with pytest.raises(ValueError):
+        TokenBucket(rate=1, burst=0)
+
+
+def test_api_for_url():
+    assert api_for_url("https://www.omdbapi.com/") == "omdb"
+    assert api_for_url("https://api.themoviedb.org/3/movie/1") == "tmdb"
+    assert api_for_url("http://127.0.0.1:8000/") is None
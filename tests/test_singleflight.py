@@ -0,0 +1,192 @@
+# tests/test_singleflight.py
+
+import threading
+import time
+
+import pytest
+
+import utils.singleflight as singleflight
+from utils.pipeline import run_full_pipeline
+from utils.singleflight import ResultCache, SingleFlight, run_full_pipeline_coalesced
+
+
+def _wait_until(condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("timeout esperando a los hilos")
+        time.sleep(0.005)
+
+
+# =========================================================
+# 1. SingleFlight
+# =========================================================
+def test_single_flight_runs_once_for_concurrent_callers():
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+    n = 8
+
+    def fn():
+        calls.append(1)
+        release.wait(10)
+        return "resultado"
+
+    results = [None] * n
+
+    def worker(i):
+        results[i] = flight.do("clave", fn)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+
+    # El líder no termina hasta que los demás están esperando
+    _wait_until(lambda: flight.shared == n - 1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert flight.executed == 1
+    assert [r[0] for r in results] == ["resultado"] * n
+    assert sorted(r[1] for r in results) == [False] + [True] * (n - 1)
+    assert flight.in_flight() == 0
+
+
+def test_single_flight_shares_the_exception():
+    flight = SingleFlight()
+    release = threading.Event()
+    errors = []
+
+    def fn():
+        release.wait(10)
+        raise RuntimeError("fallo")
+
+    def worker():
+        try:
+            flight.do("clave", fn)
+        except RuntimeError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for t in threads:
+        t.start()
+    _wait_until(lambda: flight.shared == 3)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert len(errors) == 4
+    assert flight.executed == 1
+
+
+# =========================================================
+# 2. ResultCache
+# =========================================================
+def test_result_cache_expires_after_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(singleflight.time, "time", lambda: now[0])
+
+    cache = ResultCache(ttl=60, max_size=10)
+    cache.set("a", 1)
+
+    now[0] += 59
+    assert cache.get("a") == 1
+
+    now[0] += 1
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_result_cache_evicts_least_recently_used():
+    cache = ResultCache(ttl=60, max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # "a" pasa a ser la más reciente: se expulsa "b"
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_result_cache_get_without_counting():
+    cache = ResultCache()
+    cache.get("a", count=False)
+    cache.set("a", 1)
+    cache.get("a", count=False)
+    assert (cache.hits, cache.misses) == (0, 0)
+
+
+# =========================================================
+# 3. run_full_pipeline_coalesced contra FakeApiServer
+# =========================================================
+def test_concurrent_predictions_share_one_pipeline_run(fake_api, monkeypatch):
+    flight = SingleFlight()
+    monkeypatch.setattr(singleflight, "_flight", flight)
+    monkeypatch.setattr(singleflight, "_results", ResultCache())
+
+    release = threading.Event()
+    calls = []
+
+    def pipeline(*args, **kwargs):
+        calls.append(args[0])
+        release.wait(10)
+        return run_full_pipeline(*args, **kwargs)
+
+    monkeypatch.setattr(singleflight, "run_full_pipeline", pipeline)
+
+    n = 6
+    results = [None] * n
+
+    def worker(i):
+        results[i] = run_full_pipeline_coalesced("Barbie", "k", "k")
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    _wait_until(lambda: flight.shared == n - 1)
+    release.set()
+    for t in threads:
+        t.join()
+
+    assert calls == ["Barbie"]
+    probabilities = {proba for proba, _, _ in results}
+    assert len(probabilities) == 1 and None not in probabilities
+
+    # Cada llamador recibe su propia copia del DataFrame
+    frames = [df for _, _, df in results]
+    assert len({id(df) for df in frames}) == n
+
+    # La siguiente petición sale de la caché de resultados
+    proba, _, _ = run_full_pipeline_coalesced("Barbie", "k", "k")
+    assert calls == ["Barbie"]
+    assert proba == pytest.approx(probabilities.pop())
+
+
+def test_results_after_failed_calls_are_not_cached(flaky_api, monkeypatch):
+    monkeypatch.setattr(singleflight, "_results", ResultCache())
+
+    # OMDb caído: el pipeline lo ve como "no encontrada"
+    flaky_api.broken = ("/",)
+    proba, _, _ = run_full_pipeline_coalesced("Barbie", "k", "k")
+    assert proba is None
+    assert len(singleflight.get_result_cache()) == 0
+
+    flaky_api.broken = ()
+    proba, _, _ = run_full_pipeline_coalesced("Barbie", "k", "k")
+    assert proba is not None
+    assert len(singleflight.get_result_cache()) == 1
+
+
+def test_not_found_is_cached_when_no_call_failed(fake_api, monkeypatch):
+    monkeypatch.setattr(singleflight, "_results", ResultCache())
+
+    proba, _, _ = run_full_pipeline_coalesced("Una película que no existe", "k", "k")
+
+    assert proba is None
+    assert len(singleflight.get_result_cache()) == 1
@@ -0,0 +1,98 @@
+# tests/test_text_processing.py
+
+import re
+
+import emoji
+import numpy as np
+import pandas as pd
+import pytest
+
+from utils.benchmark import fixture_plots
+from utils.text_processing import (
+    _load_bundled_stop_words,
+    clean_plot,
+    clean_text,
+    remove_stopwords
+)
+
+
+def _original_clean_text(text):
+    # Implementación anterior a los patrones precompilados, tal cual
+    if pd.isna(text):
+        return ""
+    text = emoji.replace_emoji(text, replace='')
+    text = re.sub(r"http\S+|www\.\S+", "", text)
+    text = re.sub(r"[@#]\S+", "", text)
+    text = re.sub(r"<.*?>", "", text)
+    text = re.sub(r"([!?.,])\1+", r"\1", text)
+    text = re.sub(r"(.)\1{2,}", r"\1\1", text)
+    text = re.sub(r"[^a-zA-Z0-9áéíóúÁÉÍÓÚüÜñÑ.,!?'\s]", " ", text)
+    text = re.sub(r"\s+", " ", text).strip()
+    text = text.lower()
+    text = text.strip(".,!?'-_()[]{};:\"")
+    return text
+
+
+EDGE_CASES = [
+    "",
+    "!!!!",
+    "Wow!!!! Sooooo goooood...",
+    "..,,!!??",
+    "aaa...!!!bbb",
+    "!!!aaa???",
+    "....aaaa",
+    "Niñññño CAFÉÉÉ über",
+    "See https://example.com/x and www.test.org now",
+    "@user #hashtag text",
+    "<b>bold</b> <i>it</i>",
+    "🎬🎬 Movie 🍿 time 😀😀😀",
+    "tab\there\nnewline\r\n\x0bvt\x0cff",
+    "non breaking line em\x1cfs​zw",
+    "'quoted' -dash- (paren) [br] {cb}; colon: \"dq\"",
+    "It's the 1990's!!! 100% ... $$$ ###",
+]
+
+ALPHABET = list("aAbñÑéÉü0 .,!?'-_()<>@#/:;\"\t\n") + [" ", " ", "\x1c", "🎬", "ß", "ı", "İ", "www.", "http"]
+
+
+def _random_texts(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    return [
+        "".join(rng.choice(ALPHABET, size=rng.integers(0, 30)))
+        for _ in range(n)
+    ]
+
+
+@pytest.mark.parametrize("text", EDGE_CASES + [None, np.nan])
+def test_clean_text_matches_original_on_edge_cases(text):
+    assert clean_text(text) == _original_clean_text(text)
+
+
+def test_clean_text_matches_original_on_fixture_plots():
+    plots = fixture_plots()
+    assert plots
+    assert [clean_text(p) for p in plots] == [_original_clean_text(p) for p in plots]
+
+
+def test_clean_text_matches_original_on_random_text():
+    texts = _random_texts()
+    mismatches = [t for t in texts if clean_text(t) != _original_clean_text(t)]
+    assert mismatches == []
+
+
+def test_bundled_stopwords_match_nltk():
+    nltk_corpus = pytest.importorskip("nltk.corpus")
+    try:
+        words = nltk_corpus.stopwords.words("english")
+    except LookupError:
+        pytest.skip("stopwords de NLTK no descargadas")
+
+    assert _load_bundled_stop_words() == frozenset(_original_clean_text(w) for w in words)
+
+
+def test_clean_plot_removes_stopwords():
+    stop_words = list(_load_bundled_stop_words())
+    for plot in fixture_plots():
+        expected = " ".join(w for w in _original_clean_text(plot).split() if w not in stop_words)
+        assert clean_plot(plot) == expected
+        assert remove_stopwords(clean_text(plot)) == expected
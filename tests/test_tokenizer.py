@@ -0,0 +1,111 @@
+# tests/test_tokenizer.py
+#
+# Compara JsonTokenizer con salidas guardadas del Tokenizer de Keras
+# (tests/data/keras_tokenizer_sequences.json), así el test no necesita
+# Keras. Para regenerarlas, con Keras instalado:
+#
+#   python -m tests.test_tokenizer
+
+import json
+import os
+
+import numpy as np
+import pytest
+
+from utils.artifacts import ARTIFACT_PATHS
+from utils.benchmark import fixture_plots
+from utils.text_processing import clean_plot
+from utils.tokenizer import JsonTokenizer, from_keras_tokenizer
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "keras_tokenizer_sequences.json")
+
+EDGE_CASES = [
+    "",
+    "   ",
+    "Hello, WORLD!!! It's a test... (really) [maybe] {no}",
+    "tab\tseparated\nnew-line text_with_underscores",
+    "café Über niño naïve façade",
+    "numbers 1999 2024 007 3.14",
+    "a,b,c;d:e/f\\g|h~i^j`k",
+    "ünïcödé — dashes – and “quotes” ‘single’",
+    "oscar OSCAR Oscar oScAr",
+]
+
+# Tokenizers de Keras con otras opciones, entrenados sobre los plots
+VARIANTS = [
+    {"num_words": 50, "oov_token": "<OOV>"},
+    {"num_words": 30},
+    {"lower": False},
+    {"filters": "", "split": ","},
+    {"char_level": True, "lower": False},
+]
+
+
+def _texts():
+    rng = np.random.default_rng(0)
+    plots = fixture_plots()
+    with open(ARTIFACT_PATHS["tokenizer_json"], encoding="utf-8") as f:
+        vocabulary = list(json.load(f)["word_index"])
+
+    texts = list(EDGE_CASES)
+    texts += plots
+    texts += [clean_plot(p) for p in plots]
+    texts += [" ".join(rng.choice(vocabulary, size=rng.integers(1, 30))) for _ in range(100)]
+    texts += ["zzqx " + " ".join(rng.choice(vocabulary, size=5)).upper() + " ???" for _ in range(20)]
+    return texts
+
+
+def generate(path=DATA_PATH):
+    import joblib
+    from keras.src.legacy.preprocessing.text import Tokenizer
+
+    texts = _texts()
+    model_tokenizer = joblib.load(ARTIFACT_PATHS["tokenizer"])
+
+    variants = []
+    for options in VARIANTS:
+        tokenizer = Tokenizer(**options)
+        tokenizer.fit_on_texts(fixture_plots())
+        variants.append({
+            "options": options,
+            "config": from_keras_tokenizer(tokenizer).to_config(),
+            "sequences": tokenizer.texts_to_sequences(texts),
+        })
+
+    data = {
+        "texts": texts,
+        "model_sequences": model_tokenizer.texts_to_sequences(texts),
+        "variants": variants,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+    return path
+
+
+@pytest.fixture(scope="module")
+def saved():
+    with open(DATA_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_saved_texts_are_current(saved):
+    # Si cambian los fixtures o el vocabulario, hay que regenerar
+    assert saved["texts"] == _texts()
+
+
+def test_exported_model_tokenizer_matches_keras(saved):
+    tokenizer = JsonTokenizer.load(ARTIFACT_PATHS["tokenizer_json"])
+    assert tokenizer.texts_to_sequences(saved["texts"]) == saved["model_sequences"]
+
+
+@pytest.mark.parametrize("index", range(len(VARIANTS)))
+def test_tokenizer_options_match_keras(saved, index):
+    variant = saved["variants"][index]
+    assert variant["options"] == VARIANTS[index]
+
+    tokenizer = JsonTokenizer(**variant["config"])
+    assert tokenizer.texts_to_sequences(saved["texts"]) == variant["sequences"]
+
+
+if __name__ == "__main__":
+    print(generate())
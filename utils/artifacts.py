@@ -0,0 +1,142 @@
+# utils/artifacts.py
+
+import os
+import threading
+
+import joblib
+
+from utils.embedding_store import EmbeddingTable, GloveStore
+from utils.tokenizer import JsonTokenizer
+
+
+# =========================================================
+# Rutas de los artefactos (relativas a la raíz del repo)
+# =========================================================
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ARTIFACT_PATHS = {
+    "model": os.path.join(BASE_DIR, "modelo_prediccion_nominacion_oscar_v2.pkl"),
+    "tokenizer": os.path.join(BASE_DIR, "tokenizer_modelo_prediccion_nominacion_oscar_v2.pkl"),
+    # Tokenizer exportado a JSON (no requiere TensorFlow)
+    "tokenizer_json": os.path.join(BASE_DIR, "tokenizer_modelo_prediccion_nominacion_oscar_v2.json"),
+    "embedding_index": os.path.join(BASE_DIR, "glove_index_modelo_prediccion_nominacion_oscar_v2.pkl"),
+    # Prefijo (sin extensión) del store memory-mapped: .npy + .vocab.json
+    "glove_store": os.path.join(BASE_DIR, "glove_store_modelo_prediccion_nominacion_oscar_v2"),
+    # Prefijo de la tabla podada al vocabulario del tokenizer: .npy + .mask.npy
+    "embedding_table": os.path.join(BASE_DIR, "embedding_table_modelo_prediccion_nominacion_oscar_v2"),
+}
+
+
+# =========================================================
+# Registro de artefactos a nivel de proceso
+# =========================================================
+class ArtifactRegistry:
+    """
+    Carga cada artefacto de forma perezosa UNA sola vez por proceso
+    y lo comparte entre todas las sesiones/hilos.
+
+    - loaders: diccionario {nombre: función sin argumentos que carga el artefacto}
+    """
+
+    def __init__(self, loaders):
+        self._loaders = dict(loaders)
+        self._cache = {}
+        self._locks = {name: threading.Lock() for name in self._loaders}
+
+    def get(self, name):
+        if name in self._cache:
+            return self._cache[name]
+
+        if name not in self._loaders:
+            raise KeyError(f"Artefacto desconocido: {name}")
+
+        # Un lock por artefacto: dos sesiones que piden el mismo
+        # artefacto a la vez esperan a una sola carga.
+        with self._locks[name]:
+            if name not in self._cache:
+                self._cache[name] = self._loaders[name]()
+
+        return self._cache[name]
+
+    def is_loaded(self, name):
+        return name in self._cache
+
+    def load_uncached(self, name):
+        """
+        Carga el artefacto de nuevo desde disco sin leer ni modificar
+        la caché (útil para medir el tiempo de carga).
+        """
+        return self._loaders[name]()
+
+    @property
+    def names(self):
+        return list(self._loaders)
+
+    def warm_up(self, names=None):
+        """
+        Precarga los artefactos indicados (o todos) y los devuelve
+        en un diccionario.
+        """
+        names = list(self._loaders) if names is None else list(names)
+        return {name: self.get(name) for name in names}
+
+    def clear(self):
+        self._cache.clear()
+
+
+def _joblib_loader(name):
+    return lambda: joblib.load(ARTIFACT_PATHS[name])
+
+
+def _load_tokenizer():
+    """
+    Prefiere el tokenizer exportado a JSON (ver utils/tokenizer.py);
+    el pickle de Keras obliga a importar TensorFlow.
+    """
+    if os.path.exists(ARTIFACT_PATHS["tokenizer_json"]):
+        return JsonTokenizer.load(ARTIFACT_PATHS["tokenizer_json"])
+    return joblib.load(ARTIFACT_PATHS["tokenizer"])
+
+
+def _load_embedding_index():
+    """
+    Orden de preferencia (ver utils/embedding_store.py):
+    1. Tabla podada al vocabulario del tokenizer (~1 MB)
+    2. Store GloVe memory-mapped
+    3. Pickle original
+    """
+    if EmbeddingTable.exists(ARTIFACT_PATHS["embedding_table"]):
+        return EmbeddingTable.open(ARTIFACT_PATHS["embedding_table"])
+    if GloveStore.exists(ARTIFACT_PATHS["glove_store"]):
+        return GloveStore.open(ARTIFACT_PATHS["glove_store"])
+    return joblib.load(ARTIFACT_PATHS["embedding_index"])
+
+
+registry = ArtifactRegistry({
+    "model": _joblib_loader("model"),
+    "tokenizer": _load_tokenizer,
+    "embedding_index": _load_embedding_index,
+})
+
+
+# =========================================================
+# Accesos directos
+# =========================================================
+def get_model():
+    return registry.get("model")
+
+
+def get_tokenizer():
+    return registry.get("tokenizer")
+
+
+def get_embedding_index():
+    return registry.get("embedding_index")
+
+
+def warm_up():
+    """
+    Carga modelo, tokenizer y embedding_index si aún no están en memoria.
+    Pensado para llamarse al arrancar el proceso (ej. desde app.py).
+    """
+    return registry.warm_up()
@@ -0,0 +1,291 @@
+# utils/batch_runner.py
+#
+# Jobs batch largos que se pueden reanudar: lee los títulos de un
+# archivo en streaming, puntúa por bloques con run_batch_pipeline y
+# va añadiendo los resultados a la salida, guardando un checkpoint
+# tras cada bloque. Si el proceso se cae o se agota la cuota de una
+# API, volver a lanzar el mismo job continúa donde se quedó.
+
+import csv
+import json
+import os
+import time
+from itertools import islice
+
+import pandas as pd
+
+from utils.pipeline import BATCH_RESULT_COLUMNS, run_batch_pipeline
+from utils.rate_limit import QuotaExhaustedError
+
+
+# Columnas de la salida: posición en el archivo de entrada + resultado
+OUTPUT_COLUMNS = ["row"] + BATCH_RESULT_COLUMNS
+
+# Tipos fijos: todas las partes Parquet deben tener el mismo esquema,
+# aunque en un bloque una columna sea toda None
+OUTPUT_DTYPES = {
+    "row": "int64",
+    "query_title": "string",
+    "tmdb_id": "Int64",
+    "probability": "float64",
+    "poster_url": "string",
+    "error": "string",
+}
+
+# Títulos por bloque. El checkpoint sólo avanza al terminar un bloque,
+# así que al reanudar se vuelven a puntuar hasta DEFAULT_CHUNK_SIZE - 1
+# títulos (con el feature store activo, casi sin llamadas a las APIs).
+# Bloques más grandes ahorran escrituras del checkpoint, partes Parquet
+# y llamadas al modelo; con 5 se repite poco y el coste fijo sigue
+# siendo despreciable frente a las llamadas HTTP de cada título.
+DEFAULT_CHUNK_SIZE = 5
+
+
+# =========================================================
+# 1. Entrada: títulos en streaming
+# =========================================================
+def read_titles(path, column="title"):
+    """
+    Generador de (fila, título) leyendo el archivo línea a línea.
+
+    - .csv: columna `column` (con cabecera)
+    - .jsonl / .ndjson: clave `column` de cada objeto
+    - cualquier otro: un título por línea
+
+    `fila` es la posición del registro en el archivo, empezando en 0
+    (en CSV, la primera fila tras la cabecera). Las filas vacías se
+    saltan, pero cuentan para el número de fila.
+    """
+    ext = os.path.splitext(path)[1].lower()
+
+    with open(path, encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            # csv.reader (no DictReader) para que las líneas en blanco
+            # lleguen como [] y no se pierda la numeración
+            reader = csv.reader(f)
+            header = next(reader, [])
+            if column not in header:
+                raise ValueError(f"{path} no tiene la columna '{column}'")
+            position = header.index(column)
+            lines = (r[position] if len(r) > position else None for r in reader)
+        elif ext in (".jsonl", ".ndjson"):
+            lines = (json.loads(line).get(column) if line.strip() else None for line in f)
+        else:
+            lines = f
+
+        for row, title in enumerate(lines):
+            title = (title or "").strip()
+            if title:
+                yield row, title
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+# =========================================================
+# 2. Salida: CSV con append o partes Parquet
+# =========================================================
+class CsvOutput:
+    """
+    Un solo CSV al que se añaden filas. offset() es su tamaño en
+    bytes; al reanudar se trunca al del checkpoint para descartar
+    un bloque escrito a medias o no confirmado.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def offset(self):
+        return os.path.getsize(self.path) if os.path.exists(self.path) else 0
+
+    def rewind(self, offset):
+        if os.path.exists(self.path):
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+
+    def write(self, df, chunk_index):
+        header = self.offset() == 0
+        with open(self.path, "a", encoding="utf-8", newline="") as f:
+            df.to_csv(f, index=False, header=header)
+            f.flush()
+            os.fsync(f.fileno())
+
+
+class ParquetOutput:
+    """
+    Un directorio con una parte por bloque (part-00000.parquet, ...).
+    offset() es el número de partes; al reanudar se borran las que
+    pasan del checkpoint. Requiere pyarrow.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _parts(self):
+        return sorted(f for f in os.listdir(self.path) if f.startswith("part-") and f.endswith(".parquet"))
+
+    def offset(self):
+        return len(self._parts())
+
+    def rewind(self, offset):
+        for name in self._parts()[offset:]:
+            os.remove(os.path.join(self.path, name))
+
+    def write(self, df, chunk_index):
+        part = os.path.join(self.path, f"part-{chunk_index:05d}.parquet")
+        tmp = part + ".tmp"
+        df.to_parquet(tmp, index=False)
+        os.replace(tmp, part)
+
+
+def open_output(path):
+    """
+    .csv → CsvOutput; cualquier otra ruta (p. ej. "resultados.parquet/")
+    → ParquetOutput.
+    """
+    if path.lower().endswith(".csv"):
+        return CsvOutput(path)
+    return ParquetOutput(path.rstrip("/\\"))
+
+
+# =========================================================
+# 3. Checkpoint
+# =========================================================
+def load_checkpoint(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_checkpoint(path, checkpoint):
+    # Escritura atómica: nunca queda un checkpoint a medias
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+# =========================================================
+# 4. Job
+# =========================================================
+def score_chunks(rows, omdb_key, tmdb_key, chunk_size=DEFAULT_CHUNK_SIZE, provider=None):
+    """
+    Generador: por cada bloque de (fila, título) devuelve un
+    DataFrame con OUTPUT_COLUMNS. QuotaExhaustedError se propaga.
+    """
+    for chunk in chunked(rows, chunk_size):
+        results, _ = run_batch_pipeline(
+            [title for _, title in chunk], omdb_key, tmdb_key,
+            return_dataframe=False, provider=provider
+        )
+        results.insert(0, "row", [row for row, _ in chunk])
+        yield results[OUTPUT_COLUMNS].astype(OUTPUT_DTYPES)
+
+
+def run_job(
+    input_path,
+    output_path,
+    omdb_key,
+    tmdb_key,
+    checkpoint_path=None,
+    column="title",
+    chunk_size=DEFAULT_CHUNK_SIZE,
+    provider=None,
+    progress=None
+):
+    """
+    Puntúa todos los títulos de input_path y los añade a output_path.
+
+    - checkpoint_path: por defecto output_path + ".checkpoint.json"
+    - column: columna/clave con el título (CSV / JSONL)
+    - chunk_size: títulos por bloque; el checkpoint avanza por bloques
+      (ver DEFAULT_CHUNK_SIZE)
+    - provider: origen de los datos (por defecto las APIs en vivo)
+    - progress: función llamada tras cada bloque con el checkpoint
+
+    Si ya existe un checkpoint del mismo job, se salta lo ya hecho;
+    si no, la salida se empieza de cero.
+    Si se agota la cuota diaria, se detiene limpiamente: el bloque en
+    curso no se confirma y se devuelve status "quota_exhausted".
+
+    Devuelve el checkpoint final (diccionario).
+    """
+    if checkpoint_path is None:
+        checkpoint_path = output_path.rstrip("/\\") + ".checkpoint.json"
+
+    output = open_output(output_path)
+    checkpoint = load_checkpoint(checkpoint_path)
+
+    if checkpoint is not None:
+        if os.path.abspath(checkpoint["input"]) != os.path.abspath(input_path):
+            raise ValueError(
+                f"El checkpoint {checkpoint_path} es de otro archivo de entrada: {checkpoint['input']}"
+            )
+        # Descartar lo escrito después del último checkpoint
+        output.rewind(checkpoint["output_offset"])
+    else:
+        output.rewind(0)
+        checkpoint = {
+            "input": input_path,
+            "output": output_path,
+            "rows_done": 0,
+            "titles_done": 0,
+            "chunks_done": 0,
+            "output_offset": 0,
+            "status": "running",
+            "started_at": time.time(),
+        }
+
+    # Filas ya confirmadas: se saltan sin volver a puntuarlas
+    rows = (
+        (row, title) for row, title in read_titles(input_path, column)
+        if row >= checkpoint["rows_done"]
+    )
+
+    checkpoint["status"] = "running"
+    try:
+        for df in score_chunks(rows, omdb_key, tmdb_key, chunk_size, provider):
+            # Primero la salida, después el checkpoint
+            output.write(df, checkpoint["chunks_done"])
+
+            checkpoint["rows_done"] = int(df["row"].iloc[-1]) + 1
+            checkpoint["titles_done"] += len(df)
+            checkpoint["chunks_done"] += 1
+            checkpoint["output_offset"] = output.offset()
+            checkpoint["updated_at"] = time.time()
+            save_checkpoint(checkpoint_path, checkpoint)
+
+            if progress is not None:
+                progress(checkpoint)
+
+    except QuotaExhaustedError as e:
+        checkpoint["status"] = "quota_exhausted"
+        checkpoint["error"] = str(e)
+        save_checkpoint(checkpoint_path, checkpoint)
+        return checkpoint
+
+    checkpoint["status"] = "completed"
+    checkpoint.pop("error", None)
+    checkpoint["updated_at"] = time.time()
+    save_checkpoint(checkpoint_path, checkpoint)
+
+    return checkpoint
+
+
+def read_output(path):
+    """
+    Lee la salida de un job (CSV o directorio de partes Parquet).
+    """
+    if path.lower().endswith(".csv"):
+        return pd.read_csv(path)
+    return pd.read_parquet(path.rstrip("/\\"))
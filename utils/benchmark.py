@@ -0,0 +1,398 @@
+# utils/benchmark.py
+#
+# Benchmarks del pipeline de predicción:
+#   python -m utils.cli bench [--output bench.json] [--compare base.json]
+
+import json
+import platform
+import resource
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from utils.artifacts import registry
+from utils.build_dataframe import build_movie_dataframe, build_movie_records
+from utils.director_profile import get_profile_cache
+from utils.embeddings import plot_to_embedding, plots_to_embeddings
+from utils.fake_server import DEFAULT_FIXTURES_PATH, FakeApiServer, load_fixtures
+from utils.feature_store import get_feature_store, set_feature_store
+from utils.http_cache import get_response_cache, set_response_cache
+from utils.prediction_index import restore_prediction_index, set_prediction_index
+from utils.pipeline import load_artifacts, run_batch_pipeline, run_full_pipeline
+from utils.preprocess import (
+    assemble_feature_matrix,
+    feature_matrix_to_frame,
+    preprocess_movie_df
+)
+from utils.text_processing import clean_text
+
+
+DEFAULT_REPEAT = 20
+DEFAULT_WARMUP = 2
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_LATENCY = 0.02
+
+
+# =========================================================
+# 1. Medición y estadísticas
+# =========================================================
+def peak_rss_mb():
+    """
+    Pico de memoria residente del proceso (MB) desde que arrancó.
+    Es un máximo de toda la vida del proceso, no de un benchmark: se
+    reporta una sola vez en report["meta"].
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def measure(fn, repeat=DEFAULT_REPEAT, warmup=DEFAULT_WARMUP, setup=None):
+    """
+    Ejecuta fn() warmup + repeat veces y devuelve los segundos de
+    cada una de las `repeat` medidas. setup() (si se pasa) corre
+    antes de cada ejecución y no se mide.
+    """
+    samples = []
+    for i in range(warmup + repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            samples.append(elapsed)
+    return samples
+
+
+def summarize(name, samples, items=1):
+    """
+    - items: unidades procesadas en cada ejecución (títulos, textos...)
+      para calcular el throughput
+    """
+    s = np.asarray(samples, dtype=np.float64)
+    return {
+        "name": name,
+        "runs": len(s),
+        "items_per_run": items,
+        "mean_ms": float(s.mean() * 1000),
+        "p50_ms": float(np.percentile(s, 50) * 1000),
+        "p95_ms": float(np.percentile(s, 95) * 1000),
+        "p99_ms": float(np.percentile(s, 99) * 1000),
+        "min_ms": float(s.min() * 1000),
+        "max_ms": float(s.max() * 1000),
+        "throughput_per_s": float(items * len(s) / s.sum()) if s.sum() > 0 else None,
+    }
+
+
+# =========================================================
+# 2. Datos de entrada (a partir de los fixtures)
+# =========================================================
+def fixture_titles(fixtures_path=DEFAULT_FIXTURES_PATH):
+    with open(fixtures_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    return sorted({
+        r["params"]["t"] for r in data["responses"]
+        if r["path"] == "/" and "t" in r.get("params", {})
+        and r["body"].get("Response") != "False"
+    })
+
+
+def fixture_plots(fixtures_path=DEFAULT_FIXTURES_PATH):
+    with open(fixtures_path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    return [
+        r["body"]["Plot"] for r in data["responses"]
+        if r["path"] == "/" and r["body"].get("Plot")
+    ]
+
+
+def _cycle(values, n):
+    return [values[i % len(values)] for i in range(n)]
+
+
+# =========================================================
+# 3. Benchmarks
+# =========================================================
+class BenchmarkContext:
+    """
+    Estado compartido por los benchmarks: artefactos, servidor falso,
+    títulos y textos de prueba.
+    """
+
+    def __init__(self, fixtures_path, latency, jitter, batch_size, repeat, warmup):
+        self.fixtures_path = fixtures_path
+        self.latency = latency
+        self.jitter = jitter
+        self.batch_size = batch_size
+        self.repeat = repeat
+        self.warmup = warmup
+
+        self.titles = fixture_titles(fixtures_path)
+        self.plots = fixture_plots(fixtures_path)
+        self.batch_titles = _cycle(self.titles, batch_size)
+        self.batch_plots = [clean_text(p) for p in _cycle(self.plots, batch_size)]
+
+        self._artifacts = None
+        self._single_df = None
+
+    @property
+    def artifacts(self):
+        if self._artifacts is None:
+            self._artifacts = load_artifacts()
+        return self._artifacts
+
+    def run(self, fn, setup=None, repeat=None):
+        return measure(
+            fn,
+            repeat=self.repeat if repeat is None else repeat,
+            warmup=self.warmup,
+            setup=setup
+        )
+
+
+def _cold_director_profiles():
+    # Cada ejecución paga las consultas del director, como la primera vez
+    get_profile_cache().clear()
+
+
+def bench_artifact_load(bc):
+    results = []
+    for name in registry.names:
+        try:
+            samples = bc.run(lambda: registry.load_uncached(name), repeat=min(bc.repeat, 3))
+            results.append(summarize(f"artifacts.load.{name}", samples))
+        except Exception as e:
+            results.append({"name": f"artifacts.load.{name}", "error": f"{type(e).__name__}: {e}"})
+    return results
+
+
+def bench_clean_text(bc):
+    raw = _cycle(bc.plots, bc.batch_size)
+    samples = bc.run(lambda: [clean_text(p) for p in raw])
+    return [summarize("text.clean_text", samples, items=len(raw))]
+
+
+def bench_plot_to_embedding(bc):
+    _, tokenizer, embedding_index = bc.artifacts
+    texts = bc.batch_plots
+
+    samples = bc.run(lambda: [
+        plot_to_embedding(t, tokenizer, embedding_index, embedding_dim=100) for t in texts
+    ])
+    results = [summarize("embeddings.plot_to_embedding", samples, items=len(texts))]
+
+    samples = bc.run(lambda: plots_to_embeddings(texts, tokenizer, embedding_index))
+    results.append(summarize("embeddings.plots_to_embeddings", samples, items=len(texts)))
+    return results
+
+
+def bench_build_dataframe(bc):
+    _, tokenizer, embedding_index = bc.artifacts
+    title = bc.titles[0]
+
+    def build():
+        bc._single_df = build_movie_dataframe(title, tokenizer, embedding_index, "bench", "bench")
+
+    samples = bc.run(build, setup=_cold_director_profiles)
+    return [summarize("build.build_movie_dataframe", samples)]
+
+
+def bench_preprocess(bc):
+    if bc._single_df is None:
+        bench_build_dataframe(bc)
+    df = bc._single_df
+
+    samples = bc.run(lambda: preprocess_movie_df(df))
+    return [summarize("preprocess.preprocess_movie_df", samples)]
+
+
+def bench_predict_proba(bc):
+    model, tokenizer, embedding_index = bc.artifacts
+
+    records = build_movie_records(bc.batch_titles, "bench", "bench")
+    embeddings = plots_to_embeddings([r["final_plot"] for r in records], tokenizer, embedding_index)
+    X = assemble_feature_matrix(records, embeddings)
+
+    single = feature_matrix_to_frame(X[:1])
+    batch = feature_matrix_to_frame(X)
+
+    results = [summarize("model.predict_proba", bc.run(lambda: model.predict_proba(single)))]
+    samples = bc.run(lambda: model.predict_proba(batch))
+    results.append(summarize("model.predict_proba.batch", samples, items=len(X)))
+    return results
+
+
+def bench_pipeline_single(bc):
+    bc.artifacts
+    title = bc.titles[0]
+
+    samples = bc.run(
+        lambda: run_full_pipeline(title, "bench", "bench", return_dataframe=False),
+        setup=_cold_director_profiles
+    )
+    return [summarize("pipeline.single", samples)]
+
+
+def bench_pipeline_batch(bc):
+    bc.artifacts
+    titles = bc.batch_titles
+
+    samples = bc.run(
+        lambda: run_batch_pipeline(titles, "bench", "bench", return_dataframe=False),
+        setup=_cold_director_profiles,
+        repeat=max(1, bc.repeat // 4)
+    )
+    return [summarize("pipeline.batch", samples, items=len(titles))]
+
+
+BENCHMARKS = {
+    "artifacts": bench_artifact_load,
+    "clean_text": bench_clean_text,
+    "embedding": bench_plot_to_embedding,
+    "build": bench_build_dataframe,
+    "preprocess": bench_preprocess,
+    "predict": bench_predict_proba,
+    "pipeline_single": bench_pipeline_single,
+    "pipeline_batch": bench_pipeline_batch,
+}
+
+
+# =========================================================
+# 4. Ejecución completa
+# =========================================================
+def run_benchmarks(
+    names=None,
+    repeat=DEFAULT_REPEAT,
+    warmup=DEFAULT_WARMUP,
+    batch_size=DEFAULT_BATCH_SIZE,
+    latency=DEFAULT_LATENCY,
+    jitter=0.0,
+    fixtures_path=DEFAULT_FIXTURES_PATH
+):
+    """
+    Ejecuta los benchmarks indicados (por defecto todos) contra el
+    servidor falso de utils/fake_server.py, sin caché HTTP ni feature
+    store, y devuelve un reporte serializable a JSON.
+
+    Un benchmark que falla (p. ej. falta un artefacto) queda
+    registrado con su error y no detiene el resto.
+    """
+    names = list(BENCHMARKS) if names is None else list(names)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise ValueError(f"Benchmarks desconocidos: {unknown}")
+
+    bc = BenchmarkContext(fixtures_path, latency, jitter, batch_size, repeat, warmup)
+
+    # Medir el trabajo real, no la caché
+    previous_cache, previous_store = get_response_cache(), get_feature_store()
+    set_response_cache(None)
+    set_feature_store(None)
+    previous_index = set_prediction_index(None)
+
+    results = []
+    try:
+        with FakeApiServer(load_fixtures(fixtures_path), latency=latency, jitter=jitter, seed=0):
+            for name in names:
+                try:
+                    results.extend(BENCHMARKS[name](bc))
+                except Exception as e:
+                    results.append({"name": name, "error": f"{type(e).__name__}: {e}"})
+    finally:
+        set_response_cache(previous_cache)
+        set_feature_store(previous_store)
+        restore_prediction_index(previous_index)
+
+    return {
+        "meta": {
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "warmup": warmup,
+            "batch_size": batch_size,
+            "latency_s": latency,
+            "jitter_s": jitter,
+            "peak_rss_mb": peak_rss_mb(),
+        },
+        "results": results,
+    }
+
+
+# =========================================================
+# 5. Salida y comparación
+# =========================================================
+def save_report(report, path):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load_report(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def format_report(report):
+    header = f"{'benchmark':<34}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'items/s':>12}"
+    lines = [header, "-" * len(header)]
+
+    for r in report["results"]:
+        if "error" in r:
+            lines.append(f"{r['name']:<34}  ERROR: {r['error']}")
+            continue
+        throughput = r["throughput_per_s"]
+        lines.append(
+            f"{r['name']:<34}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}{r['p99_ms']:>10.2f}"
+            f"{(throughput or 0):>12.1f}"
+        )
+
+    peak = report["meta"].get("peak_rss_mb")
+    if peak is not None:
+        lines.append(f"\nPico de memoria del proceso: {peak:.0f} MB")
+    return "\n".join(lines)
+
+
+def compare_reports(baseline, current, threshold=0.10, metrics=("p50_ms", "p95_ms")):
+    """
+    Compara dos reportes benchmark a benchmark.
+
+    Devuelve una lista de filas {name, metric, baseline, current, change}
+    y marca regression=True cuando current > baseline * (1 + threshold).
+    """
+    base = {r["name"]: r for r in baseline["results"] if "error" not in r}
+    rows = []
+
+    for r in current["results"]:
+        b = base.get(r["name"])
+        if b is None or "error" in r:
+            continue
+        for metric in metrics:
+            before, after = b[metric], r[metric]
+            change = (after - before) / before if before else 0.0
+            rows.append({
+                "name": r["name"],
+                "metric": metric,
+                "baseline": before,
+                "current": after,
+                "change": change,
+                "regression": change > threshold,
+            })
+
+    return rows
+
+
+def format_comparison(rows):
+    lines = [f"{'benchmark':<34}{'métrica':>9}{'antes':>10}{'ahora':>10}{'cambio':>9}"]
+    for row in rows:
+        flag = "  <-- regresión" if row["regression"] else ""
+        lines.append(
+            f"{row['name']:<34}{row['metric']:>9}{row['baseline']:>10.2f}"
+            f"{row['current']:>10.2f}{row['change']:>+9.1%}{flag}"
+        )
+    return "\n".join(lines)
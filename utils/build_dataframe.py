@@ -1,28 +1,40 @@
 # utils/build_dataframe.py
 
+import numpy as np
 import pandas as pd
 
-from utils.tmdb_api import (
-    get_basic_movie_info_df,
-    get_movie_info,
-    get_omdb_details,
-    get_director_or_writer_tmdb_id,
-    get_previous_director_imdb_rating,
-    get_tmdb_movie_details,
-    get_directed_movies_from_tmdb,
-    get_birthdate_from_tmdb,
-    get_release_month_tmdb
-)
+from utils.providers import LiveProvider
+from utils.rate_limit import QuotaExhaustedError
 
 from utils.features import (
-    count_previous_directed_movies,
     calculate_age_at_nomination,
     count_production_companies,
     is_big_studio
 )
 
-from utils.text_processing import clean_text, stop_words
-from utils.embeddings import plot_to_embedding
+from utils.task_graph import DEFAULT_MAX_WORKERS, run_task_graph
+from utils.text_processing import clean_plot
+from utils.tracing import stage, staged
+from utils.embeddings import plots_to_embeddings
+
+
+# Columnas finales (antes de los embeddings)
+FEATURE_COLUMNS = [
+    "tmdb_id",
+    "imdb_rating",
+    "imdb_rating_prev",
+    "runtime",
+    "popularity",
+    "director_previous_movies",
+    "director_age_at_nomination",
+    "release_month",
+    "ratio_utility",
+    "num_genres",
+    "num_production_companies",
+    "is_award_season_release",
+    "is_big_studio",
+    "final_plot"
+]
 
 
 def build_movie_dataframe(
@@ -30,130 +42,287 @@ def build_movie_dataframe(
     tokenizer,
     embedding_index,
     omdb_key,
-    tmdb_key
+    tmdb_key,
+    max_workers=DEFAULT_MAX_WORKERS,
+    ctx=None,
+    provider=None
 ):
     """
     Construye el DataFrame final con TODAS las features necesarias
     para alimentar el modelo.
     """
+    df = build_movie_features(title, omdb_key, tmdb_key, max_workers, ctx, provider)
+
+    if df is None:
+        return None
+
+    return add_plot_embeddings(df, tokenizer, embedding_index)
+
+
+def build_movie_features(
+    title,
+    omdb_key,
+    tmdb_key,
+    max_workers=DEFAULT_MAX_WORKERS,
+    ctx=None,
+    provider=None
+):
+    """
+    Igual que build_movie_record pero devuelve un DataFrame de una
+    fila con FEATURE_COLUMNS. Devuelve None si no se encuentra.
+    """
+    record = build_movie_record(title, omdb_key, tmdb_key, max_workers, ctx, provider)
+
+    if record is None:
+        return None
+
+    return pd.DataFrame([record])[FEATURE_COLUMNS]
+
+
+def build_movie_record(
+    title,
+    omdb_key,
+    tmdb_key,
+    max_workers=DEFAULT_MAX_WORKERS,
+    ctx=None,
+    provider=None
+):
+    """
+    Pasos 1–15: consulta OMDb/TMDb y calcula las features de UNA
+    película, sin embeddings ni pandas.
+
+    Devuelve un diccionario con FEATURE_COLUMNS más title, year e
+    imdb_id, o None si no se encuentra.
+
+    - max_workers: máximo de llamadas HTTP simultáneas (pasos 2–10)
+    - ctx: FetchContext compartido; cada recurso se descarga una vez
+    - provider: origen de los datos (ver utils/providers.py); por
+      defecto las APIs en vivo con omdb_key / tmdb_key
+    """
+    if provider is None:
+        provider = LiveProvider(omdb_key, tmdb_key, ctx)
 
     # 1. Información básica
-    df = get_basic_movie_info_df(title, omdb_key, tmdb_key)
+    with stage("find_movie"):
+        basic = provider.find_movie(title)
 
-    if df is None or df.empty or df["imdb_id"].iloc[0] is None:
+    if basic is None:
         return None
 
-    df["year"] = df["year"].astype(float)
-
-    # 2. imdb_rating y director
-    df[["imdb_rating", "director"]] = df["imdb_id"].apply(
-        lambda imdb: get_movie_info(imdb, omdb_key)
-    )
-
-    df["director_first"] = df["director"].apply(lambda x: x.split(",")[0].strip())
-
-    # 3. runtime, genre, plot
-    df[["runtime", "genre", "plot"]] = df["imdb_id"].apply(
-        lambda imdb: get_omdb_details(imdb, omdb_key)
-    )
-
-    # 4. TMDb ID del director
-    df["director_tmdb_id"] = df["director_first"].apply(
-        lambda name: get_director_or_writer_tmdb_id(name, tmdb_key)
-    )
-
-    # 5. IMDb rating previo del director
-    df["imdb_rating_prev"] = df.apply(
-        lambda row: get_previous_director_imdb_rating(
-            director_tmdb_id=row["director_tmdb_id"],
-            current_imdb_id=row["imdb_id"],
-            nomination_year=row["year"],
-            imdb_rating_actual=row["imdb_rating"],
-            omdb_key=omdb_key,
-            tmdb_key=tmdb_key
-        ),
-        axis=1
-    )
-
-    # 6. budget, revenue, popularity, production_companies
-    df[["budget", "revenue", "popularity", "production_companies"]] = \
-        df["tmdb_id"].apply(lambda tmdb_id: get_tmdb_movie_details(tmdb_id, tmdb_key))
-
-    # 7. Número de películas previas del director
-    df["director_previous_movies"] = df.apply(
-        lambda row: count_previous_directed_movies(
-            row["director_first"],
-            row["year"],
-            tmdb_key
+    imdb_id, tmdb_id = basic["imdb_id"], basic["tmdb_id"]
+    year = float(basic["year"])
+
+    # Pasos 2–10 como grafo de dependencias: las llamadas que solo
+    # necesitan imdb_id / tmdb_id salen en paralelo; las del director
+    # esperan a conocer su nombre y su TMDb ID.
+    tasks = {
+        # 2. imdb_rating y director
+        "movie_info": ([], lambda: provider.movie_info(imdb_id)),
+
+        # (None si la llamada a OMDb falló)
+        "director_first": (["movie_info"], lambda info: (info[1] or "N/A").split(",")[0].strip()),
+
+        # 3. runtime, genre, plot
+        "movie_details": ([], lambda: provider.movie_details(imdb_id)),
+
+        # 4, 7 y 8. Perfil del director: TMDb ID, filmografía y fecha de
+        #    nacimiento, memoizado y compartido entre películas
+        "director_profile": (["director_first"], provider.director_profile),
+
+        # 5. IMDb rating previo del director (None si no hay película
+        #    previa; el fallback al rating actual se aplica abajo)
+        "imdb_rating_prev": (
+            ["director_profile"],
+            lambda profile: provider.previous_imdb_rating(profile, imdb_id, None)
         ),
-        axis=1
-    )
 
-    # 8. Fecha de nacimiento del director
-    df["director_birthdate"] = df["director_tmdb_id"].apply(
-        lambda tmdb_id: get_birthdate_from_tmdb(tmdb_id, tmdb_key)
-    )
+        # 6. budget, revenue, popularity, production_companies
+        "production_details": ([], lambda: provider.production_details(tmdb_id)),
+
+        # 10. Mes de estreno
+        "release_month": ([], lambda: provider.release_month(tmdb_id)),
+    }
+
+    # Cada tarea se mide como una etapa propia (utils/tracing.py)
+    tasks = {name: (deps, staged(name, fn)) for name, (deps, fn) in tasks.items()}
+    results = run_task_graph(tasks, max_workers=max_workers)
 
-    # 9. Edad del director
-    df["director_age_at_nomination"] = df.apply(
-        lambda row: calculate_age_at_nomination(row["director_birthdate"], row["year"]),
-        axis=1
-    )
+    imdb_rating, _ = results["movie_info"]
+    runtime, genre, plot = results["movie_details"]
+    budget, revenue, popularity, companies = results["production_details"]
+    release_month = results["release_month"]
+    profile = results["director_profile"]
 
-    # 10. Mes de estreno
-    df["release_month"] = df["tmdb_id"].apply(
-        lambda tmdb_id: get_release_month_tmdb(tmdb_id, tmdb_key)
-    )
+    # Sin película previa, imdb_rating_prev es el propio imdb_rating
+    # (ver get_previous_director_imdb_rating); has_previous_rating lo
+    # deja explícito para refresh_movie_record
+    imdb_rating_prev = results["imdb_rating_prev"]
+    has_previous_rating = imdb_rating_prev is not None
 
-    df["is_award_season_release"] = df["release_month"].apply(
-        lambda m: 1 if m in [10, 11, 12] else 0
-    )
+    record = {
+        "title": basic["title"],
+        "year": year,
+        "imdb_id": imdb_id,
+        "tmdb_id": tmdb_id,
+        "imdb_rating": imdb_rating,
+        "imdb_rating_prev": imdb_rating_prev if has_previous_rating else imdb_rating,
+        "has_previous_rating": has_previous_rating,
+        "runtime": runtime,
+        "popularity": popularity,
+        # 7. Número de películas previas del director
+        "director_previous_movies": profile.count_previous_movies(year),
+        # 9. Edad del director
+        "director_age_at_nomination": calculate_age_at_nomination(profile.birthday, year),
+        "release_month": release_month,
+        "is_award_season_release": 1 if release_month in [10, 11, 12] else 0,
+    }
 
     # 11. Limpieza de plot
-    df["cleaned_plot"] = df["plot"].apply(clean_text)
-    df["final_plot"] = df["cleaned_plot"].map(
-        lambda s: " ".join([w for w in s.split() if w not in stop_words])
-    )
+    with stage("clean_plot"):
+        record["final_plot"] = clean_plot(plot)
 
     # 12. Productoras
-    df["num_production_companies"] = df["production_companies"].apply(count_production_companies)
-    df["is_big_studio"] = df["production_companies"].apply(is_big_studio)
+    record["num_production_companies"] = count_production_companies(companies)
+    record["is_big_studio"] = is_big_studio(companies)
 
     # 13. Número de géneros
-    df["num_genres"] = df["genre"].str.split(",").apply(len)
-
-    # 14. ratio_utility
-    df["ratio_utility"] = df["revenue"] / df["budget"]
-
-    # 15. Selección de columnas finales
-    cols = [
-        "tmdb_id",
-        "imdb_rating",
-        "imdb_rating_prev",
-        "runtime",
-        "popularity",
-        "director_previous_movies",
-        "director_age_at_nomination",
-        "release_month",
-        "ratio_utility",
-        "num_genres",
-        "num_production_companies",
-        "is_award_season_release",
-        "is_big_studio",
-        "final_plot"
-    ]
-
-    df = df[cols].copy()
-
-    # 16. Embeddings GloVe
-    df["embedding"] = df["final_plot"].apply(
-        lambda x: plot_to_embedding(x, tokenizer, embedding_index)
-    )
-
-    emb_df = pd.DataFrame(df["embedding"].tolist(),
-                          columns=[f"emb_{i}" for i in range(100)])
-
-    df = pd.concat([df, emb_df], axis=1)
-    df = df.drop(columns=["embedding"])
-
-    return df
+    record["num_genres"] = len(genre.split(",")) if isinstance(genre, str) else None
+
+    # 14. ratio_utility (misma semántica que la división de pandas:
+    #     x/0 → inf, 0/0 → NaN, None → NaN)
+    record["ratio_utility"] = _ratio(revenue, budget)
+
+    return record
+
+
+def _ratio(numerator, denominator):
+    if numerator is None or denominator is None:
+        return np.nan
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return float(np.float64(numerator) / np.float64(denominator))
+
+
+# =========================================================
+# Refresco parcial de un registro ya construido
+# =========================================================
+# Features que cambian con el tiempo; el resto (director, runtime,
+# géneros, plot...) no cambia una vez estrenada la película.
+VOLATILE_FEATURES = ["imdb_rating", "popularity", "ratio_utility"]
+
+
+def refresh_movie_record(record, features, omdb_key, tmdb_key, ctx=None, provider=None):
+    """
+    Vuelve a consultar SOLO las features indicadas de un registro
+    devuelto por build_movie_record.
+
+    - features: subconjunto de VOLATILE_FEATURES
+    - ctx: FetchContext compartido
+    - provider: origen de los datos (por defecto las APIs en vivo)
+
+    Devuelve (copia actualizada, features refrescadas). Si una consulta
+    falla (valor None), la feature conserva su valor anterior y no
+    aparece entre las refrescadas.
+    """
+    unknown = [f for f in features if f not in VOLATILE_FEATURES]
+    if unknown:
+        raise ValueError(f"Features no refrescables: {unknown}")
+
+    if provider is None:
+        provider = LiveProvider(omdb_key, tmdb_key, ctx)
+
+    record = dict(record)
+    refreshed = []
+
+    if "imdb_rating" in features:
+        imdb_rating, _ = provider.movie_info(record["imdb_id"])
+        if imdb_rating is not None:
+            record["imdb_rating"] = imdb_rating
+            if not record["has_previous_rating"]:
+                record["imdb_rating_prev"] = imdb_rating
+            refreshed.append("imdb_rating")
+
+    if "popularity" in features or "ratio_utility" in features:
+        budget, revenue, popularity, _ = provider.production_details(record["tmdb_id"])
+        if popularity is not None:
+            record["popularity"] = popularity
+            refreshed.append("popularity")
+        if budget is not None or revenue is not None:
+            record["ratio_utility"] = _ratio(revenue, budget)
+            refreshed.append("ratio_utility")
+
+    return record, refreshed
+
+
+def add_plot_embeddings(df, tokenizer, embedding_index):
+    """
+    16. Añade las columnas emb_0..emb_N calculadas a partir de
+    final_plot, para todas las filas en una sola operación.
+    """
+    embeddings = plots_to_embeddings(df["final_plot"], tokenizer, embedding_index)
+
+    return pd.concat([df, embeddings_to_frame(embeddings, df.index)], axis=1)
+
+
+def embeddings_to_frame(embeddings, index=None):
+    return pd.DataFrame(embeddings,
+                        columns=[f"emb_{i}" for i in range(embeddings.shape[1])],
+                        index=index)
+
+
+def records_to_dataframe(records, embeddings, extra_columns=()):
+    """
+    DataFrame para mostrar: FEATURE_COLUMNS (más extra_columns) de
+    cada registro seguido de las columnas emb_*.
+    Solo se construye cuando hace falta enseñarlo.
+    """
+    cols = list(extra_columns) + FEATURE_COLUMNS
+    df = pd.DataFrame([{c: r.get(c) for c in cols} for r in records], columns=cols)
+    return pd.concat([df, embeddings_to_frame(embeddings, df.index)], axis=1)
+
+
+# =========================================================
+# Versión batch: muchas películas
+# =========================================================
+def build_movie_records(
+    titles,
+    omdb_key,
+    tmdb_key,
+    max_workers=DEFAULT_MAX_WORKERS,
+    ctx=None,
+    provider=None
+):
+    """
+    Devuelve una lista de registros, uno por título pedido, con
+    dos claves extra:
+    - query_title: título tal como se pidió
+    - error: None si el registro es válido, o el motivo del fallo
+
+    Un título que falla no interrumpe el resto del batch (salvo
+    QuotaExhaustedError, que se relanza). Todo el
+    batch comparte el mismo proveedor y FetchContext (directores
+    repetidos, etc.).
+    """
+    if provider is None:
+        provider = LiveProvider(omdb_key, tmdb_key, ctx)
+
+    records = []
+
+    for title in titles:
+        try:
+            record = build_movie_record(title, omdb_key, tmdb_key, max_workers, provider=provider)
+            error = None if record is not None else "No se encontró la película"
+        except QuotaExhaustedError:
+            # Sin cuota fallarían todos los títulos restantes
+            raise
+        except Exception as e:
+            record, error = None, str(e)
+
+        if record is None:
+            record = dict.fromkeys(FEATURE_COLUMNS)
+
+        record["query_title"] = title
+        record["error"] = error
+        records.append(record)
+
+    return records
+
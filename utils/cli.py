@@ -0,0 +1,453 @@
+# utils/cli.py
+#
+# Herramientas de línea de comandos:
+#   python -m utils.cli <comando> [opciones]
+
+import argparse
+import os
+import sys
+
+from utils.artifacts import ARTIFACT_PATHS
+from utils.batch_runner import DEFAULT_CHUNK_SIZE
+from utils.fake_server import DEFAULT_FIXTURES_PATH
+from utils.http_cache import DEFAULT_CACHE_PATH
+from utils.local_store import DEFAULT_LOCAL_STORE_PATH
+from utils.prediction_index import DEFAULT_INDEX_PATH
+
+
+# =========================================================
+# Comandos
+# =========================================================
+def cmd_convert_glove(args):
+    from utils.embedding_store import convert_glove_pickle
+
+    prefix = convert_glove_pickle(args.pickle, args.output)
+    print(f"Store GloVe escrito en {prefix}.npy / {prefix}.vocab.json")
+
+
+def cmd_build_embedding_table(args):
+    import joblib
+
+    from utils.artifacts import registry
+    from utils.embedding_store import GloveStore, build_embedding_table
+
+    tokenizer = registry.get("tokenizer")
+
+    if GloveStore.exists(ARTIFACT_PATHS["glove_store"]):
+        embedding_index = GloveStore.open(ARTIFACT_PATHS["glove_store"])
+    else:
+        embedding_index = joblib.load(ARTIFACT_PATHS["embedding_index"])
+
+    table = build_embedding_table(tokenizer, embedding_index, args.max_nb_words)
+    prefix = table.save(args.output)
+    print(
+        f"Tabla {table.matrix.shape} ({int(table.mask.sum())} palabras con vector) "
+        f"escrita en {prefix}.npy / {prefix}.mask.npy"
+    )
+
+
+def _read_titles(args):
+    titles = list(args.titles)
+    if args.input:
+        with open(args.input, encoding="utf-8") as f:
+            titles += [line.strip() for line in f if line.strip()]
+    return titles
+
+
+def cmd_predict(args):
+    from utils.pipeline import run_batch_pipeline
+
+    titles = _read_titles(args)
+    if not titles:
+        sys.exit("No se indicó ningún título (argumentos o --input).")
+
+    if not args.local_store and (not args.omdb_key or not args.tmdb_key):
+        sys.exit("Faltan las API keys (OMDB_API_KEY / TMDB_API_KEY).")
+
+    from utils.tracing import trace
+
+    if args.workers > 1:
+        from utils.parallel import print_progress, run_parallel_batch
+
+        # Las etapas se miden dentro de cada worker; aquí solo el total
+        with trace("predict") as t:
+            results = run_parallel_batch(
+                titles, args.omdb_key, args.tmdb_key,
+                workers=args.workers,
+                shard_size=args.shard_size,
+                local_store_path=args.local_store,
+                progress=print_progress
+            )
+    else:
+        provider = None
+        if args.local_store:
+            from utils.local_store import LocalMovieStore
+            from utils.providers import LocalProvider
+
+            provider = LocalProvider(LocalMovieStore(args.local_store))
+
+        with trace("predict") as t:
+            results, _ = run_batch_pipeline(
+                titles, args.omdb_key, args.tmdb_key, return_dataframe=False, provider=provider
+            )
+
+    if args.output:
+        results.to_csv(args.output, index=False)
+        print(f"{len(results)} resultados escritos en {args.output}")
+    else:
+        print(results.to_string(index=False))
+
+    if args.trace:
+        print(file=sys.stderr)
+        print(t.format(), file=sys.stderr)
+
+
+def cmd_ingest_dumps(args):
+    from utils.local_store import LocalMovieStore, ingest_dumps
+
+    store = LocalMovieStore(args.db)
+    loaded = ingest_dumps(
+        store,
+        title_basics=args.title_basics,
+        title_ratings=args.title_ratings,
+        title_crew=args.title_crew,
+        name_basics=args.name_basics,
+        tmdb_movies=args.tmdb_movies
+    )
+
+    for table, count in loaded.items():
+        print(f"{table}: {count} filas")
+    print(f"Store local en {args.db}: {store.counts()}")
+
+
+def cmd_fake_server(args):
+    from utils.fake_server import FakeApiServer, load_fixtures
+
+    server = FakeApiServer(
+        load_fixtures(args.fixtures),
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        host=args.host,
+        port=args.port,
+        seed=args.seed
+    )
+    print(f"OMDB_BASE_URL={server.omdb_url}")
+    print(f"TMDB_BASE_URL={server.tmdb_url}")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def cmd_serve(args):
+    from utils.service import run_service
+
+    provider = None
+    if args.local_store:
+        from utils.local_store import LocalMovieStore
+        from utils.providers import LocalProvider
+
+        provider = LocalProvider(LocalMovieStore(args.local_store))
+
+    elif not args.omdb_key or not args.tmdb_key:
+        sys.exit("Faltan las API keys (OMDB_API_KEY / TMDB_API_KEY).")
+
+    run_service(
+        host=args.host,
+        port=args.port,
+        omdb_key=args.omdb_key,
+        tmdb_key=args.tmdb_key,
+        provider=provider,
+        max_concurrency=args.max_concurrency
+    )
+
+
+def cmd_run_job(args):
+    from utils.batch_runner import run_job
+
+    provider = None
+    if args.local_store:
+        from utils.local_store import LocalMovieStore
+        from utils.providers import LocalProvider
+
+        provider = LocalProvider(LocalMovieStore(args.local_store))
+
+    elif not args.omdb_key or not args.tmdb_key:
+        sys.exit("Faltan las API keys (OMDB_API_KEY / TMDB_API_KEY).")
+
+    def progress(checkpoint):
+        print(
+            f"bloque {checkpoint['chunks_done']}: {checkpoint['titles_done']} títulos "
+            f"(hasta la fila {checkpoint['rows_done']})",
+            file=sys.stderr
+        )
+
+    checkpoint = run_job(
+        args.input,
+        args.output,
+        args.omdb_key,
+        args.tmdb_key,
+        checkpoint_path=args.checkpoint,
+        column=args.column,
+        chunk_size=args.chunk_size,
+        provider=provider,
+        progress=progress
+    )
+
+    print(f"{checkpoint['status']}: {checkpoint['titles_done']} títulos en {args.output}")
+    if checkpoint["status"] == "quota_exhausted":
+        print(f"{checkpoint['error']}. Vuelve a lanzar el mismo comando para continuar.")
+        sys.exit(2)
+
+
+def cmd_build_index(args):
+    from utils.prediction_index import (
+        build_prediction_index,
+        candidates_from_file,
+        candidates_from_tmdb
+    )
+
+    if not args.omdb_key or not args.tmdb_key:
+        sys.exit("Faltan las API keys (OMDB_API_KEY / TMDB_API_KEY).")
+
+    if args.input:
+        candidates = candidates_from_file(args.input, args.column)
+    elif args.year:
+        candidates = candidates_from_tmdb(args.year, args.tmdb_key, args.max_pages)
+    else:
+        sys.exit("Indica las candidatas con --input o --year.")
+
+    def progress(done, total):
+        print(f"{done}/{total} candidatas", file=sys.stderr)
+
+    index = build_prediction_index(
+        candidates, args.omdb_key, args.tmdb_key,
+        chunk_size=args.chunk_size,
+        progress=progress
+    )
+    index.save(args.output)
+    print(f"{len(index)} películas ({len(index.keys)} claves) escritas en {args.output}")
+
+
+def cmd_export_fixtures(args):
+    from utils.fake_server import export_fixtures_from_cache
+
+    count = export_fixtures_from_cache(args.cache, args.output)
+    print(f"{count} respuestas escritas en {args.output}")
+
+
+def cmd_bench(args):
+    from utils import benchmark
+
+    names = args.only.split(",") if args.only else None
+    report = benchmark.run_benchmarks(
+        names=names,
+        repeat=args.repeat,
+        warmup=args.warmup,
+        batch_size=args.batch_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        fixtures_path=args.fixtures
+    )
+    print(benchmark.format_report(report))
+
+    if args.output:
+        benchmark.save_report(report, args.output)
+        print(f"\nReporte escrito en {args.output}")
+
+    if args.compare:
+        rows = benchmark.compare_reports(
+            benchmark.load_report(args.compare), report, threshold=args.threshold
+        )
+        print()
+        print(benchmark.format_comparison(rows))
+        if any(row["regression"] for row in rows):
+            sys.exit(1)
+
+
+def cmd_export_stopwords(args):
+    from utils.text_processing import export_stop_words
+
+    path = export_stop_words(args.output) if args.output else export_stop_words()
+    print(f"Stopwords escritas en {path}")
+
+
+def cmd_export_tokenizer(args):
+    import joblib
+
+    from utils.tokenizer import export_tokenizer
+
+    # Requiere TensorFlow/Keras instalado para leer el pickle original
+    tokenizer = joblib.load(args.pickle)
+    exported = export_tokenizer(tokenizer, args.output)
+    print(f"Tokenizer ({len(exported.word_index)} palabras) verificado y escrito en {args.output}")
+
+
+# =========================================================
+# Parser
+# =========================================================
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m utils.cli",
+        description="Utilidades del modelo de nominación al Oscar."
+    )
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser(
+        "convert-glove",
+        help="Convierte el pickle GloVe a una matriz float32 memory-mapped."
+    )
+    p.add_argument("--pickle", default=ARTIFACT_PATHS["embedding_index"])
+    p.add_argument("--output", default=ARTIFACT_PATHS["glove_store"])
+    p.set_defaults(func=cmd_convert_glove)
+
+    p = sub.add_parser(
+        "build-embedding-table",
+        help="Precalcula la tabla (max_nb_words, dim) alineada al tokenizer."
+    )
+    p.add_argument("--max-nb-words", type=int, default=3000)
+    p.add_argument("--output", default=ARTIFACT_PATHS["embedding_table"])
+    p.set_defaults(func=cmd_build_embedding_table)
+
+    p = sub.add_parser(
+        "predict",
+        help="Predice la probabilidad de nominación de una lista de títulos."
+    )
+    p.add_argument("titles", nargs="*", help="Títulos a evaluar")
+    p.add_argument("--input", help="Archivo de texto con un título por línea")
+    p.add_argument("--output", help="CSV de salida (por defecto se imprime)")
+    p.add_argument("--omdb-key", default=os.environ.get("OMDB_API_KEY"))
+    p.add_argument("--tmdb-key", default=os.environ.get("TMDB_API_KEY"))
+    p.add_argument(
+        "--local-store",
+        help="Lee los datos del store local (ver ingest-dumps) en vez de las APIs"
+    )
+    p.add_argument(
+        "--trace", action="store_true",
+        help="Muestra en stderr el desglose de tiempos y llamadas por etapa"
+    )
+    p.add_argument(
+        "--workers", type=int, default=1,
+        help="Procesos en paralelo (>1 reparte los títulos en shards)"
+    )
+    p.add_argument("--shard-size", type=int, default=None, help="Títulos por shard")
+    p.set_defaults(func=cmd_predict)
+
+    p = sub.add_parser(
+        "serve",
+        help="Servicio HTTP de predicción (POST /predict, POST /predict/batch)."
+    )
+    p.add_argument("--host", default="127.0.0.1", help="0.0.0.0 para aceptar conexiones externas")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--max-concurrency", type=int, default=8, help="Predicciones simultáneas")
+    p.add_argument("--omdb-key", default=os.environ.get("OMDB_API_KEY"))
+    p.add_argument("--tmdb-key", default=os.environ.get("TMDB_API_KEY"))
+    p.add_argument("--local-store", help="Usa el store local en vez de las APIs")
+    p.set_defaults(func=cmd_serve)
+
+    p = sub.add_parser(
+        "run-job",
+        help="Job batch reanudable: CSV/JSONL de títulos → CSV o partes Parquet, con checkpoint."
+    )
+    p.add_argument("input", help="CSV (columna --column), JSONL o texto con un título por línea")
+    p.add_argument("output", help="Archivo .csv o directorio de partes Parquet")
+    p.add_argument("--column", default="title")
+    p.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Títulos por bloque/checkpoint")
+    p.add_argument("--checkpoint", help="Por defecto OUTPUT.checkpoint.json")
+    p.add_argument("--omdb-key", default=os.environ.get("OMDB_API_KEY"))
+    p.add_argument("--tmdb-key", default=os.environ.get("TMDB_API_KEY"))
+    p.add_argument("--local-store", help="Usa el store local en vez de las APIs")
+    p.set_defaults(func=cmd_run_job)
+
+    p = sub.add_parser(
+        "build-index",
+        help="Precalcula las predicciones de las candidatas (lista o estrenos de un año)."
+    )
+    p.add_argument("--input", help="Archivo de candidatas (CSV, JSONL o un título por línea)")
+    p.add_argument("--column", default="title")
+    p.add_argument("--year", type=int, help="Usa los estrenos de este año en TMDb (/discover/movie)")
+    p.add_argument("--max-pages", type=int, default=5, help="Páginas de 20 películas de TMDb")
+    p.add_argument("--chunk-size", type=int, default=20)
+    p.add_argument("--output", default=DEFAULT_INDEX_PATH)
+    p.add_argument("--omdb-key", default=os.environ.get("OMDB_API_KEY"))
+    p.add_argument("--tmdb-key", default=os.environ.get("TMDB_API_KEY"))
+    p.set_defaults(func=cmd_build_index)
+
+    p = sub.add_parser(
+        "ingest-dumps",
+        help="Carga los dumps de IMDb (TSV) y un export de TMDb (JSONL) en un store local."
+    )
+    p.add_argument("--db", default=DEFAULT_LOCAL_STORE_PATH)
+    p.add_argument("--title-basics", help="title.basics.tsv(.gz)")
+    p.add_argument("--title-ratings", help="title.ratings.tsv(.gz)")
+    p.add_argument("--title-crew", help="title.crew.tsv(.gz)")
+    p.add_argument("--name-basics", help="name.basics.tsv(.gz)")
+    p.add_argument("--tmdb-movies", help="JSONL con un /movie/{id} de TMDb por línea")
+    p.set_defaults(func=cmd_ingest_dumps)
+
+    p = sub.add_parser(
+        "fake-server",
+        help="Servidor OMDb/TMDb local que reproduce fixtures (pruebas de carga sin red)."
+    )
+    p.add_argument("--fixtures", default=DEFAULT_FIXTURES_PATH)
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency", type=float, default=0.0, help="Segundos fijos por petición")
+    p.add_argument("--jitter", type=float, default=0.0, help="Segundos extra aleatorios")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Probabilidad de error [0, 1]")
+    p.add_argument("--error-status", type=int, default=503)
+    p.add_argument("--seed", type=int, default=None)
+    p.set_defaults(func=cmd_fake_server)
+
+    p = sub.add_parser(
+        "export-fixtures",
+        help="Convierte la caché HTTP SQLite en un archivo de fixtures para fake-server."
+    )
+    p.add_argument("--cache", default=DEFAULT_CACHE_PATH)
+    p.add_argument("--output", required=True)
+    p.set_defaults(func=cmd_export_fixtures)
+
+    p = sub.add_parser(
+        "bench",
+        help="Mide latencia (p50/p95/p99), throughput y memoria del pipeline."
+    )
+    p.add_argument("--only", help="Lista separada por comas (artifacts,clean_text,embedding,...)")
+    p.add_argument("--repeat", type=int, default=20)
+    p.add_argument("--warmup", type=int, default=2)
+    p.add_argument("--batch-size", type=int, default=20)
+    p.add_argument("--latency", type=float, default=0.02, help="Latencia simulada de las APIs (s)")
+    p.add_argument("--jitter", type=float, default=0.0)
+    p.add_argument("--fixtures", default=DEFAULT_FIXTURES_PATH)
+    p.add_argument("--output", help="JSON con el reporte")
+    p.add_argument("--compare", help="Reporte JSON previo; sale con código 1 si hay regresiones")
+    p.add_argument("--threshold", type=float, default=0.10, help="Tolerancia de regresión (0.10 = 10%%)")
+    p.set_defaults(func=cmd_bench)
+
+    p = sub.add_parser(
+        "export-stopwords",
+        help="Regenera utils/data/stopwords_english.txt desde NLTK."
+    )
+    p.add_argument("--output", default=None)
+    p.set_defaults(func=cmd_export_stopwords)
+
+    p = sub.add_parser(
+        "export-tokenizer",
+        help="Exporta el tokenizer de Keras a JSON (inferencia sin TensorFlow)."
+    )
+    p.add_argument("--pickle", default=ARTIFACT_PATHS["tokenizer"])
+    p.add_argument("--output", default=ARTIFACT_PATHS["tokenizer_json"])
+    p.set_defaults(func=cmd_export_tokenizer)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
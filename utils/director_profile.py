@@ -0,0 +1,240 @@
+# utils/director_profile.py
+
+import threading
+import time
+from collections import OrderedDict
+
+from utils.task_graph import run_task_graph
+from utils.tmdb_api import (
+    FetchContext,
+    get_director_or_writer_tmdb_id,
+    get_imdb_id_from_tmdb_id,
+    get_imdb_rating,
+    get_person_details,
+    get_person_movie_credits,
+    get_tmdb_id_from_imdb_id
+)
+
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+def normalize_name(name):
+    return " ".join(str(name).lower().split())
+
+
+# =========================================================
+# 1. Perfil de un director
+# =========================================================
+class DirectorProfile:
+    """
+    Todo lo que las features necesitan de un director, descargado
+    una sola vez:
+
+    - tmdb_id: ID de TMDb (None si la búsqueda no lo encontró)
+    - imdb_id: nconst de IMDb (perfiles del store local)
+    - birthday: fecha de nacimiento "YYYY-MM-DD" o None
+    - filmography: películas dirigidas con año válido, ordenadas por
+      año: [{"tmdb_id", "year", "imdb_id"}]; imdb_id se resuelve
+      solo cuando hace falta
+    - ratings: {imdb_id: imdbRating} ya consultados
+    - complete: False si alguna descarga falló (no se memoiza)
+    """
+
+    def __init__(
+        self,
+        name,
+        tmdb_id=None,
+        birthday=None,
+        filmography=None,
+        complete=True,
+        imdb_id=None
+    ):
+        self.name = name
+        self.tmdb_id = tmdb_id
+        self.imdb_id = imdb_id
+        self.birthday = birthday
+        self.filmography = filmography or []
+        self.ratings = {}
+        self.complete = complete
+        self.created_at = time.time()
+        self._lock = threading.Lock()
+
+    def count_previous_movies(self, nomination_year):
+        """
+        Películas dirigidas ANTES del año de nominación
+        (None si no se conoce al director).
+        """
+        if self.tmdb_id is None and self.imdb_id is None:
+            return None
+        return sum(1 for m in self.filmography if m["year"] < nomination_year)
+
+    def previous_imdb_rating(
+        self,
+        current_imdb_id,
+        imdb_rating_actual,
+        omdb_key,
+        tmdb_key,
+        ctx=None
+    ):
+        """
+        imdbRating de la película dirigida justo antes de la actual.
+        Si no hay película anterior (o no se puede resolver) devuelve
+        imdb_rating_actual, igual que get_previous_director_imdb_rating.
+        """
+        if not self.filmography:
+            return imdb_rating_actual
+
+        current_tmdb_id = get_tmdb_id_from_imdb_id(current_imdb_id, tmdb_key, ctx)
+        if current_tmdb_id is None:
+            return imdb_rating_actual
+
+        idx = next(
+            (i for i, m in enumerate(self.filmography) if m["tmdb_id"] == current_tmdb_id),
+            None
+        )
+        if not idx:
+            return imdb_rating_actual
+
+        previous = self.filmography[idx - 1]
+
+        if previous["imdb_id"] is None:
+            previous["imdb_id"] = get_imdb_id_from_tmdb_id(previous["tmdb_id"], tmdb_key, ctx)
+        prev_imdb_id = previous["imdb_id"]
+        if not prev_imdb_id:
+            return imdb_rating_actual
+
+        rating = self.ratings.get(prev_imdb_id)
+        if rating is None:
+            rating = get_imdb_rating(prev_imdb_id, omdb_key, ctx)
+            if rating is None:
+                return imdb_rating_actual
+            with self._lock:
+                self.ratings[prev_imdb_id] = rating
+
+        return rating
+
+
+def _parse_filmography(credits):
+    movies = []
+    for m in credits.get("crew", []):
+        if m.get("job") != "Director":
+            continue
+        release_date = m.get("release_date")
+        if release_date and len(release_date) >= 4:
+            try:
+                year = int(release_date[:4])
+            except ValueError:
+                continue
+            movies.append({"tmdb_id": m["id"], "year": year, "imdb_id": None})
+
+    # sorted es estable: mismo orden que get_previous_director_imdb_rating
+    return sorted(movies, key=lambda m: m["year"])
+
+
+def build_director_profile(name, tmdb_key, ctx=None):
+    """
+    Descarga búsqueda, créditos y ficha del director (créditos y
+    ficha en paralelo) y construye su DirectorProfile.
+    """
+    if ctx is None:
+        ctx = FetchContext()
+
+    tmdb_id = get_director_or_writer_tmdb_id(name, tmdb_key, ctx)
+    if tmdb_id is None:
+        return DirectorProfile(name, complete=False)
+
+    results = run_task_graph({
+        "credits": ([], lambda: get_person_movie_credits(tmdb_id, tmdb_key, ctx)),
+        "person": ([], lambda: get_person_details(tmdb_id, tmdb_key, ctx)),
+    }, max_workers=2)
+
+    credits, person = results["credits"], results["person"]
+
+    return DirectorProfile(
+        name,
+        tmdb_id=tmdb_id,
+        birthday=person.get("birthday"),
+        filmography=_parse_filmography(credits),
+        complete="crew" in credits and "id" in person
+    )
+
+
+# =========================================================
+# 2. Caché LRU de perfiles (compartida por todo el proceso)
+# =========================================================
+class DirectorProfileCache:
+    """
+    Memoiza DirectorProfile por nombre normalizado.
+
+    - max_size: al superarlo se expulsa el perfil usado hace más tiempo
+    - ttl: segundos que vive un perfil (la filmografía y los ratings
+      cambian, aunque despacio)
+
+    Si dos hilos piden el mismo director a la vez, el segundo espera
+    al perfil que está construyendo el primero.
+    """
+
+    def __init__(self, max_size=1024, ttl=DAY):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._profiles = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, name, tmdb_key, ctx=None):
+        key = normalize_name(name)
+
+        while True:
+            with self._lock:
+                profile = self._profiles.get(key)
+                if profile is not None and time.time() - profile.created_at < self.ttl:
+                    self._profiles.move_to_end(key)
+                    self.hits += 1
+                    return profile
+
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    self.misses += 1
+                    break
+
+            event.wait()
+
+        try:
+            profile = build_director_profile(name, tmdb_key, ctx)
+            with self._lock:
+                if profile.complete:
+                    self._profiles[key] = profile
+                    self._profiles.move_to_end(key)
+                    while len(self._profiles) > self.max_size:
+                        self._profiles.popitem(last=False)
+                else:
+                    self._profiles.pop(key, None)
+            return profile
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+    def clear(self):
+        with self._lock:
+            self._profiles.clear()
+
+    def __len__(self):
+        return len(self._profiles)
+
+
+_profiles = DirectorProfileCache()
+
+
+def get_director_profile(name, tmdb_key, ctx=None):
+    return _profiles.get(name, tmdb_key, ctx)
+
+
+def get_profile_cache():
+    return _profiles
@@ -0,0 +1,222 @@
+# utils/embedding_store.py
+
+import json
+import os
+
+import joblib
+import numpy as np
+
+
+# =========================================================
+# 1. Índice GloVe respaldado por una matriz en disco
+# =========================================================
+class GloveStore:
+    """
+    Reemplazo del diccionario {palabra: vector} unpickleado.
+
+    Guarda TODOS los vectores en una única matriz float32 contigua
+    (archivo .npy abierto con np.memmap, solo lectura) y un índice
+    palabra → fila. Varios procesos que abren el mismo archivo
+    comparten las páginas del sistema operativo en vez de tener
+    cada uno cientos de miles de ndarrays pequeños.
+
+    Se comporta como un diccionario de solo lectura, así que
+    plot_to_embedding lo acepta sin cambios.
+    """
+
+    def __init__(self, vectors, words):
+        self.vectors = vectors
+        self.words = list(words)
+        self.word_to_row = {w: i for i, w in enumerate(self.words)}
+
+    @property
+    def dim(self):
+        return self.vectors.shape[1]
+
+    # ---------------------------------------------
+    # Interfaz tipo diccionario
+    # ---------------------------------------------
+    def __contains__(self, word):
+        return word in self.word_to_row
+
+    def __getitem__(self, word):
+        return self.vectors[self.word_to_row[word]]
+
+    def __len__(self):
+        return len(self.words)
+
+    def __iter__(self):
+        return iter(self.words)
+
+    def get(self, word, default=None):
+        row = self.word_to_row.get(word)
+        if row is None:
+            return default
+        return self.vectors[row]
+
+    def keys(self):
+        return self.word_to_row.keys()
+
+    # ---------------------------------------------
+    # Lectura / escritura
+    # ---------------------------------------------
+    @classmethod
+    def open(cls, prefix):
+        """
+        Abre un store existente.
+
+        - prefix: ruta sin extensión; se leen prefix + ".npy"
+          y prefix + ".vocab.json"
+        """
+        vectors = np.load(prefix + ".npy", mmap_mode="r")
+
+        with open(prefix + ".vocab.json", encoding="utf-8") as f:
+            words = json.load(f)
+
+        if len(words) != vectors.shape[0]:
+            raise ValueError(
+                f"Store GloVe inconsistente: {len(words)} palabras "
+                f"y {vectors.shape[0]} filas en {prefix}"
+            )
+
+        return cls(vectors, words)
+
+    @staticmethod
+    def exists(prefix):
+        return (
+            os.path.exists(prefix + ".npy")
+            and os.path.exists(prefix + ".vocab.json")
+        )
+
+
+# =========================================================
+# 2. Conversión desde el pickle {palabra: vector}
+# =========================================================
+def save_glove_store(embedding_index, prefix):
+    """
+    Escribe un diccionario {palabra: vector} en formato store:
+    prefix + ".npy" (matriz float32) y prefix + ".vocab.json".
+    """
+    words = list(embedding_index.keys())
+    if not words:
+        raise ValueError("El embedding_index está vacío")
+
+    dim = len(embedding_index[words[0]])
+    vectors = np.lib.format.open_memmap(
+        prefix + ".npy", mode="w+", dtype=np.float32, shape=(len(words), dim)
+    )
+
+    for i, w in enumerate(words):
+        vectors[i] = embedding_index[w]
+
+    vectors.flush()
+    del vectors
+
+    with open(prefix + ".vocab.json", "w", encoding="utf-8") as f:
+        json.dump(words, f, ensure_ascii=False)
+
+    return prefix
+
+
+def convert_glove_pickle(pkl_path, prefix):
+    """
+    Convierte el pickle GloVe original al formato store.
+    """
+    embedding_index = joblib.load(pkl_path)
+    return save_glove_store(embedding_index, prefix)
+
+
+# =========================================================
+# 3. Tabla de embeddings podada al vocabulario del tokenizer
+# =========================================================
+class EmbeddingTable:
+    """
+    Matriz (max_nb_words, dim) alineada con los índices del tokenizer:
+    la fila i es el vector GloVe de tokenizer.index_word[i].
+
+    - matrix: float32 (max_nb_words, dim); filas sin vector quedan en cero
+    - mask: bool (max_nb_words,); True si la palabra tenía vector GloVe
+
+    Con esto el embedding de un plot es un gather directo por id de
+    secuencia, sin buscar strings (ver plot_to_embedding).
+    """
+
+    def __init__(self, matrix, mask):
+        if matrix.shape[0] != mask.shape[0]:
+            raise ValueError("matrix y mask deben tener el mismo número de filas")
+        self.matrix = matrix
+        self.mask = mask
+
+    @property
+    def dim(self):
+        return self.matrix.shape[1]
+
+    @property
+    def num_words(self):
+        return self.matrix.shape[0]
+
+    def valid_ids(self, seq, max_nb_words=None):
+        """
+        Filtra una secuencia de ids dejando solo los que tienen vector
+        (equivale a `idx < max_nb_words and word in embedding_index`).
+        """
+        limit = self.num_words
+        if max_nb_words is not None:
+            limit = min(limit, max_nb_words)
+
+        ids = np.asarray(seq, dtype=np.int64)
+        ids = ids[(ids >= 0) & (ids < limit)]
+        return ids[self.mask[ids]]
+
+    @classmethod
+    def open(cls, prefix):
+        """
+        Abre prefix + ".npy" (matriz) y prefix + ".mask.npy" en modo
+        memory-mapped de solo lectura.
+        """
+        matrix = np.load(prefix + ".npy", mmap_mode="r")
+        mask = np.load(prefix + ".mask.npy", mmap_mode="r")
+        return cls(matrix, mask)
+
+    @staticmethod
+    def exists(prefix):
+        return (
+            os.path.exists(prefix + ".npy")
+            and os.path.exists(prefix + ".mask.npy")
+        )
+
+    def save(self, prefix):
+        np.save(prefix + ".npy", np.ascontiguousarray(self.matrix, dtype=np.float32))
+        np.save(prefix + ".mask.npy", np.ascontiguousarray(self.mask, dtype=bool))
+        return prefix
+
+
+def build_embedding_table(tokenizer, embedding_index, max_nb_words=3000):
+    """
+    Precalcula la tabla (max_nb_words, dim) a partir del tokenizer
+    y del índice GloVe (dict o GloveStore).
+
+    Solo se guardan las palabras con índice < max_nb_words, que son
+    las únicas que plot_to_embedding llega a consultar.
+    """
+    dim = None
+    for word in embedding_index.keys():
+        dim = len(embedding_index[word])
+        break
+    if dim is None:
+        raise ValueError("El embedding_index está vacío")
+
+    matrix = np.zeros((max_nb_words, dim), dtype=np.float32)
+    mask = np.zeros(max_nb_words, dtype=bool)
+
+    for idx in range(1, max_nb_words):
+        word = tokenizer.index_word.get(idx)
+        if word is None:
+            continue
+        vector = embedding_index.get(word)
+        if vector is None:
+            continue
+        matrix[idx] = vector
+        mask[idx] = True
+
+    return EmbeddingTable(matrix, mask)
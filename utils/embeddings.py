@@ -2,6 +2,8 @@
 
 import numpy as np
 
+from utils.embedding_store import EmbeddingTable, build_embedding_table
+
 
 # =========================================================
 # 1. Convertir texto → embedding promedio GloVe
@@ -20,7 +22,8 @@ def plot_to_embedding(
 
     - text: string ya limpiado
     - tokenizer: tokenizer entrenado (joblib.load)
-    - embedding_index: diccionario {palabra: vector}
+    - embedding_index: diccionario {palabra: vector}, GloveStore
+      o EmbeddingTable precalculada (ver utils/embedding_store.py)
     - max_nb_words: tamaño máximo del vocabulario
     - embedding_dim: dimensión del vector GloVe (50, 100, 200, 300)
     """
@@ -30,6 +33,14 @@ def plot_to_embedding(
 
     # Convertir texto a secuencia de índices
     seq = tokenizer.texts_to_sequences([text])[0]
+
+    # Tabla precalculada: gather directo por índice, sin strings
+    if isinstance(embedding_index, EmbeddingTable):
+        ids = embedding_index.valid_ids(seq, max_nb_words)
+        if len(ids) == 0:
+            return np.zeros(embedding_dim)
+        return embedding_index.matrix[ids].mean(axis=0)
+
     vectors = []
 
     # Convertir cada índice → palabra → vector GloVe
@@ -45,3 +56,73 @@ def plot_to_embedding(
 
     # Promedio de embeddings
     return np.mean(vectors, axis=0)
+
+
+# =========================================================
+# 2. Embeddings promedio para MUCHOS textos a la vez
+# =========================================================
+def plots_to_embeddings(
+    texts,
+    tokenizer,
+    embedding_index,
+    max_nb_words=3000
+):
+    """
+    Versión batch de plot_to_embedding: devuelve un array float32
+    (n, dim) con el embedding promedio de cada texto.
+
+    Tokeniza todo el batch de una vez, aplana las secuencias en un
+    único vector de ids y calcula las medias con reducciones por
+    segmento de NumPy (una operación por batch, no un loop por palabra).
+
+    - texts: iterable de strings ya limpiados (no-strings → fila de ceros)
+    - tokenizer: tokenizer entrenado
+    - embedding_index: EmbeddingTable (o dict / GloveStore, en cuyo caso
+      se construye la tabla al vuelo)
+    - max_nb_words: tamaño máximo del vocabulario
+    """
+    if not isinstance(embedding_index, EmbeddingTable):
+        embedding_index = build_embedding_table(tokenizer, embedding_index, max_nb_words)
+
+    texts = list(texts)
+    n = len(texts)
+    out = np.zeros((n, embedding_index.dim), dtype=np.float32)
+
+    positions = [i for i, t in enumerate(texts) if isinstance(t, str)]
+    if not positions:
+        return out
+
+    # 1. Tokenizar todo el batch
+    seqs = tokenizer.texts_to_sequences([texts[i] for i in positions])
+    lengths = np.fromiter((len(s) for s in seqs), dtype=np.int64, count=len(seqs))
+
+    if lengths.sum() == 0:
+        return out
+
+    # 2. Secuencias ragged → ids planos + fila a la que pertenece cada id
+    ids = np.fromiter(
+        (idx for s in seqs for idx in s), dtype=np.int64, count=int(lengths.sum())
+    )
+    rows = np.repeat(np.asarray(positions, dtype=np.int64), lengths)
+
+    # 3. Quedarse con ids dentro del vocabulario y con vector GloVe
+    limit = min(embedding_index.num_words, max_nb_words)
+    keep = (ids >= 0) & (ids < limit)
+    ids, rows = ids[keep], rows[keep]
+    keep = embedding_index.mask[ids]
+    ids, rows = ids[keep], rows[keep]
+
+    if len(ids) == 0:
+        return out
+
+    # 4. Sumas y conteos por segmento (rows ya viene ordenado)
+    counts = np.bincount(rows, minlength=n)
+    nonempty = np.flatnonzero(counts)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))[nonempty]
+
+    sums = np.add.reduceat(
+        embedding_index.matrix[ids].astype(np.float64), starts, axis=0
+    )
+    out[nonempty] = sums / counts[nonempty, None]
+
+    return out
@@ -0,0 +1,256 @@
+# utils/fake_server.py
+#
+# Servidor HTTP local que imita OMDb y TMDb reproduciendo respuestas
+# grabadas (fixtures), con latencia y errores configurables. Sirve
+# para medir el pipeline de punta a punta sin red ni cuota de API.
+#
+#   OMDb → http://HOST:PORT/      TMDb → http://HOST:PORT/3
+
+import json
+import os
+import random
+import re
+import sqlite3
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from utils.http_cache import request_key
+from utils.tmdb_api import get_base_urls, set_base_urls
+
+
+DEFAULT_FIXTURES_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "fake_api_fixtures.json"
+)
+
+# Respuestas de las APIs reales cuando el recurso no existe
+OMDB_NOT_FOUND = {"Response": "False", "Error": "Movie not found!"}
+TMDB_NOT_FOUND = {
+    "success": False,
+    "status_code": 34,
+    "status_message": "The resource you requested could not be found.",
+}
+
+
+# =========================================================
+# 1. Fixtures
+# =========================================================
+def _fixture_key(path, params):
+    # Misma normalización que la caché HTTP: parámetros ordenados, sin API keys
+    return request_key(path, params)
+
+
+def load_fixtures(path=DEFAULT_FIXTURES_PATH):
+    """
+    Lee un JSON {"responses": [{"path", "params", "status", "body"}]}
+    y devuelve {clave: (status, body)}.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+
+    return {
+        _fixture_key(r["path"], r.get("params", {})): (r.get("status", 200), r["body"])
+        for r in data["responses"]
+    }
+
+
+# Las claves de la caché son "url?k=v&k=v" sin codificar: se corta
+# en cada "&" seguido de un nombre de parámetro
+_PARAM_SPLIT_RE = re.compile(r"&(?=[A-Za-z_]+=)")
+
+
+def _parse_cache_key(key):
+    url, _, query = key.partition("?")
+    params = dict(p.split("=", 1) for p in _PARAM_SPLIT_RE.split(query) if "=" in p)
+    return urlsplit(url).path or "/", params
+
+
+def export_fixtures_from_cache(cache_path, output_path):
+    """
+    Convierte las respuestas guardadas en la caché HTTP SQLite
+    (utils/http_cache.py) en un archivo de fixtures: la caché de
+    una sesión real es la grabación.
+    """
+    conn = sqlite3.connect(cache_path)
+    try:
+        rows = conn.execute("SELECT key, body FROM responses ORDER BY key").fetchall()
+    finally:
+        conn.close()
+
+    responses = []
+    for key, body in rows:
+        path, params = _parse_cache_key(key)
+        responses.append({"path": path, "params": params, "status": 200, "body": json.loads(body)})
+
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({"responses": responses}, f, ensure_ascii=False, indent=1)
+
+    return len(responses)
+
+
+# =========================================================
+# 2. Servidor
+# =========================================================
+class FakeApiServer:
+    """
+    Servidor OMDb/TMDb falso en un hilo de fondo.
+
+    - fixtures: {clave: (status, body)} (ver load_fixtures)
+    - latency: segundos de espera fijos por petición
+    - jitter: segundos extra aleatorios, uniformes en [0, jitter]
+    - error_rate: probabilidad de responder error_status en vez del fixture
+    - error_status: 500, 503, 429... (429 incluye Retry-After: 1)
+    - port: 0 = cualquier puerto libre
+    - seed: semilla para que latencia y errores sean reproducibles
+
+    Uso:
+        with FakeApiServer(load_fixtures(), latency=0.05) as server:
+            run_full_pipeline(...)   # las URLs base ya apuntan aquí
+    """
+
+    def __init__(
+        self,
+        fixtures,
+        latency=0.0,
+        jitter=0.0,
+        error_rate=0.0,
+        error_status=503,
+        host="127.0.0.1",
+        port=0,
+        seed=None
+    ):
+        self.fixtures = fixtures
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._previous_urls = None
+        self._thread = None
+
+        self.requests = 0
+        self.errors = 0
+        self.misses = 0
+
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+
+    @property
+    def url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def omdb_url(self):
+        return self.url + "/"
+
+    @property
+    def tmdb_url(self):
+        return self.url + "/3"
+
+    # ---------------------------------------------
+    # Respuesta a una petición
+    # ---------------------------------------------
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency + self._random.uniform(0, self.jitter)
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+        return delay, fail
+
+    def respond(self, path, params):
+        """
+        Devuelve (status, body, headers) para una petición.
+        """
+        delay, fail = self._draw()
+        if delay > 0:
+            time.sleep(delay)
+
+        if fail:
+            headers = {"Retry-After": "1"} if self.error_status == 429 else {}
+            return self.error_status, {"status_message": "Injected error"}, headers
+
+        found = self.fixtures.get(_fixture_key(path, params))
+        if found is not None:
+            status, body = found
+            return status, body, {}
+
+        with self._lock:
+            self.misses += 1
+
+        if path.startswith("/3/"):
+            return 404, TMDB_NOT_FOUND, {}
+        return 200, OMDB_NOT_FOUND, {}
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Cabeceras y cuerpo van en escrituras separadas: sin esto,
+            # Nagle + ACK retardado añaden ~40 ms a cada respuesta
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                params = dict(parse_qsl(parts.query, keep_blank_values=True))
+                status, body, headers = server.respond(parts.path, params)
+
+                payload = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(payload)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    # ---------------------------------------------
+    # Ciclo de vida
+    # ---------------------------------------------
+    def start(self, configure=True):
+        """
+        Arranca el servidor; con configure=True redirige también las
+        URLs base de utils/tmdb_api.py hacia él.
+        """
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+
+        if configure:
+            self._previous_urls = get_base_urls()
+            set_base_urls(self.omdb_url, self.tmdb_url)
+
+        return self
+
+    def stop(self):
+        if self._previous_urls is not None:
+            set_base_urls(*self._previous_urls)
+            self._previous_urls = None
+
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+
+    def serve_forever(self):
+        self._httpd.serve_forever()
+
+    def stats(self):
+        with self._lock:
+            return {"requests": self.requests, "errors": self.errors, "misses": self.misses}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
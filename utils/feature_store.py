@@ -0,0 +1,410 @@
+# utils/feature_store.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from utils.build_dataframe import (
+    FEATURE_COLUMNS,
+    VOLATILE_FEATURES,
+    build_movie_record,
+    refresh_movie_record
+)
+from utils.embedding_store import EmbeddingTable
+from utils.embeddings import plots_to_embeddings
+from utils.providers import LiveProvider
+from utils.rate_limit import QuotaExhaustedError
+from utils.task_graph import DEFAULT_MAX_WORKERS
+from utils.tmdb_api import track_fetch_failures
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_STORE_PATH = os.path.join(BASE_DIR, ".cache", "feature_store.sqlite")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+# Antigüedad máxima de cada feature volátil. Las que no aparecen
+# aquí (director, runtime, géneros, embedding...) no caducan.
+FEATURE_TTLS = {feature: DAY for feature in VOLATILE_FEATURES}
+
+# Un título buscado puede pasar a resolver a otra película (remakes,
+# secuelas con el mismo nombre): la asociación título → imdb_id caduca.
+TITLE_TTL = 7 * DAY
+
+
+def normalize_title(title):
+    return " ".join(str(title).lower().split())
+
+
+def stale_features(timestamps, now=None, ttls=None):
+    """
+    Features cuyo timestamp superó su TTL (o que nunca se calcularon).
+    """
+    now = time.time() if now is None else now
+    ttls = FEATURE_TTLS if ttls is None else ttls
+
+    return [
+        feature for feature, ttl in ttls.items()
+        if now - timestamps.get(feature, 0) >= ttl
+    ]
+
+
+# =========================================================
+# Huella de los artefactos del embedding
+# =========================================================
+# El embedding guardado depende del tokenizer y de la tabla GloVe: si
+# se regenera cualquiera de los dos, hay que recalcularlo.
+_fingerprints = {}
+_fingerprints_lock = threading.Lock()
+
+
+def _hash_artifacts(tokenizer, embedding_index, max_nb_words):
+    digest = hashlib.sha1()
+
+    vocabulary = sorted(
+        (i, w) for w, i in tokenizer.word_index.items() if i < max_nb_words
+    )
+    digest.update(json.dumps([tokenizer.num_words, vocabulary]).encode("utf-8"))
+
+    if isinstance(embedding_index, EmbeddingTable):
+        digest.update(np.ascontiguousarray(embedding_index.matrix, dtype=np.float32).tobytes())
+        digest.update(np.ascontiguousarray(embedding_index.mask, dtype=bool).tobytes())
+    else:
+        # dict / GloveStore: solo los vectores que plot_to_embedding
+        # llega a consultar, no el índice GloVe entero
+        for i, word in vocabulary:
+            if word in embedding_index:
+                vector = np.asarray(embedding_index[word], dtype=np.float32)
+                digest.update(word.encode("utf-8") + vector.tobytes())
+
+    return digest.hexdigest()
+
+
+def artifacts_fingerprint(tokenizer, embedding_index, max_nb_words=3000):
+    """
+    Huella (sha1) del vocabulario del tokenizer y de los vectores
+    que usa plots_to_embeddings. Se calcula una vez por par de objetos.
+    """
+    key = (id(tokenizer), id(embedding_index))
+
+    with _fingerprints_lock:
+        cached = _fingerprints.get(key)
+    # Se guardan los objetos para que sus id no se reutilicen
+    if cached is not None and cached[0] is tokenizer and cached[1] is embedding_index:
+        return cached[2]
+
+    fingerprint = _hash_artifacts(tokenizer, embedding_index, max_nb_words)
+    with _fingerprints_lock:
+        _fingerprints[key] = (tokenizer, embedding_index, fingerprint)
+    return fingerprint
+
+
+def _json_default(value):
+    # tmdb_id y compañía llegan como escalares de numpy
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"No serializable: {type(value).__name__}")
+
+
+# =========================================================
+# 1. Store persistente por imdb_id
+# =========================================================
+class SQLiteFeatureStore:
+    """
+    Guarda, por imdb_id, el registro de features de build_movie_record,
+    el timestamp de cada feature y el embedding del plot (float32)
+    junto con la huella de los artefactos con que se calculó.
+
+    - path: ruta del archivo SQLite (se crea el directorio si no existe)
+    """
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS features (
+                imdb_id TEXT PRIMARY KEY,
+                record TEXT NOT NULL,
+                timestamps TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                fingerprint TEXT
+            )
+            """
+        )
+        # Stores creados antes de guardar la huella
+        columns = [row[1] for row in self._conn.execute("PRAGMA table_info(features)")]
+        if "fingerprint" not in columns:
+            self._conn.execute("ALTER TABLE features ADD COLUMN fingerprint TEXT")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS titles (
+                title TEXT PRIMARY KEY,
+                imdb_id TEXT NOT NULL,
+                resolved_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.commit()
+
+    # ---------------------------------------------
+    # Features
+    # ---------------------------------------------
+    def get(self, imdb_id, fingerprint=None):
+        """
+        Devuelve (record, timestamps, embedding) o None si no está.
+
+        - fingerprint: huella actual de los artefactos; si no coincide
+          con la guardada, embedding es None (hay que recalcularlo)
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record, timestamps, embedding, fingerprint FROM features WHERE imdb_id = ?",
+                (imdb_id,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        record, timestamps, embedding, stored_fingerprint = row
+        if fingerprint is not None and stored_fingerprint != fingerprint:
+            embedding = None
+        else:
+            embedding = np.frombuffer(embedding, dtype=np.float32).copy()
+
+        return json.loads(record), json.loads(timestamps), embedding
+
+    def put(self, imdb_id, record, timestamps, embedding, fingerprint=None):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO features
+                    (imdb_id, record, timestamps, embedding, updated_at, fingerprint)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    imdb_id,
+                    json.dumps(record, default=_json_default),
+                    json.dumps(timestamps),
+                    np.asarray(embedding, dtype=np.float32).tobytes(),
+                    now,
+                    fingerprint
+                )
+            )
+            self._conn.commit()
+
+    # ---------------------------------------------
+    # Título buscado → imdb_id
+    # ---------------------------------------------
+    def resolve_title(self, title, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT imdb_id, resolved_at FROM titles WHERE title = ?",
+                (normalize_title(title),)
+            ).fetchone()
+
+        if row is None or now - row[1] >= TITLE_TTL:
+            return None
+        return row[0]
+
+    def remember_title(self, title, imdb_id):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO titles VALUES (?, ?, ?)",
+                (normalize_title(title), imdb_id, time.time())
+            )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM features")
+            self._conn.execute("DELETE FROM titles")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM features").fetchone()[0]
+
+
+# =========================================================
+# 2. Store activo del proceso
+# =========================================================
+# SUBTEXT_FEATURE_STORE: ruta del SQLite, o "off" para desactivar
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_feature_store():
+    """
+    Devuelve el store activo (lo crea la primera vez) o None si
+    está desactivado.
+    """
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                path = os.environ.get("SUBTEXT_FEATURE_STORE", DEFAULT_STORE_PATH)
+                _store = False if path.lower() == "off" else SQLiteFeatureStore(path)
+
+    return _store if _store is not False else None
+
+
+def set_feature_store(store):
+    """
+    Reemplaza el store activo. None lo desactiva.
+    """
+    global _store
+    with _store_lock:
+        _store = store if store is not None else False
+
+
+# =========================================================
+# 3. Construir features pasando por el store
+# =========================================================
+def build_movie_features_cached(
+    title,
+    tokenizer,
+    embedding_index,
+    omdb_key,
+    tmdb_key,
+    store,
+    max_workers=DEFAULT_MAX_WORKERS,
+    ctx=None,
+    provider=None
+):
+    """
+    Igual que build_movie_record + plots_to_embeddings, pero:
+    - si la película ya está en el store, solo vuelve a consultar
+      las features volátiles caducadas (ver FEATURE_TTLS)
+    - si no está, la construye completa y la guarda
+
+    Devuelve (record, embedding) o (None, None) si no se encuentra.
+    """
+    if provider is None:
+        provider = LiveProvider(omdb_key, tmdb_key, ctx)
+
+    now = time.time()
+    fingerprint = artifacts_fingerprint(tokenizer, embedding_index)
+
+    resolved = imdb_id = store.resolve_title(title, now)
+    if imdb_id is None:
+        basic = provider.find_movie(title)
+        if basic is None:
+            return None, None
+        imdb_id = basic["imdb_id"]
+
+    stored = store.get(imdb_id, fingerprint)
+
+    # Registros guardados antes de has_previous_rating: se reconstruyen
+    if stored is not None and "has_previous_rating" not in stored[0]:
+        stored = None
+
+    if stored is None:
+        # build_movie_record repite el paso 1, pero el proveedor ya lo tiene
+        with track_fetch_failures() as failures:
+            record = build_movie_record(title, omdb_key, tmdb_key, max_workers, provider=provider)
+        if record is None:
+            return None, None
+
+        embedding = plots_to_embeddings([record["final_plot"]], tokenizer, embedding_index)[0]
+
+        # Si alguna llamada falló, las features afectadas valen None/0:
+        # se devuelven, pero no se guardan (el director y el runtime no
+        # caducan, así que quedarían mal para siempre)
+        if not failures:
+            timestamps = dict.fromkeys(FEATURE_COLUMNS, now)
+            store.put(imdb_id, record, timestamps, embedding, fingerprint)
+
+    else:
+        record, timestamps, embedding = stored
+        stale = stale_features(timestamps, now)
+        changed = False
+
+        # Tokenizer o tabla GloVe regenerados: el embedding guardado
+        # ya no corresponde a los artefactos cargados
+        if embedding is None:
+            embedding = plots_to_embeddings([record["final_plot"]], tokenizer, embedding_index)[0]
+            changed = True
+
+        if stale:
+            record, refreshed = refresh_movie_record(record, stale, omdb_key, tmdb_key, provider=provider)
+            # Lo que no se pudo refrescar conserva su valor y su
+            # timestamp: se reintenta en la próxima consulta
+            if refreshed:
+                timestamps.update(dict.fromkeys(refreshed, now))
+                changed = True
+
+        if changed:
+            store.put(imdb_id, record, timestamps, embedding, fingerprint)
+
+    # Si el título ya resolvía a este imdb_id, no hace falta escribir
+    if resolved != imdb_id:
+        store.remember_title(title, imdb_id)
+
+    return record, embedding
+
+
+def build_movie_records_cached(
+    titles,
+    tokenizer,
+    embedding_index,
+    omdb_key,
+    tmdb_key,
+    store,
+    max_workers=DEFAULT_MAX_WORKERS,
+    ctx=None,
+    provider=None
+):
+    """
+    Versión batch de build_movie_features_cached, con la misma salida
+    que build_movie_records + plots_to_embeddings:
+    (registros con query_title y error, array (n, dim) de embeddings).
+    """
+    if provider is None:
+        provider = LiveProvider(omdb_key, tmdb_key, ctx)
+
+    records, embeddings = [], []
+
+    for title in titles:
+        try:
+            record, embedding = build_movie_features_cached(
+                title, tokenizer, embedding_index, omdb_key, tmdb_key,
+                store, max_workers, provider=provider
+            )
+            error = None if record is not None else "No se encontró la película"
+        except QuotaExhaustedError:
+            # Sin cuota fallarían todos los títulos restantes
+            raise
+        except Exception as e:
+            record, embedding, error = None, None, str(e)
+
+        if record is None:
+            record = dict.fromkeys(FEATURE_COLUMNS)
+            embedding = plots_to_embeddings([None], tokenizer, embedding_index)[0]
+
+        record["query_title"] = title
+        record["error"] = error
+        records.append(record)
+        embeddings.append(embedding)
+
+    if not records:
+        return records, None
+
+    return records, np.vstack(embeddings).astype(np.float32, copy=False)
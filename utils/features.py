@@ -1,48 +1,29 @@
 # utils/features.py
 
 import pandas as pd
-from utils.tmdb_api import (
-    get_director_or_writer_tmdb_id,
-    get_directed_movies_from_tmdb
-)
+
+from utils.director_profile import get_director_profile
 
 # =========================================================
 # 1. Contar películas previas dirigidas por el director
 # =========================================================
-def count_previous_directed_movies(name, nomination_year, tmdb_key):
+def count_previous_directed_movies(name, nomination_year, tmdb_key, ctx=None):
     """
     Cuenta cuántas películas dirigió el director ANTES del año de nominación.
     Requiere tmdb_key porque usa funciones de TMDb.
+    ctx (opcional) es el FetchContext de la predicción en curso.
+
+    Se calcula sobre el DirectorProfile memoizado del director
+    (ver utils/director_profile.py).
     """
     try:
         nomination_year = int(nomination_year)
     except:
         return None
-    
-    # 1. Obtener TMDb ID del director
-    tmdb_id = get_director_or_writer_tmdb_id(name, tmdb_key)
-    if tmdb_id is None:
-        return None
-    
-    # 2. Obtener películas dirigidas
-    movies = get_directed_movies_from_tmdb(tmdb_id, tmdb_key)
-    if not movies:
-        return 0
-    
-    # 3. Extraer años válidos
-    years = []
-    for m in movies:
-        date = m.get("release_date")
-        if date and len(date) >= 4:
-            try:
-                years.append(int(date[:4]))
-            except:
-                pass
-    
-    # 4. Contar películas anteriores al año de nominación
-    previous = [y for y in years if y < nomination_year]
-    
-    return len(previous)
+
+    profile = get_director_profile(name, tmdb_key, ctx)
+
+    return profile.count_previous_movies(nomination_year)
 
 
 # =========================================================
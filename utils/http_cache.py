@@ -0,0 +1,250 @@
+# utils/http_cache.py
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+# Parámetros que identifican al cliente y no al recurso pedido
+SECRET_PARAMS = {"apikey", "api_key"}
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, ".cache", "http_cache.sqlite")
+
+HOUR = 60 * 60
+DAY = 24 * HOUR
+
+
+# =========================================================
+# 1. Clave y TTL de cada petición
+# =========================================================
+def request_key(url, params=None):
+    """
+    Clave normalizada de una petición: URL + parámetros ordenados,
+    sin las API keys.
+    """
+    items = sorted(
+        (k, str(v)) for k, v in (params or {}).items()
+        if k not in SECRET_PARAMS
+    )
+    return url + "?" + "&".join(f"{k}={v}" for k, v in items)
+
+
+# (patrón sobre la URL, TTL en segundos). Gana la primera que coincide.
+TTL_RULES = [
+    # TMDb: personas y créditos cambian muy poco
+    (r"/3/person/\d+$", 30 * DAY),
+    (r"/3/person/\d+/movie_credits$", 7 * DAY),
+    (r"/3/search/person$", 7 * DAY),
+    # TMDb: identificadores externos son estables
+    (r"/3/find/", 30 * DAY),
+    (r"/3/movie/\d+/external_ids$", 30 * DAY),
+    # TMDb: /movie/{id} trae `popularity`, que cambia a diario
+    (r"/3/movie/\d+$", 6 * HOUR),
+    (r"/3/search/movie$", DAY),
+    # OMDb: imdbRating cambia, pero despacio
+    (r"omdbapi\.com", DAY),
+]
+
+DEFAULT_TTL = DAY
+
+# OMDb responde 200 con {"Response": "False", "Error": ...} tanto si
+# la película no existe como si la key falla o se agotó su límite:
+# esas respuestas solo se guardan unos minutos
+NEGATIVE_TTL = 5 * 60
+
+# accessed_at solo se usa para expulsar las menos usadas: basta con
+# actualizarlo como mucho una vez por hora y entrada
+ACCESS_UPDATE_INTERVAL = HOUR
+
+# Cada cuántos set() se comprueba el tamaño de la caché
+EVICT_CHECK_EVERY = 256
+
+
+def is_negative_response(data):
+    return isinstance(data, dict) and data.get("Response") == "False"
+
+
+def ttl_for(url, data=None):
+    """
+    TTL de una respuesta 200 de `url` (NEGATIVE_TTL si `data` es un
+    error de OMDb).
+    """
+    if is_negative_response(data):
+        return NEGATIVE_TTL
+    for pattern, ttl in TTL_RULES:
+        if re.search(pattern, url):
+            return ttl
+    return DEFAULT_TTL
+
+
+# =========================================================
+# 2. Interfaz de caché
+# =========================================================
+class ResponseCache(ABC):
+    """
+    Interfaz mínima de una caché de respuestas JSON.
+    Cualquier objeto con get/set sirve como reemplazo.
+    """
+
+    @abstractmethod
+    def get(self, key):
+        """Devuelve el JSON guardado o None si no está o expiró."""
+
+    @abstractmethod
+    def set(self, key, data, ttl):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class SQLiteResponseCache(ResponseCache):
+    """
+    Caché persistente en un archivo SQLite.
+
+    - path: ruta del archivo (se crea el directorio si no existe)
+    - max_entries: al superarlo se eliminan primero las entradas
+      expiradas y luego las menos usadas recientemente. Se comprueba
+      cada EVICT_CHECK_EVERY inserciones, así que puede pasarse en
+      esa cantidad
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=50_000):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._sets_since_check = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Con WAL, NORMAL no arriesga la integridad; como mucho se
+        # pierden las últimas escrituras si se cae el sistema
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                body TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_responses_accessed ON responses (accessed_at)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT body, expires_at, accessed_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            body, expires_at, accessed_at = row
+            if expires_at <= now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+
+            # Un hit normal es solo lectura
+            if now - accessed_at >= ACCESS_UPDATE_INTERVAL:
+                self._conn.execute(
+                    "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+                )
+                self._conn.commit()
+
+        return json.loads(body)
+
+    def set(self, key, data, ttl):
+        if ttl <= 0:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)",
+                (key, json.dumps(data), now + ttl, now)
+            )
+            self._sets_since_check += 1
+            if self._sets_since_check >= EVICT_CHECK_EVERY:
+                self._sets_since_check = 0
+                self._evict(now)
+            self._conn.commit()
+
+    def _evict(self, now):
+        # Otros procesos pueden escribir en el mismo archivo: se cuenta
+        # en la base de datos, no en memoria
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count <= self.max_entries:
+            return
+
+        self._conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        excess = count - self.max_entries
+        if excess > 0:
+            self._conn.execute(
+                """
+                DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY accessed_at LIMIT ?
+                )
+                """,
+                (excess,)
+            )
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+# =========================================================
+# 3. Caché activa del proceso
+# =========================================================
+# SUBTEXT_HTTP_CACHE: ruta del SQLite, o "off" para desactivar
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Devuelve la caché activa (la crea la primera vez) o None si
+    está desactivada.
+    """
+    global _cache
+
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                path = os.environ.get("SUBTEXT_HTTP_CACHE", DEFAULT_CACHE_PATH)
+                _cache = False if path.lower() == "off" else SQLiteResponseCache(path)
+
+    return _cache if _cache is not False else None
+
+
+def set_response_cache(cache):
+    """
+    Reemplaza la caché activa. None la desactiva.
+    """
+    global _cache
+    with _cache_lock:
+        _cache = cache if cache is not None else False
@@ -0,0 +1,147 @@
+# utils/http_client.py
+
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.rate_limit import api_for_url, limiter_for_url
+from utils.tracing import record_http
+
+
+# (connect, read) en segundos; se aplica a TODAS las llamadas
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Respuestas que vale la pena reintentar
+RETRY_STATUS = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 30.0
+
+POOL_MAXSIZE = 16
+
+
+# =========================================================
+# 1. Sesiones con keep-alive, una por host
+# =========================================================
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def _host_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def get_session(url):
+    """
+    Devuelve la Session compartida del host de `url`.
+
+    Cada host (omdbapi.com, api.themoviedb.org) tiene su propio pool
+    de conexiones, así las llamadas reutilizan la conexión TCP+TLS
+    en vez de hacer un handshake nuevo cada vez.
+    """
+    host = _host_of(url)
+    session = _sessions.get(host)
+    if session is not None:
+        return session
+
+    with _sessions_lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_MAXSIZE)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[host] = session
+
+    return session
+
+
+def close_sessions():
+    with _sessions_lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+# =========================================================
+# 2. Backoff
+# =========================================================
+def _retry_after_seconds(response):
+    """
+    Lee la cabecera Retry-After (segundos o fecha HTTP).
+    Devuelve None si no está o no se entiende.
+    """
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_seconds(attempt, response=None):
+    if response is not None:
+        retry_after = _retry_after_seconds(response)
+        if retry_after is not None:
+            return min(retry_after, BACKOFF_MAX)
+
+    # Full jitter: espera aleatoria en [0, base * 2^intento]
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+
+
+# =========================================================
+# 3. GET con timeout y reintentos
+# =========================================================
+def http_get(url, params=None, timeout=None, max_retries=MAX_RETRIES):
+    """
+    GET sobre la sesión del host con timeout uniforme, pasando
+    antes por el limitador de la API (ver utils/rate_limit.py).
+
+    Reintenta errores de conexión, timeouts y respuestas 429/5xx con
+    backoff exponencial con jitter, respetando Retry-After. Si se
+    agotan los reintentos devuelve la última respuesta (o relanza la
+    última excepción de red).
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+
+    session = get_session(url)
+    limiter = limiter_for_url(url)
+    # Etiqueta para las métricas; hosts desconocidos (servidor falso) por nombre
+    api = api_for_url(url) or urlsplit(url).hostname or "other"
+
+    for attempt in range(max_retries + 1):
+        last_attempt = attempt == max_retries
+
+        # Cada intento (también los reintentos) consume un token
+        if limiter is not None:
+            limiter.acquire()
+
+        try:
+            response = session.get(url, params=params, timeout=timeout)
+        except (requests.ConnectionError, requests.Timeout):
+            record_http(api, None, 0)
+            if last_attempt:
+                raise
+            time.sleep(_backoff_seconds(attempt))
+            continue
+
+        record_http(api, response.status_code, len(response.content))
+
+        if response.status_code not in RETRY_STATUS or last_attempt:
+            return response
+
+        time.sleep(_backoff_seconds(attempt, response))
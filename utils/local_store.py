@@ -0,0 +1,382 @@
+# utils/local_store.py
+#
+# Store local (SQLite) construido a partir de los dumps públicos de
+# IMDb (https://datasets.imdbws.com/) y de un export local de TMDb,
+# para calcular features sin llamar a las APIs.
+
+import csv
+import gzip
+import json
+import os
+import sqlite3
+import threading
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_LOCAL_STORE_PATH = os.path.join(BASE_DIR, ".cache", "local_store.sqlite")
+
+# Tipos de título que se ingieren (TMDb /movie_credits también
+# incluye cortos y telefilmes en la filmografía de un director)
+TITLE_TYPES = {"movie", "tvMovie", "short", "video"}
+
+# Campos del export de TMDb que usan las features
+TMDB_FIELDS = [
+    "id",
+    "imdb_id",
+    "title",
+    "budget",
+    "revenue",
+    "popularity",
+    "release_date",
+    "production_companies",
+    "poster_path",
+    "overview",
+]
+
+BATCH_SIZE = 50_000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    tconst TEXT PRIMARY KEY,
+    title_type TEXT,
+    primary_title TEXT,
+    original_title TEXT,
+    title_norm TEXT,
+    start_year INTEGER,
+    runtime_minutes INTEGER,
+    genres TEXT
+);
+CREATE TABLE IF NOT EXISTS ratings (
+    tconst TEXT PRIMARY KEY,
+    average_rating REAL,
+    num_votes INTEGER
+);
+CREATE TABLE IF NOT EXISTS directed (
+    nconst TEXT NOT NULL,
+    tconst TEXT NOT NULL,
+    position INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS names (
+    nconst TEXT PRIMARY KEY,
+    primary_name TEXT,
+    name_norm TEXT,
+    birth_year INTEGER
+);
+CREATE TABLE IF NOT EXISTS tmdb_movies (
+    tmdb_id INTEGER PRIMARY KEY,
+    imdb_id TEXT,
+    data TEXT NOT NULL
+);
+"""
+
+# Se crean al final de la ingesta: insertar sin índices es mucho más rápido
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_titles_norm ON titles (title_norm);
+CREATE INDEX IF NOT EXISTS idx_directed_nconst ON directed (nconst);
+CREATE INDEX IF NOT EXISTS idx_directed_tconst ON directed (tconst);
+CREATE INDEX IF NOT EXISTS idx_names_norm ON names (name_norm);
+CREATE INDEX IF NOT EXISTS idx_tmdb_imdb ON tmdb_movies (imdb_id);
+"""
+
+
+def normalize(text):
+    return " ".join(str(text).lower().split())
+
+
+# =========================================================
+# 1. Lectura de los dumps
+# =========================================================
+def _open_text(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt", encoding="utf-8", newline="")
+    return open(path, encoding="utf-8", newline="")
+
+
+def read_imdb_tsv(path):
+    """
+    Itera las filas de un TSV de IMDb como diccionarios.
+    "\\N" (nulo en los dumps) se convierte en None.
+    """
+    with _open_text(path) as f:
+        reader = csv.reader(f, delimiter="\t", quoting=csv.QUOTE_NONE)
+        header = next(reader)
+        for row in reader:
+            yield {k: (None if v == "\\N" else v) for k, v in zip(header, row)}
+
+
+def read_jsonl(path):
+    with _open_text(path) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# =========================================================
+# 2. Store local
+# =========================================================
+class LocalMovieStore:
+    """
+    Tablas indexadas con lo que las features necesitan de IMDb
+    (títulos, ratings, directores, personas) y de TMDb (detalles
+    de cada película).
+
+    - path: ruta del archivo SQLite (se crea el directorio si no existe)
+    """
+
+    def __init__(self, path=DEFAULT_LOCAL_STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(SCHEMA)
+        self._conn.commit()
+
+    # ---------------------------------------------
+    # Ingesta
+    # ---------------------------------------------
+    def _insert_many(self, sql, rows):
+        count = 0
+        batch = []
+        with self._lock:
+            self._conn.execute("PRAGMA synchronous=OFF")
+            for row in rows:
+                batch.append(row)
+                if len(batch) >= BATCH_SIZE:
+                    self._conn.executemany(sql, batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                self._conn.executemany(sql, batch)
+                count += len(batch)
+            self._conn.commit()
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+        return count
+
+    def ingest_title_basics(self, path):
+        rows = (
+            (
+                r["tconst"],
+                r["titleType"],
+                r["primaryTitle"],
+                r["originalTitle"],
+                normalize(r["primaryTitle"]),
+                _int(r["startYear"]),
+                _int(r["runtimeMinutes"]),
+                r["genres"],
+            )
+            for r in read_imdb_tsv(path)
+            if r["titleType"] in TITLE_TYPES
+        )
+        return self._insert_many("INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+
+    def ingest_title_ratings(self, path):
+        rows = (
+            (r["tconst"], _float(r["averageRating"]), _int(r["numVotes"]))
+            for r in read_imdb_tsv(path)
+        )
+        return self._insert_many("INSERT OR REPLACE INTO ratings VALUES (?, ?, ?)", rows)
+
+    def ingest_title_crew(self, path):
+        def rows():
+            for r in read_imdb_tsv(path):
+                if r["directors"]:
+                    for position, nconst in enumerate(r["directors"].split(",")):
+                        yield nconst, r["tconst"], position
+
+        with self._lock:
+            self._conn.execute("DELETE FROM directed")
+            self._conn.commit()
+        return self._insert_many("INSERT INTO directed VALUES (?, ?, ?)", rows())
+
+    def ingest_name_basics(self, path):
+        rows = (
+            (r["nconst"], r["primaryName"], normalize(r["primaryName"]), _int(r["birthYear"]))
+            for r in read_imdb_tsv(path)
+        )
+        return self._insert_many("INSERT OR REPLACE INTO names VALUES (?, ?, ?, ?)", rows)
+
+    def ingest_tmdb_movies(self, path):
+        """
+        path: JSONL con un objeto /movie/{id} de TMDb por línea
+        (debe incluir imdb_id para enlazarlo con IMDb).
+        """
+        rows = (
+            (m["id"], m.get("imdb_id"), json.dumps({k: m.get(k) for k in TMDB_FIELDS}))
+            for m in read_jsonl(path)
+            if m.get("id") is not None
+        )
+        return self._insert_many("INSERT OR REPLACE INTO tmdb_movies VALUES (?, ?, ?)", rows)
+
+    def create_indexes(self):
+        with self._lock:
+            self._conn.executescript(INDEXES)
+            self._conn.execute("ANALYZE")
+            self._conn.commit()
+
+    # ---------------------------------------------
+    # Consultas
+    # ---------------------------------------------
+    def _one(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchone()
+
+    def _all(self, sql, params):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def find_title(self, title):
+        """
+        Película cuyo título coincide (sin mayúsculas ni espacios
+        extra); ante varias, la de más votos, como hace OMDb ?t=.
+        Las que no tienen año (\\N en el dump) se ignoran: el pipeline
+        lo necesita.
+        Devuelve (tconst, primary_title, start_year) o None.
+        """
+        return self._one(
+            """
+            SELECT t.tconst, t.primary_title, t.start_year
+            FROM titles t LEFT JOIN ratings r ON r.tconst = t.tconst
+            WHERE t.title_norm = ? AND t.title_type = 'movie'
+              AND t.start_year IS NOT NULL
+            ORDER BY COALESCE(r.num_votes, 0) DESC, t.tconst
+            LIMIT 1
+            """,
+            (normalize(title),)
+        )
+
+    def get_title(self, tconst):
+        """
+        (runtime_minutes, genres) o None.
+        """
+        return self._one(
+            "SELECT runtime_minutes, genres FROM titles WHERE tconst = ?", (tconst,)
+        )
+
+    def get_rating(self, tconst):
+        row = self._one("SELECT average_rating FROM ratings WHERE tconst = ?", (tconst,))
+        return row[0] if row else None
+
+    def get_directors(self, tconst):
+        """
+        [(nconst, primary_name, birth_year)] en el orden de IMDb.
+        """
+        return self._all(
+            """
+            SELECT d.nconst, n.primary_name, n.birth_year
+            FROM directed d LEFT JOIN names n ON n.nconst = d.nconst
+            WHERE d.tconst = ?
+            ORDER BY d.position
+            """,
+            (tconst,)
+        )
+
+    def get_person(self, nconst):
+        """
+        (nconst, primary_name, birth_year) o None.
+        """
+        return self._one(
+            "SELECT nconst, primary_name, birth_year FROM names WHERE nconst = ?", (nconst,)
+        )
+
+    def find_person(self, name):
+        """
+        (nconst, primary_name, birth_year) de la persona con ese nombre
+        que más títulos dirigió, o None.
+        """
+        return self._one(
+            """
+            SELECT n.nconst, n.primary_name, n.birth_year
+            FROM names n LEFT JOIN directed d ON d.nconst = n.nconst
+            WHERE n.name_norm = ?
+            GROUP BY n.nconst
+            ORDER BY COUNT(d.tconst) DESC
+            LIMIT 1
+            """,
+            (normalize(name),)
+        )
+
+    def get_filmography(self, nconst):
+        """
+        [(tconst, start_year, average_rating)] de los títulos dirigidos
+        con año conocido, ordenados por año (y por tconst dentro del
+        mismo año, para que el orden no dependa de SQLite).
+        """
+        return self._all(
+            """
+            SELECT t.tconst, t.start_year, r.average_rating
+            FROM directed d
+            JOIN titles t ON t.tconst = d.tconst
+            LEFT JOIN ratings r ON r.tconst = t.tconst
+            WHERE d.nconst = ? AND t.start_year IS NOT NULL
+            ORDER BY t.start_year, t.tconst
+            """,
+            (nconst,)
+        )
+
+    def get_tmdb_movie(self, imdb_id=None, tmdb_id=None):
+        if tmdb_id is not None:
+            row = self._one("SELECT data FROM tmdb_movies WHERE tmdb_id = ?", (int(tmdb_id),))
+        else:
+            row = self._one("SELECT data FROM tmdb_movies WHERE imdb_id = ?", (imdb_id,))
+        return json.loads(row[0]) if row else None
+
+    def counts(self):
+        tables = ["titles", "ratings", "directed", "names", "tmdb_movies"]
+        with self._lock:
+            return {
+                t: self._conn.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0]
+                for t in tables
+            }
+
+
+# =========================================================
+# 3. Ingesta completa
+# =========================================================
+def ingest_dumps(
+    store,
+    title_basics=None,
+    title_ratings=None,
+    title_crew=None,
+    name_basics=None,
+    tmdb_movies=None
+):
+    """
+    Carga los archivos indicados (TSV de IMDb, .tsv o .tsv.gz, y JSONL
+    de TMDb) y crea los índices. Devuelve {tabla: filas insertadas}.
+    """
+    loaded = {}
+
+    if title_basics:
+        loaded["titles"] = store.ingest_title_basics(title_basics)
+    if title_ratings:
+        loaded["ratings"] = store.ingest_title_ratings(title_ratings)
+    if title_crew:
+        loaded["directed"] = store.ingest_title_crew(title_crew)
+    if name_basics:
+        loaded["names"] = store.ingest_name_basics(name_basics)
+    if tmdb_movies:
+        loaded["tmdb_movies"] = store.ingest_tmdb_movies(tmdb_movies)
+
+    store.create_indexes()
+
+    return loaded
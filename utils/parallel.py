@@ -0,0 +1,179 @@
+# utils/parallel.py
+#
+# Scoring batch repartido entre varios procesos: el pipeline es en
+# buena parte CPU (clean_text, tokenización, embeddings, ensamblado)
+# y en un solo proceso no pasa de un núcleo por el GIL.
+
+import math
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from utils.pipeline import BATCH_RESULT_COLUMNS, run_batch_pipeline
+from utils.rate_limit import RATE_LIMITS, configure_rate_limit
+from utils.tmdb_api import get_base_urls, set_base_urls
+
+
+# Shards por worker: más de uno para repartir bien la carga cuando
+# unas películas tardan más que otras
+SHARDS_PER_WORKER = 4
+
+
+def default_workers():
+    return max(1, (os.cpu_count() or 1) - 1)
+
+
+def make_shards(titles, workers, shard_size=None):
+    """
+    Parte la lista en trozos contiguos; devuelve [(índice, títulos)].
+    """
+    if shard_size is None:
+        shard_size = max(1, math.ceil(len(titles) / (workers * SHARDS_PER_WORKER)))
+
+    return [
+        (i, titles[start:start + shard_size])
+        for i, start in enumerate(range(0, len(titles), shard_size))
+    ]
+
+
+# =========================================================
+# 1. Estado de cada worker
+# =========================================================
+_worker = {}
+
+
+def _split_rate_limits(rate_limits, workers):
+    """
+    Cada proceso tiene su propio token bucket: se reparte el límite
+    de cada API entre los workers para no multiplicarlo.
+    """
+    for api, limits in rate_limits.items():
+        budget = limits["daily_budget"]
+        configure_rate_limit(
+            api,
+            rate=limits["rate"] / workers,
+            burst=max(1, limits["burst"] / workers),
+            daily_budget=None if budget is None else max(1, budget // workers)
+        )
+
+
+def _init_worker(omdb_key, tmdb_key, base_urls, rate_limits, workers, local_store_path):
+    """
+    Inicializador de cada proceso: configura URLs y límites y carga
+    los artefactos una vez. La tabla de embeddings se abre
+    memory-mapped (ver utils/artifacts.py), así que todos los
+    workers comparten sus páginas en la caché del sistema operativo.
+    """
+    from utils.artifacts import warm_up
+
+    set_base_urls(*base_urls)
+    _split_rate_limits(rate_limits, workers)
+
+    provider = None
+    if local_store_path:
+        from utils.local_store import LocalMovieStore
+        from utils.providers import LocalProvider
+
+        provider = LocalProvider(LocalMovieStore(local_store_path))
+
+    _worker.update(omdb_key=omdb_key, tmdb_key=tmdb_key, provider=provider)
+    warm_up()
+
+
+def _score_shard(index, titles):
+    start = time.perf_counter()
+    results, _ = run_batch_pipeline(
+        titles,
+        _worker["omdb_key"],
+        _worker["tmdb_key"],
+        return_dataframe=False,
+        provider=_worker["provider"]
+    )
+    return index, results, os.getpid(), time.perf_counter() - start
+
+
+# =========================================================
+# 2. Scoring en paralelo
+# =========================================================
+def run_parallel_batch(
+    titles,
+    omdb_key,
+    tmdb_key,
+    workers=None,
+    shard_size=None,
+    local_store_path=None,
+    progress=None
+):
+    """
+    Igual que run_batch_pipeline(..., return_dataframe=False) pero
+    repartiendo los títulos en shards entre `workers` procesos.
+
+    - shard_size: títulos por shard (por defecto ~4 shards por worker)
+    - local_store_path: usa el store local (utils/local_store.py) en
+      vez de las APIs
+    - progress: función llamada al terminar cada shard con un
+      diccionario {shard, size, done, total, pid, seconds}
+
+    Devuelve el DataFrame de resultados (BATCH_RESULT_COLUMNS) en el
+    mismo orden que `titles`.
+    """
+    titles = list(titles)
+    if not titles:
+        return pd.DataFrame(columns=BATCH_RESULT_COLUMNS)
+
+    workers = default_workers() if workers is None else max(1, workers)
+    shards = make_shards(titles, workers, shard_size)
+    workers = min(workers, len(shards))
+
+    # spawn: ni conexiones SQLite ni sockets abiertos cruzan el fork
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(
+            omdb_key,
+            tmdb_key,
+            get_base_urls(),
+            {api: dict(limits) for api, limits in RATE_LIMITS.items()},
+            workers,
+            local_store_path,
+        )
+    )
+
+    parts = [None] * len(shards)
+    done = 0
+
+    with pool:
+        futures = [pool.submit(_score_shard, i, shard) for i, shard in shards]
+
+        for future in as_completed(futures):
+            index, results, pid, seconds = future.result()
+            parts[index] = results
+            done += len(results)
+
+            if progress is not None:
+                progress({
+                    "shard": index,
+                    "size": len(results),
+                    "done": done,
+                    "total": len(titles),
+                    "pid": pid,
+                    "seconds": seconds,
+                })
+
+    return pd.concat(parts, ignore_index=True)
+
+
+def print_progress(info, file=sys.stderr):
+    """
+    Función de progreso por defecto para la CLI.
+    """
+    print(
+        f"[shard {info['shard']}] {info['size']} títulos en {info['seconds']:.1f}s "
+        f"(pid {info['pid']}) — {info['done']}/{info['total']}",
+        file=file
+    )
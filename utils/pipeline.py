@@ -1,9 +1,26 @@
 # utils/pipeline.py
 
-import joblib
-from utils.build_dataframe import build_movie_dataframe
-from utils.preprocess import preprocess_movie_df
-from utils.tmdb_api import get_movie_poster_url
+import numpy as np
+import pandas as pd
+
+from utils.artifacts import registry
+from utils.build_dataframe import (
+    build_movie_record,
+    build_movie_records,
+    records_to_dataframe
+)
+from utils.embeddings import plots_to_embeddings
+from utils.feature_store import (
+    build_movie_features_cached,
+    build_movie_records_cached,
+    get_feature_store
+)
+from utils.prediction_index import get_prediction_index
+from utils.preprocess import assemble_feature_matrix, predict_proba_matrix
+from utils.providers import LiveProvider
+from utils.rate_limit import QuotaExhaustedError
+from utils.tmdb_api import FetchContext
+from utils.tracing import stage, traced
 
 
 # =========================================================
@@ -11,14 +28,17 @@ from utils.tmdb_api import get_movie_poster_url
 # =========================================================
 def load_artifacts():
     """
-    Carga todos los artefactos necesarios:
+    Devuelve todos los artefactos necesarios:
     - modelo entrenado
     - tokenizer
     - embedding_index
+
+    Se cargan una sola vez por proceso (ver utils/artifacts.py);
+    las llamadas siguientes reutilizan los objetos en memoria.
     """
-    model = joblib.load("modelo_prediccion_nominacion_oscar_v2.pkl")
-    tokenizer = joblib.load("tokenizer_modelo_prediccion_nominacion_oscar_v2.pkl")
-    embedding_index = joblib.load("glove_index_modelo_prediccion_nominacion_oscar_v2.pkl")
+    model = registry.get("model")
+    tokenizer = registry.get("tokenizer")
+    embedding_index = registry.get("embedding_index")
 
     return model, tokenizer, embedding_index
 
@@ -26,43 +46,225 @@ def load_artifacts():
 # =========================================================
 # Pipeline maestro
 # =========================================================
-def run_full_pipeline(movie_name, omdb_key, tmdb_key):
+@traced("run_full_pipeline")
+def run_full_pipeline(
+    movie_name,
+    omdb_key,
+    tmdb_key,
+    return_dataframe=True,
+    provider=None
+):
     """
     Ejecuta TODO el flujo:
-    1. Construir dataframe con todas las features
-    2. Preprocesar columnas en el orden correcto
+    1. Construir las features de la película
+    2. Ensamblar el vector de features en el orden del modelo
     3. Predecir probabilidad con el modelo
     4. Obtener poster desde TMDb
+
+    El DataFrame de la película (para mostrarlo) solo se construye
+    si return_dataframe=True; si no, el tercer valor es None.
+
+    provider: origen de los datos (ver utils/providers.py). Por
+    defecto, las APIs en vivo; el índice de predicciones y el feature
+    store solo se usan con ellas.
     """
 
+    # 0. Predicción precalculada (ver utils/prediction_index.py)
+    if provider is None:
+        index = get_prediction_index()
+        entry = index.lookup(movie_name) if index is not None else None
+        if entry is not None:
+            with stage("prediction_index"):
+                return _result_from_index(entry, return_dataframe)
+
     # 1. Cargar artefactos
-    model, tokenizer, embedding_index = load_artifacts()
-
-    # 2. Construir DataFrame completo
-    df_movie = build_movie_dataframe(
-        title=movie_name,
-        tokenizer=tokenizer,
-        embedding_index=embedding_index,
-        omdb_key=omdb_key,
-        tmdb_key=tmdb_key
-    )
+    with stage("load_artifacts"):
+        model, tokenizer, embedding_index = load_artifacts()
 
-    if df_movie is None:
-        return None, None, None
+    store = get_feature_store() if provider is None else None
+
+    # Un FetchContext compartido por todas las features y el poster
+    if provider is None:
+        provider = LiveProvider(omdb_key, tmdb_key, FetchContext())
 
+    # 2. Construir features (con el feature store activo, solo se
+    #    refrescan las features volátiles caducadas)
+    with stage("features"):
+        if store is not None:
+            record, embedding = build_movie_features_cached(
+                movie_name, tokenizer, embedding_index, omdb_key, tmdb_key, store,
+                provider=provider
+            )
+            embeddings = None if record is None else embedding[np.newaxis, :]
+        else:
+            record = build_movie_record(
+                title=movie_name,
+                omdb_key=omdb_key,
+                tmdb_key=tmdb_key,
+                provider=provider
+            )
 
-    # 3. Preprocesar columnas
-    X = preprocess_movie_df(df_movie)
+    if record is None:
+        return None, None, None
 
+    if store is None:
+        with stage("embedding"):
+            embeddings = plots_to_embeddings([record["final_plot"]], tokenizer, embedding_index)
+
+    # 3. Vector de features en el orden del modelo
     # 4. Predecir probabilidad
-    proba = model.predict_proba(X)[0][1]
+    with stage("predict"):
+        X = assemble_feature_matrix([record], embeddings)
+        proba = predict_proba_matrix(model, X)[0]
 
     # 5. Obtener poster
     poster_url = None
-    if "tmdb_id" in df_movie.columns:
-        tmdb_id = df_movie["tmdb_id"].iloc[0]
-        if tmdb_id is not None:
-            poster_url = get_movie_poster_url(tmdb_id, tmdb_key)
+    tmdb_id = record["tmdb_id"]
+    if tmdb_id is not None:
+        with stage("poster"):
+            poster_url = provider.poster_url(tmdb_id)
 
+    df_movie = None
+    if return_dataframe:
+        with stage("dataframe"):
+            df_movie = records_to_dataframe([record], embeddings)
 
     return proba, poster_url, df_movie
+
+
+def _result_from_index(entry, return_dataframe):
+    """
+    (proba, poster_url, df_movie) a partir de una entrada del índice.
+    El embedding no se guarda en el índice: si hace falta el
+    DataFrame, se recalcula desde final_plot.
+    """
+    df_movie = None
+    if return_dataframe:
+        _, tokenizer, embedding_index = load_artifacts()
+        record = entry["record"]
+        embeddings = plots_to_embeddings([record["final_plot"]], tokenizer, embedding_index)
+        df_movie = records_to_dataframe([record], embeddings)
+
+    return entry["probability"], entry["poster_url"], df_movie
+
+
+# =========================================================
+# Pipeline batch: muchos títulos en una sola pasada
+# =========================================================
+BATCH_RESULT_COLUMNS = [
+    "query_title",
+    "tmdb_id",
+    "probability",
+    "poster_url",
+    "error"
+]
+
+
+def score_titles(titles, omdb_key, tmdb_key, provider=None):
+    """
+    Pasos 1–3 de run_batch_pipeline, sin armar DataFrames.
+
+    Devuelve (records, embeddings, probabilities, poster_urls), en el
+    orden de `titles`:
+    - records: registros de build_movie_records (con query_title y error)
+    - embeddings: array (n, dim) float32
+    - probabilities: array (n,) con NaN en los títulos con error
+    - poster_urls: lista con None donde no hay poster
+    """
+    titles = list(titles)
+    with stage("load_artifacts"):
+        model, tokenizer, embedding_index = load_artifacts()
+
+    store = get_feature_store() if provider is None else None
+    if provider is None:
+        provider = LiveProvider(omdb_key, tmdb_key, FetchContext())
+
+    with stage("features"):
+        if store is not None:
+            records, embeddings = build_movie_records_cached(
+                titles, tokenizer, embedding_index, omdb_key, tmdb_key, store,
+                provider=provider
+            )
+        else:
+            records = build_movie_records(titles, omdb_key, tmdb_key, provider=provider)
+
+    if not records:
+        return records, None, np.empty(0), []
+
+    if store is None:
+        with stage("embedding"):
+            embeddings = plots_to_embeddings(
+                [r["final_plot"] for r in records], tokenizer, embedding_index
+            )
+
+    ok = np.array([r["error"] is None for r in records], dtype=bool)
+    probabilities = np.full(len(records), np.nan)
+
+    if ok.any():
+        with stage("predict"):
+            ok_records = [r for r, valid in zip(records, ok) if valid]
+            X = assemble_feature_matrix(ok_records, embeddings[ok])
+            probabilities[ok] = predict_proba_matrix(model, X)
+
+    poster_urls = []
+    for record in records:
+        poster_url = None
+        tmdb_id = record["tmdb_id"]
+        if record["error"] is None and tmdb_id is not None and not pd.isna(tmdb_id):
+            try:
+                with stage("poster"):
+                    poster_url = provider.poster_url(tmdb_id)
+            except QuotaExhaustedError:
+                raise
+            except Exception:
+                pass
+        poster_urls.append(poster_url)
+
+    return records, embeddings, probabilities, poster_urls
+
+
+@traced("run_batch_pipeline")
+def run_batch_pipeline(
+    titles,
+    omdb_key,
+    tmdb_key,
+    return_dataframe=True,
+    provider=None
+):
+    """
+    Igual que run_full_pipeline pero para una lista de títulos:
+    1. Construir las features de todas las películas
+    2. Ensamblar UNA matriz de features y predecir con el modelo una sola vez
+    3. Obtener el poster de cada película encontrada
+
+    Devuelve (results, df_movies):
+    - results: DataFrame con BATCH_RESULT_COLUMNS, una fila por título
+    - df_movies: DataFrame completo usado por el modelo
+      (None si return_dataframe=False)
+    """
+    records, embeddings, probabilities, poster_urls = score_titles(
+        titles, omdb_key, tmdb_key, provider
+    )
+
+    if not records:
+        return pd.DataFrame(columns=BATCH_RESULT_COLUMNS), None
+
+    rows = []
+    for record, probability, poster_url in zip(records, probabilities, poster_urls):
+        rows.append({
+            "query_title": record["query_title"],
+            "tmdb_id": record["tmdb_id"],
+            "probability": None if np.isnan(probability) else float(probability),
+            "poster_url": poster_url,
+            "error": record["error"],
+        })
+
+    results = pd.DataFrame(rows, columns=BATCH_RESULT_COLUMNS)
+
+    df_movies = None
+    if return_dataframe:
+        with stage("dataframe"):
+            df_movies = records_to_dataframe(records, embeddings, extra_columns=["query_title"])
+            df_movies["error"] = [r["error"] for r in records]
+
+    return results, df_movies
@@ -0,0 +1,286 @@
+# utils/prediction_index.py
+#
+# Índice de predicciones precalculadas para las películas candidatas
+# (p. ej. todos los estrenos del año). Un job offline las puntúa con
+# el pipeline y guarda un JSON; run_full_pipeline lo consulta antes de
+# llamar a las APIs y solo calcula en vivo si el título no está.
+
+import json
+import os
+import re
+import threading
+import time
+
+import numpy as np
+
+from utils.build_dataframe import FEATURE_COLUMNS
+from utils.feature_store import normalize_title
+from utils.tmdb_api import discover_movies_by_year
+
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_INDEX_PATH = os.path.join(BASE_DIR, ".cache", "prediction_index.json")
+
+INDEX_VERSION = 1
+
+# Un índice más viejo que esto se ignora: imdb_rating y popularity
+# cambian (ver FEATURE_TTLS en utils/feature_store.py) y el job se
+# pensó para correr cada noche
+INDEX_MAX_AGE = 2 * 24 * 60 * 60
+
+_IMDB_ID_RE = re.compile(r"^tt\d+$")
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"No serializable: {type(value).__name__}")
+
+
+# =========================================================
+# 1. Candidatas
+# =========================================================
+def candidates_from_file(path, column="title"):
+    """
+    Candidatas desde un archivo (CSV, JSONL o un título por línea,
+    ver utils/batch_runner.py).
+    """
+    from utils.batch_runner import read_titles
+
+    return [{"title": title, "aliases": [], "tmdb_id": None} for _, title in read_titles(path, column)]
+
+
+def candidates_from_tmdb(year, tmdb_key, max_pages=5):
+    """
+    Estrenos de `year` en TMDb. El título original se guarda como
+    alias para que también se pueda buscar por él.
+    """
+    candidates = []
+    for movie in discover_movies_by_year(year, tmdb_key, max_pages):
+        title = movie.get("title")
+        if not title:
+            continue
+        original = movie.get("original_title")
+        candidates.append({
+            "title": title,
+            "aliases": [original] if original and original != title else [],
+            "tmdb_id": movie.get("id"),
+        })
+    return candidates
+
+
+# =========================================================
+# 2. Índice
+# =========================================================
+class PredictionIndex:
+    """
+    - entries: lista de predicciones, una por película (imdb_id)
+    - keys: {clave normalizada: posición en entries}; las claves son
+      el título buscado, el título canónico, los alias y el imdb_id
+    - created_at: timestamp del job que lo generó
+    """
+
+    def __init__(self, entries=None, keys=None, created_at=None, max_age=INDEX_MAX_AGE):
+        self.entries = entries if entries is not None else []
+        self.keys = keys if keys is not None else {}
+        self.created_at = time.time() if created_at is None else created_at
+        self.max_age = max_age
+
+    @staticmethod
+    def normalize_key(title):
+        title = str(title).strip()
+        if _IMDB_ID_RE.match(title):
+            return title
+        return normalize_title(title)
+
+    def add(self, entry, titles):
+        """
+        Añade una predicción (o reutiliza la de su imdb_id) y la asocia
+        a `titles`. Una clave que ya existe no se sobrescribe: gana la
+        primera candidata (la más popular en candidates_from_tmdb).
+        """
+        position = self.keys.get(entry["imdb_id"])
+        if position is None:
+            position = len(self.entries)
+            self.entries.append(entry)
+            self.keys[entry["imdb_id"]] = position
+
+        for title in titles:
+            if title:
+                self.keys.setdefault(self.normalize_key(title), position)
+
+    def is_expired(self, now=None):
+        now = time.time() if now is None else now
+        return now - self.created_at >= self.max_age
+
+    def lookup(self, title):
+        """
+        Devuelve la entrada de `title` (o de un imdb_id) o None si no
+        está o el índice caducó.
+        """
+        position = self.keys.get(self.normalize_key(title))
+        if position is None or self.is_expired():
+            return None
+        return self.entries[position]
+
+    def __len__(self):
+        return len(self.entries)
+
+    # ---------------------------------------------
+    # Persistencia
+    # ---------------------------------------------
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        data = {
+            "version": INDEX_VERSION,
+            "created_at": self.created_at,
+            "entries": self.entries,
+            "keys": self.keys,
+        }
+
+        # Escritura atómica: la app puede estar leyéndolo
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path, max_age=INDEX_MAX_AGE):
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+
+        if data.get("version") != INDEX_VERSION:
+            raise ValueError(f"Versión de índice no soportada: {data.get('version')}")
+
+        return cls(data["entries"], data["keys"], data["created_at"], max_age)
+
+
+# =========================================================
+# 3. Job offline
+# =========================================================
+def build_prediction_index(
+    candidates,
+    omdb_key,
+    tmdb_key,
+    chunk_size=20,
+    provider=None,
+    progress=None
+):
+    """
+    Puntúa las candidatas por bloques con el pipeline batch y devuelve
+    un PredictionIndex con las que se encontraron.
+
+    - candidates: lista de {"title", "aliases", "tmdb_id"}
+    - provider: origen de los datos (por defecto las APIs en vivo)
+    - progress: función llamada tras cada bloque con (hechas, total)
+    """
+    # utils/pipeline.py importa este módulo
+    from utils.batch_runner import chunked
+    from utils.pipeline import score_titles
+
+    index = PredictionIndex()
+    done = 0
+
+    for chunk in chunked(candidates, chunk_size):
+        records, _, probabilities, poster_urls = score_titles(
+            [c["title"] for c in chunk], omdb_key, tmdb_key, provider
+        )
+
+        for candidate, record, probability, poster_url in zip(chunk, records, probabilities, poster_urls):
+            if record["error"] is not None:
+                continue
+
+            entry = {
+                "imdb_id": record["imdb_id"],
+                "title": record["title"],
+                "year": record["year"],
+                "tmdb_id": record["tmdb_id"],
+                "probability": float(probability),
+                "poster_url": poster_url,
+                "record": {c: record[c] for c in FEATURE_COLUMNS},
+            }
+
+            titles = [candidate["title"], record["title"]]
+            # OMDb resuelve por título: si eligió otra película que la
+            # de TMDb, los alias de TMDb no le corresponden
+            if candidate["tmdb_id"] is None or candidate["tmdb_id"] == record["tmdb_id"]:
+                titles += candidate["aliases"]
+
+            index.add(entry, titles)
+
+        done += len(chunk)
+        if progress is not None:
+            progress(done, len(candidates))
+
+    return index
+
+
+# =========================================================
+# 4. Índice activo del proceso
+# =========================================================
+# SUBTEXT_PREDICTION_INDEX: ruta del JSON, o "off" para desactivar
+_index = None
+_index_mtime = None
+_override = None
+_index_lock = threading.Lock()
+
+
+def get_prediction_index():
+    """
+    Devuelve el índice activo o None si está desactivado o no existe.
+    Si el job reescribe el archivo, se recarga en la siguiente llamada.
+    """
+    global _index, _index_mtime
+
+    if _override is not None:
+        return _override[0]
+
+    path = os.environ.get("SUBTEXT_PREDICTION_INDEX", DEFAULT_INDEX_PATH)
+    if path.lower() == "off":
+        return None
+
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+
+    if mtime != _index_mtime:
+        with _index_lock:
+            if mtime != _index_mtime:
+                _index = PredictionIndex.load(path)
+                _index_mtime = mtime
+
+    return _index
+
+
+def set_prediction_index(index):
+    """
+    Fija el índice activo sin leer el archivo (None lo desactiva).
+    Devuelve el override anterior para restore_prediction_index();
+    reset_prediction_index() vuelve a usar el archivo.
+    """
+    global _override
+    with _index_lock:
+        previous, _override = _override, (index,)
+    return previous
+
+
+def restore_prediction_index(previous):
+    """
+    Deja el override devuelto por set_prediction_index() (si no
+    había override, vuelve a usar el archivo).
+    """
+    global _override
+    with _index_lock:
+        _override = previous
+
+
+def reset_prediction_index():
+    global _index, _index_mtime, _override
+    with _index_lock:
+        _index = None
+        _index_mtime = None
+        _override = None
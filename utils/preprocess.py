@@ -1,5 +1,6 @@
 # utils/preprocess.py
 
+import numpy as np
 import pandas as pd
 
 # =========================================================
@@ -51,3 +52,68 @@ def preprocess_movie_df(df):
         raise ValueError(f"Faltan columnas en el DataFrame: {missing}")
 
     return df[ordered_cols]
+
+
+# =========================================================
+# Camino rápido: matriz de features sin DataFrames
+# =========================================================
+FEATURE_ORDER = NUM_COLS + CAT_COLS + EMB_COLS
+
+_SCALAR_COLS = NUM_COLS + CAT_COLS
+
+
+def _to_float(value):
+    if value is None:
+        return np.nan
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def assemble_feature_matrix(records, embeddings):
+    """
+    Escribe las features directamente en un array float64
+    preasignado de forma (n, len(FEATURE_ORDER)), en el mismo orden
+    que preprocess_movie_df.
+
+    float64 y no float32: redondear antes del StandardScaler cambia
+    splits de XGBoost y, con ellos, la probabilidad predicha.
+
+    - records: lista de diccionarios con NUM_COLS + CAT_COLS
+      (valores None → NaN)
+    - embeddings: array (n, len(EMB_COLS)) de plots_to_embeddings
+    """
+    n = len(records)
+    n_scalar = len(_SCALAR_COLS)
+
+    embeddings = np.asarray(embeddings)
+    if embeddings.shape != (n, len(EMB_COLS)):
+        raise ValueError(
+            f"Se esperaban embeddings de forma {(n, len(EMB_COLS))}, "
+            f"llegó {embeddings.shape}"
+        )
+
+    X = np.empty((n, len(FEATURE_ORDER)), dtype=np.float64)
+
+    for i, record in enumerate(records):
+        X[i, :n_scalar] = [_to_float(record.get(c)) for c in _SCALAR_COLS]
+
+    X[:, n_scalar:] = embeddings
+
+    return X
+
+
+def feature_matrix_to_frame(X):
+    """
+    Envuelve X (sin copiarlo) con los nombres de columna que espera
+    el modelo: su ColumnTransformer selecciona columnas por nombre.
+    """
+    return pd.DataFrame(X, columns=FEATURE_ORDER, copy=False)
+
+
+def predict_proba_matrix(model, X):
+    """
+    Probabilidad de la clase positiva para cada fila de X.
+    """
+    return model.predict_proba(feature_matrix_to_frame(X))[:, 1]
@@ -0,0 +1,249 @@
+# utils/providers.py
+
+from abc import ABC, abstractmethod
+
+import pandas as pd
+
+from utils.director_profile import DirectorProfile, get_director_profile
+from utils.tmdb_api import (
+    FetchContext,
+    get_basic_movie_info_df,
+    get_movie_info,
+    get_movie_poster_url,
+    get_omdb_details,
+    get_release_month_tmdb,
+    get_tmdb_movie_details
+)
+from utils.local_store import normalize
+
+
+# =========================================================
+# 1. Interfaz de proveedor de datos
+# =========================================================
+class MovieDataProvider(ABC):
+    """
+    Origen de los datos crudos que usa build_movie_record. Cada
+    método corresponde a un paso numerado del builder:
+
+    1.  find_movie(title) → {"title", "year", "imdb_id", "tmdb_id"} o None
+    2.  movie_info(imdb_id) → (imdb_rating, director)
+    3.  movie_details(imdb_id) → (runtime, genre, plot)
+    4.  director_profile(name) → DirectorProfile
+    5.  previous_imdb_rating(profile, imdb_id, imdb_rating_actual)
+    6.  production_details(tmdb_id) → (budget, revenue, popularity, companies)
+    10. release_month(tmdb_id)
+    --  poster_url(tmdb_id)
+    """
+
+    @abstractmethod
+    def find_movie(self, title):
+        pass
+
+    @abstractmethod
+    def movie_info(self, imdb_id):
+        pass
+
+    @abstractmethod
+    def movie_details(self, imdb_id):
+        pass
+
+    @abstractmethod
+    def director_profile(self, name):
+        pass
+
+    @abstractmethod
+    def previous_imdb_rating(self, profile, imdb_id, imdb_rating_actual):
+        pass
+
+    @abstractmethod
+    def production_details(self, tmdb_id):
+        pass
+
+    @abstractmethod
+    def release_month(self, tmdb_id):
+        pass
+
+    @abstractmethod
+    def poster_url(self, tmdb_id):
+        pass
+
+
+# =========================================================
+# 2. APIs en vivo (OMDb + TMDb)
+# =========================================================
+class LiveProvider(MovieDataProvider):
+    """
+    Consulta OMDb y TMDb (utils/tmdb_api.py).
+
+    - ctx: FetchContext compartido; si no se pasa se crea uno
+    """
+
+    def __init__(self, omdb_key, tmdb_key, ctx=None):
+        self.omdb_key = omdb_key
+        self.tmdb_key = tmdb_key
+        self.ctx = ctx if ctx is not None else FetchContext()
+
+    def find_movie(self, title):
+        basic = get_basic_movie_info_df(title, self.omdb_key, self.tmdb_key, self.ctx)
+
+        if basic is None or basic.empty or basic["imdb_id"].iloc[0] is None:
+            return None
+
+        basic = basic.iloc[0]
+        return {
+            "title": basic["title"],
+            "year": basic["year"],
+            "imdb_id": basic["imdb_id"],
+            "tmdb_id": basic["tmdb_id"],
+        }
+
+    def movie_info(self, imdb_id):
+        return tuple(get_movie_info(imdb_id, self.omdb_key, self.ctx).tolist())
+
+    def movie_details(self, imdb_id):
+        return tuple(get_omdb_details(imdb_id, self.omdb_key, self.ctx).tolist())
+
+    def director_profile(self, name):
+        return get_director_profile(name, self.tmdb_key, self.ctx)
+
+    def previous_imdb_rating(self, profile, imdb_id, imdb_rating_actual):
+        return profile.previous_imdb_rating(
+            current_imdb_id=imdb_id,
+            imdb_rating_actual=imdb_rating_actual,
+            omdb_key=self.omdb_key,
+            tmdb_key=self.tmdb_key,
+            ctx=self.ctx
+        )
+
+    def production_details(self, tmdb_id):
+        return tuple(get_tmdb_movie_details(tmdb_id, self.tmdb_key, self.ctx).tolist())
+
+    def release_month(self, tmdb_id):
+        return get_release_month_tmdb(tmdb_id, self.tmdb_key, self.ctx)
+
+    def poster_url(self, tmdb_id):
+        return get_movie_poster_url(tmdb_id, self.tmdb_key, self.ctx)
+
+
+# =========================================================
+# 3. Store local (dumps de IMDb + export de TMDb)
+# =========================================================
+class LocalProvider(MovieDataProvider):
+    """
+    Lee todo de un LocalMovieStore (utils/local_store.py), sin red.
+
+    Diferencias con las APIs en vivo:
+    - el plot es el overview de TMDb (los dumps de IMDb no traen sinopsis)
+    - la filmografía del director sale de title.crew de IMDb
+    - la fecha de nacimiento solo tiene el año (basta para la edad)
+    """
+
+    def __init__(self, store):
+        self.store = store
+        # Nombre normalizado → nconst de los directores ya vistos en
+        # title.crew, para no confundir homónimos en director_profile
+        self._director_ids = {}
+
+    def find_movie(self, title):
+        row = self.store.find_title(title)
+        if row is None:
+            return None
+
+        tconst, primary_title, start_year = row
+        tmdb = self.store.get_tmdb_movie(imdb_id=tconst)
+
+        return {
+            "title": primary_title,
+            "year": start_year,
+            "imdb_id": tconst,
+            "tmdb_id": tmdb["id"] if tmdb else None,
+        }
+
+    def movie_info(self, imdb_id):
+        directors = self.store.get_directors(imdb_id)
+        for nconst, name, _ in directors:
+            if name:
+                self._director_ids[normalize(name)] = nconst
+
+        # Sin directores OMDb devuelve "N/A", no None
+        names = ", ".join(name for _, name, _ in directors if name) or "N/A"
+        return self.store.get_rating(imdb_id), names
+
+    def movie_details(self, imdb_id):
+        row = self.store.get_title(imdb_id)
+        runtime, genres = row if row else (None, None)
+
+        tmdb = self.store.get_tmdb_movie(imdb_id=imdb_id) or {}
+        plot = tmdb.get("overview") or None
+
+        return runtime, genres, plot
+
+    def director_profile(self, name):
+        nconst = self._director_ids.get(normalize(name))
+        if nconst is not None:
+            person = self.store.get_person(nconst)
+        else:
+            person = self.store.find_person(name)
+        if person is None:
+            return DirectorProfile(name, complete=False)
+
+        nconst, primary_name, birth_year = person
+        filmography = []
+        ratings = {}
+
+        for tconst, year, rating in self.store.get_filmography(nconst):
+            filmography.append({"tmdb_id": None, "year": year, "imdb_id": tconst})
+            if rating is not None:
+                ratings[tconst] = rating
+
+        profile = DirectorProfile(
+            primary_name,
+            birthday=str(birth_year) if birth_year else None,
+            filmography=filmography,
+            imdb_id=nconst
+        )
+        profile.ratings = ratings
+        return profile
+
+    def previous_imdb_rating(self, profile, imdb_id, imdb_rating_actual):
+        idx = next(
+            (i for i, m in enumerate(profile.filmography) if m["imdb_id"] == imdb_id),
+            None
+        )
+        if not idx:
+            return imdb_rating_actual
+
+        prev_imdb_id = profile.filmography[idx - 1]["imdb_id"]
+        return profile.ratings.get(prev_imdb_id, imdb_rating_actual)
+
+    def _tmdb(self, tmdb_id):
+        if tmdb_id is None or pd.isna(tmdb_id):
+            return None
+        return self.store.get_tmdb_movie(tmdb_id=tmdb_id)
+
+    def production_details(self, tmdb_id):
+        tmdb = self._tmdb(tmdb_id)
+        if tmdb is None:
+            return None, None, None, None
+
+        companies = [c["name"] for c in tmdb.get("production_companies") or []]
+        return tmdb.get("budget"), tmdb.get("revenue"), tmdb.get("popularity"), companies
+
+    def release_month(self, tmdb_id):
+        tmdb = self._tmdb(tmdb_id)
+        date_str = tmdb.get("release_date") if tmdb else None
+
+        if not date_str:
+            return None
+
+        try:
+            return int(date_str.split("-")[1])
+        except (IndexError, ValueError):
+            return None
+
+    def poster_url(self, tmdb_id):
+        tmdb = self._tmdb(tmdb_id)
+        poster_path = tmdb.get("poster_path") if tmdb else None
+        if poster_path:
+            return f"https://image.tmdb.org/t/p/w500{poster_path}"
+        return None
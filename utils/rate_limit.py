@@ -0,0 +1,192 @@
+# utils/rate_limit.py
+
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from utils.tracing import record_rate_limit
+
+
+class QuotaExhaustedError(RuntimeError):
+    """Se agotó el presupuesto diario de llamadas de una API."""
+
+
+# =========================================================
+# 1. Token bucket con cola y presupuesto diario
+# =========================================================
+class TokenBucket:
+    """
+    Limita las llamadas de TODO el proceso a una API.
+
+    - rate: tokens por segundo
+    - burst: tokens máximos acumulables (ráfaga permitida)
+    - daily_budget: llamadas máximas por día UTC (None = sin límite)
+
+    acquire() no falla cuando no hay tokens: reserva el siguiente
+    turno y duerme hasta entonces, de modo que los llamadores quedan
+    en cola en orden de llegada. Solo el presupuesto diario lanza
+    QuotaExhaustedError, porque esperar al día siguiente no tiene
+    sentido dentro de una petición.
+
+    Cada token (y su espera) se exporta a /metrics y a la etapa activa
+    de la traza; stats() resume el limitador.
+    """
+
+    def __init__(self, rate, burst, daily_budget=None, name=""):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate debe ser > 0 y burst >= 1")
+
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.daily_budget = daily_budget
+
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._day = self._today()
+        self._used_today = 0
+
+        # Métricas
+        self.acquired = 0
+        self.waited = 0
+        self.wait_seconds_total = 0.0
+        self.max_wait_seconds = 0.0
+
+    @staticmethod
+    def _today():
+        return datetime.now(timezone.utc).date()
+
+    def acquire(self):
+        """
+        Toma un token; si hace falta, espera. Devuelve los segundos esperados.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+
+            if self.daily_budget is not None:
+                today = self._today()
+                if today != self._day:
+                    self._day = today
+                    self._used_today = 0
+                if self._used_today >= self.daily_budget:
+                    record_rate_limit(self.name or "other", exhausted=True)
+                    raise QuotaExhaustedError(
+                        f"Presupuesto diario de {self.name or 'la API'} agotado "
+                        f"({self.daily_budget} llamadas)"
+                    )
+                self._used_today += 1
+
+            # Los tokens pueden quedar negativos: eso ES la cola
+            self._tokens -= 1
+            wait = 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+            self.acquired += 1
+            if wait > 0:
+                self.waited += 1
+                self.wait_seconds_total += wait
+                self.max_wait_seconds = max(self.max_wait_seconds, wait)
+
+        if wait > 0:
+            time.sleep(wait)
+
+        # /metrics y la etapa activa de la traza (ver utils/tracing.py)
+        record_rate_limit(self.name or "other", wait)
+
+        return wait
+
+    def stats(self):
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "burst": self.burst,
+                "daily_budget": self.daily_budget,
+                "used_today": self._used_today,
+                "acquired": self.acquired,
+                "waited": self.waited,
+                "wait_seconds_total": self.wait_seconds_total,
+                "max_wait_seconds": self.max_wait_seconds,
+            }
+
+
+# =========================================================
+# 2. Limitadores por API (compartidos por todo el proceso)
+# =========================================================
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+# TMDb permite ~50 req/s por IP; OMDb gratis = 1000 llamadas/día
+RATE_LIMITS = {
+    "tmdb": {
+        "rate": _env_float("TMDB_RATE_PER_SEC", 40),
+        "burst": _env_float("TMDB_RATE_BURST", 40),
+        "daily_budget": _env_int("TMDB_DAILY_BUDGET", None),
+    },
+    "omdb": {
+        "rate": _env_float("OMDB_RATE_PER_SEC", 10),
+        "burst": _env_float("OMDB_RATE_BURST", 10),
+        "daily_budget": _env_int("OMDB_DAILY_BUDGET", 1000),
+    },
+}
+
+# Host → API
+API_HOSTS = {
+    "www.omdbapi.com": "omdb",
+    "omdbapi.com": "omdb",
+    "api.themoviedb.org": "tmdb",
+}
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(api):
+    limiter = _limiters.get(api)
+    if limiter is not None:
+        return limiter
+
+    with _limiters_lock:
+        if api not in _limiters:
+            _limiters[api] = TokenBucket(name=api, **RATE_LIMITS[api])
+        return _limiters[api]
+
+
+def configure_rate_limit(api, rate, burst, daily_budget=None):
+    """
+    Cambia los límites de una API (reinicia su limitador y métricas).
+    """
+    with _limiters_lock:
+        RATE_LIMITS[api] = {"rate": rate, "burst": burst, "daily_budget": daily_budget}
+        _limiters[api] = TokenBucket(rate, burst, daily_budget, name=api)
+
+
+def api_for_url(url):
+    """
+    "omdb", "tmdb" o None si el host de `url` no es una API conocida.
+    """
+    return API_HOSTS.get(urlsplit(url).hostname or "")
+
+
+def limiter_for_url(url):
+    """
+    Limitador correspondiente al host de `url`, o None si no es una API conocida.
+    """
+    api = api_for_url(url)
+    if api is None:
+        return None
+    return get_limiter(api)
+
+
+def rate_limit_stats():
+    return {api: limiter.stats() for api, limiter in list(_limiters.items())}
@@ -0,0 +1,237 @@
+# utils/service.py
+#
+# Servicio HTTP asíncrono (aiohttp) de predicción:
+#
+#   POST /predict         {"title": "Oppenheimer"}
+#   POST /predict/batch   {"titles": ["Oppenheimer", "Barbie"]}  → NDJSON
+#   GET  /health
+#   GET  /metrics         (formato Prometheus, ver utils/tracing.py)
+#
+# Los artefactos se cargan una vez al arrancar y quedan en memoria.
+# El pipeline (requests + modelo) es síncrono: cada predicción corre
+# en un pool de hilos y un semáforo limita cuántas hay en vuelo.
+
+import asyncio
+import json
+import math
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+from utils.artifacts import warm_up
+from utils.build_dataframe import FEATURE_COLUMNS
+from utils.pipeline import run_full_pipeline
+from utils.singleflight import run_full_pipeline_coalesced
+from utils.tracing import METRICS
+
+
+# Solo local por defecto: para exponerlo, pasar host explícitamente
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8080
+
+# Predicciones ejecutándose a la vez (cada una ya lanza hasta
+# DEFAULT_MAX_WORKERS llamadas HTTP en paralelo)
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Títulos máximos por petición batch
+MAX_BATCH_SIZE = 500
+
+CONFIG_KEY = web.AppKey("config", dict)
+
+
+# =========================================================
+# 1. Predicción de un título
+# =========================================================
+def _json_value(value):
+    # NaN / inf no son JSON válido; los escalares de numpy tampoco
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    return value
+
+
+def predict_title(title, omdb_key, tmdb_key, provider=None):
+    """
+    Ejecuta run_full_pipeline y devuelve un diccionario serializable:
+    {"title", "found", "probability", "poster_url", "features"}.
+
+    Con las APIs en vivo, las peticiones simultáneas del mismo título
+    comparten una ejecución (ver utils/singleflight.py).
+    """
+    if provider is None:
+        proba, poster_url, df_movie = run_full_pipeline_coalesced(title, omdb_key, tmdb_key)
+    else:
+        proba, poster_url, df_movie = run_full_pipeline(
+            title, omdb_key, tmdb_key, return_dataframe=True, provider=provider
+        )
+
+    if proba is None:
+        return {"title": title, "found": False, "probability": None, "poster_url": None, "features": None}
+
+    row = df_movie.iloc[0]
+    return {
+        "title": title,
+        "found": True,
+        "probability": float(proba),
+        "poster_url": poster_url,
+        "features": {c: _json_value(row[c]) for c in FEATURE_COLUMNS},
+    }
+
+
+async def _predict(app, title):
+    """
+    predict_title en el pool de hilos, respetando el semáforo.
+    """
+    config = app[CONFIG_KEY]
+    loop = asyncio.get_running_loop()
+
+    async with config["semaphore"]:
+        return await loop.run_in_executor(
+            config["executor"],
+            predict_title,
+            title,
+            config["omdb_key"],
+            config["tmdb_key"],
+            config["provider"],
+        )
+
+
+# =========================================================
+# 2. Handlers
+# =========================================================
+async def _read_json(request):
+    # None si el cuerpo no es un objeto JSON
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return body if isinstance(body, dict) else None
+
+
+def _bad_request(message):
+    return web.json_response({"error": message}, status=400)
+
+
+async def handle_predict(request):
+    body = await _read_json(request)
+    title = body.get("title") if body is not None else None
+
+    if not isinstance(title, str) or not title.strip():
+        return _bad_request("Falta 'title'")
+
+    try:
+        result = await _predict(request.app, title.strip())
+    except Exception as e:
+        return web.json_response({"title": title, "error": str(e)}, status=502)
+
+    return web.json_response(result, status=200 if result["found"] else 404)
+
+
+async def handle_predict_batch(request):
+    """
+    Devuelve una línea JSON por título EN CUANTO termina (no en el
+    orden pedido); "index" es su posición en la lista original.
+    """
+    body = await _read_json(request)
+    titles = body.get("titles") if body is not None else None
+
+    if not isinstance(titles, list) or not all(isinstance(t, str) for t in titles):
+        return _bad_request("'titles' debe ser una lista de strings")
+    if not all(t.strip() for t in titles):
+        return _bad_request("'titles' no puede contener títulos vacíos")
+    if len(titles) > MAX_BATCH_SIZE:
+        return _bad_request(f"Máximo {MAX_BATCH_SIZE} títulos por petición")
+
+    response = web.StreamResponse(headers={"Content-Type": "application/x-ndjson"})
+    await response.prepare(request)
+
+    async def run(index, title):
+        try:
+            result = await _predict(request.app, title.strip())
+            result["error"] = None if result["found"] else "No se encontró la película"
+        except Exception as e:
+            result = {"title": title, "found": False, "probability": None,
+                      "poster_url": None, "features": None, "error": str(e)}
+        result["index"] = index
+        return result
+
+    tasks = [asyncio.ensure_future(run(i, t)) for i, t in enumerate(titles)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            result = await next_done
+            await response.write((json.dumps(result, ensure_ascii=False) + "\n").encode("utf-8"))
+    finally:
+        # Si el cliente se desconecta, no seguir con los pendientes
+        for task in tasks:
+            task.cancel()
+
+    await response.write_eof()
+    return response
+
+
+async def handle_health(request):
+    return web.json_response({"status": "ok"})
+
+
+async def handle_metrics(request):
+    return web.Response(text=METRICS.render(), content_type="text/plain", charset="utf-8")
+
+
+# =========================================================
+# 3. Aplicación
+# =========================================================
+def create_app(
+    omdb_key=None,
+    tmdb_key=None,
+    provider=None,
+    max_concurrency=DEFAULT_MAX_CONCURRENCY
+):
+    """
+    Crea la aplicación aiohttp.
+
+    - omdb_key / tmdb_key: por defecto OMDB_API_KEY / TMDB_API_KEY
+    - provider: origen de los datos (ver utils/providers.py); por
+      defecto las APIs en vivo
+    - max_concurrency: predicciones simultáneas como máximo
+    """
+    app = web.Application()
+    app[CONFIG_KEY] = {
+        "omdb_key": omdb_key or os.environ.get("OMDB_API_KEY"),
+        "tmdb_key": tmdb_key or os.environ.get("TMDB_API_KEY"),
+        "provider": provider,
+        "max_concurrency": max_concurrency,
+    }
+
+    app.router.add_post("/predict", handle_predict)
+    app.router.add_post("/predict/batch", handle_predict_batch)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+
+    app.on_startup.append(_on_startup)
+    app.on_cleanup.append(_on_cleanup)
+
+    return app
+
+
+async def _on_startup(app):
+    config = app[CONFIG_KEY]
+    config["semaphore"] = asyncio.Semaphore(config["max_concurrency"])
+    config["executor"] = ThreadPoolExecutor(
+        max_workers=config["max_concurrency"], thread_name_prefix="subtext-predict"
+    )
+
+    # Cargar los artefactos antes de aceptar peticiones
+    await asyncio.get_running_loop().run_in_executor(config["executor"], warm_up)
+
+
+async def _on_cleanup(app):
+    app[CONFIG_KEY]["executor"].shutdown(wait=False, cancel_futures=True)
+
+
+def run_service(host=DEFAULT_HOST, port=DEFAULT_PORT, **kwargs):
+    """
+    Arranca el servicio (bloquea hasta Ctrl+C). kwargs va a create_app.
+    """
+    web.run_app(create_app(**kwargs), host=host, port=port)
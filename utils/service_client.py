@@ -0,0 +1,96 @@
+# utils/service_client.py
+#
+# Cliente del servicio de predicción (utils/service.py). Lo usa
+# app.py cuando SUBTEXT_SERVICE_URL está configurada.
+
+import json
+import os
+
+import pandas as pd
+import requests
+
+from utils.build_dataframe import FEATURE_COLUMNS
+
+
+# (connect, read): una predicción en frío puede tardar varios segundos
+DEFAULT_TIMEOUT = (3.05, 60)
+
+
+def get_service_url():
+    """
+    URL del servicio (SUBTEXT_SERVICE_URL) o None si no está configurada.
+    """
+    url = os.environ.get("SUBTEXT_SERVICE_URL", "").strip()
+    return url.rstrip("/") or None
+
+
+class ServiceError(Exception):
+    pass
+
+
+class PredictionClient:
+    """
+    - base_url: p. ej. "http://localhost:8080"
+    - timeout: timeout de requests (segundos o (connect, read))
+    """
+
+    def __init__(self, base_url, timeout=DEFAULT_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self._session = requests.Session()
+
+    def predict_json(self, title):
+        """
+        Respuesta JSON de POST /predict ("found": False si no se encuentra).
+        """
+        r = self._session.post(f"{self.base_url}/predict", json={"title": title}, timeout=self.timeout)
+
+        if r.status_code not in (200, 404):
+            raise ServiceError(_error_message(r))
+
+        return r.json()
+
+    def predict(self, title):
+        """
+        Misma salida que run_full_pipeline: (proba, poster_url, df_movie).
+        df_movie solo trae FEATURE_COLUMNS (sin las columnas emb_*).
+        """
+        result = self.predict_json(title)
+
+        if not result["found"]:
+            return None, None, None
+
+        df_movie = pd.DataFrame([result["features"]], columns=FEATURE_COLUMNS)
+        return result["probability"], result["poster_url"], df_movie
+
+    def predict_batch(self, titles):
+        """
+        Generador: devuelve cada resultado de POST /predict/batch en
+        cuanto llega (en orden de llegada; ver la clave "index").
+        """
+        with self._session.post(
+            f"{self.base_url}/predict/batch",
+            json={"titles": list(titles)},
+            timeout=self.timeout,
+            stream=True
+        ) as r:
+            if r.status_code != 200:
+                raise ServiceError(_error_message(r))
+
+            for line in r.iter_lines():
+                if line:
+                    yield json.loads(line)
+
+    def health(self):
+        r = self._session.get(f"{self.base_url}/health", timeout=self.timeout)
+        return r.status_code == 200
+
+    def close(self):
+        self._session.close()
+
+
+def _error_message(response):
+    try:
+        return response.json().get("error") or response.text
+    except ValueError:
+        return f"HTTP {response.status_code}: {response.text[:200]}"
@@ -0,0 +1,201 @@
+# utils/singleflight.py
+#
+# Coalescencia de predicciones: si varias sesiones piden a la vez la
+# misma película, solo una ejecuta run_full_pipeline y las demás
+# reciben su resultado. Los resultados se guardan unos minutos.
+
+import threading
+import time
+from collections import OrderedDict
+
+from utils.feature_store import get_feature_store, normalize_title
+from utils.pipeline import run_full_pipeline
+from utils.tmdb_api import track_fetch_failures
+from utils.tracing import record_cache
+
+
+# Segundos que se reutiliza una predicción terminada
+RESULT_TTL = 5 * 60
+RESULT_CACHE_SIZE = 512
+
+
+# =========================================================
+# 1. Single-flight
+# =========================================================
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    do(key, fn): si ya hay una llamada en vuelo con esa clave, espera
+    a que termine y devuelve su resultado (o relanza su excepción);
+    si no, ejecuta fn().
+
+    Devuelve (resultado, shared): shared=True si se reutilizó la
+    llamada de otro hilo.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.shared = 0
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.shared += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn()
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+            call.event.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._calls)
+
+
+# =========================================================
+# 2. Caché de resultados con TTL
+# =========================================================
+class ResultCache:
+    """
+    - ttl: segundos que vive un resultado
+    - max_size: al superarlo se expulsa el usado hace más tiempo
+    """
+
+    def __init__(self, ttl=RESULT_TTL, max_size=RESULT_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, count=True):
+        """
+        - count: False para consultar sin contar hit/miss
+        """
+        with self._lock:
+            entry = self._results.get(key)
+            if entry is not None and time.time() - entry[0] < self.ttl:
+                self._results.move_to_end(key)
+                self.hits += count
+                return entry[1]
+
+            self._results.pop(key, None)
+            self.misses += count
+            return None
+
+    def set(self, key, value):
+        with self._lock:
+            self._results[key] = (time.time(), value)
+            self._results.move_to_end(key)
+            while len(self._results) > self.max_size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+    def __len__(self):
+        return len(self._results)
+
+
+# =========================================================
+# 3. run_full_pipeline coalescido
+# =========================================================
+_flight = SingleFlight()
+_results = ResultCache()
+
+
+def prediction_key(movie_name):
+    """
+    imdb_id si el feature store ya sabe a qué película resuelve el
+    título (sin llamar a ninguna API); si no, el título normalizado.
+    """
+    store = get_feature_store()
+    if store is not None:
+        imdb_id = store.resolve_title(movie_name)
+        if imdb_id is not None:
+            return "imdb:" + imdb_id
+    return "title:" + normalize_title(movie_name)
+
+
+def _copy_result(result, return_dataframe):
+    proba, poster_url, df_movie = result
+    if df_movie is not None:
+        df_movie = df_movie.copy() if return_dataframe else None
+    return proba, poster_url, df_movie
+
+
+def run_full_pipeline_coalesced(movie_name, omdb_key, tmdb_key, return_dataframe=True):
+    """
+    Igual que run_full_pipeline (APIs en vivo), pero:
+    - peticiones simultáneas de la misma película comparten UNA ejecución
+    - el resultado (también "no encontrada") se reutiliza RESULT_TTL
+      segundos, salvo si alguna llamada a las APIs falló: un 503 o un
+      límite de OMDb se leen como "no encontrada" y no deben quedarse
+
+    Cada llamador recibe su propia copia del DataFrame.
+    """
+    key = prediction_key(movie_name)
+
+    result = _results.get(key)
+    record_cache("prediction", result is not None)
+    if result is not None:
+        return _copy_result(result, return_dataframe)
+
+    def compute():
+        # Otro hilo pudo terminarla entre get() y do()
+        cached = _results.get(key, count=False)
+        if cached is not None:
+            return cached
+
+        with track_fetch_failures() as failures:
+            computed = run_full_pipeline(movie_name, omdb_key, tmdb_key, return_dataframe=True)
+        if failures:
+            return computed
+
+        _results.set(key, computed)
+
+        # El pipeline acaba de asociar el título a su imdb_id en el
+        # feature store: las próximas búsquedas usarán esa clave
+        resolved = prediction_key(movie_name)
+        if resolved != key:
+            _results.set(resolved, computed)
+        return computed
+
+    result, _ = _flight.do(key, compute)
+    return _copy_result(result, return_dataframe)
+
+
+def get_single_flight():
+    return _flight
+
+
+def get_result_cache():
+    return _results
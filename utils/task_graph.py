@@ -0,0 +1,66 @@
+# utils/task_graph.py
+
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+
+# Número máximo de tareas (llamadas HTTP) en paralelo por defecto
+DEFAULT_MAX_WORKERS = 8
+
+
+# =========================================================
+# Ejecutar un grafo de dependencias con un pool de hilos
+# =========================================================
+def run_task_graph(tasks, max_workers=DEFAULT_MAX_WORKERS):
+    """
+    Ejecuta un conjunto de tareas respetando sus dependencias y
+    lanzando en paralelo todas las que ya tienen sus entradas listas.
+
+    - tasks: diccionario {nombre: (dependencias, función)}
+        * dependencias: lista de nombres de otras tareas
+        * función: recibe los resultados de sus dependencias como
+          argumentos posicionales, en el mismo orden
+    - max_workers: límite de tareas ejecutándose a la vez
+
+    Devuelve {nombre: resultado}. Si una tarea lanza una excepción,
+    se cancelan las pendientes y se relanza.
+    """
+    for name, (deps, _) in tasks.items():
+        unknown = [d for d in deps if d not in tasks]
+        if unknown:
+            raise ValueError(f"La tarea '{name}' depende de tareas inexistentes: {unknown}")
+
+    results = {}
+    pending = dict(tasks)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        while pending or running:
+            # 1. Lanzar todo lo que ya tiene sus dependencias resueltas
+            ready = [
+                name for name, (deps, _) in pending.items()
+                if all(d in results for d in deps)
+            ]
+            for name in ready:
+                deps, fn = pending.pop(name)
+                args = [results[d] for d in deps]
+                # Copia del contexto: la traza y la etapa activas
+                # (utils/tracing.py) siguen visibles dentro del hilo
+                ctx = contextvars.copy_context()
+                running[pool.submit(ctx.run, fn, *args)] = name
+
+            if not running:
+                raise ValueError(f"Dependencias cíclicas entre: {sorted(pending)}")
+
+            # 2. Esperar a que termine al menos una
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Exception:
+                    for other in running:
+                        other.cancel()
+                    raise
+
+    return results
@@ -1,18 +1,40 @@
 # utils/text_processing.py
-import nltk
-
-# Asegurar que las stopwords estén disponibles en Streamlit Cloud
-try:
-    nltk.data.find("corpora/stopwords")
-except LookupError:
-    nltk.download("stopwords")
-
-
 
+import os
 import re
+import threading
+
 import pandas as pd
 import emoji
-from nltk.corpus import stopwords
+
+
+# Stopwords ya limpias, incluidas en el repo (ver sección 2)
+STOPWORDS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "data", "stopwords_english.txt"
+)
+
+
+# =========================================================
+# Patrones precompilados (se compilan una vez al importar)
+# =========================================================
+_URL_RE = re.compile(r"http\S+|www\.\S+")
+_MENTION_RE = re.compile(r"[@#]\S+")
+_HTML_RE = re.compile(r"<.*?>")
+
+# Fusión de dos pasos originales:
+#   ([!?.,])\1+  → \1     (normalize !!!! → !)
+#   (.)\1{2,}    → \1\1   (normalize loooove → loove)
+# Es equivalente a aplicarlos en orden: tras colapsar la puntuación
+# no quedan rachas de puntuación que el segundo paso pueda tocar, y
+# colapsar puntuación nunca une rachas de otros caracteres.
+# En cada match solo participa uno de los dos grupos; el otro se
+# sustituye por "".
+_REPEAT_RE = re.compile(r"([!?.,])\1+|(.)\2{2,}")
+_REPEAT_REPL = r"\1\2\2"
+
+_NON_ALLOWED_RE = re.compile(r"[^a-zA-Z0-9áéíóúÁÉÍÓÚüÜñÑ.,!?'\s]")
+
+_STRIP_CHARS = ".,!?'-_()[]{};:\""
 
 
 # =========================================================
@@ -26,39 +48,110 @@ def clean_text(text):
     text = emoji.replace_emoji(text, replace='')
 
     # remove URLs
-    text = re.sub(r"http\S+|www\.\S+", "", text)
+    text = _URL_RE.sub("", text)
 
     # remove mentions/hashtags
-    text = re.sub(r"[@#]\S+", "", text)
+    text = _MENTION_RE.sub("", text)
 
     # remove HTML
-    text = re.sub(r"<.*?>", "", text)
-
-    # normalize !!!! → !
-    text = re.sub(r"([!?.,])\1+", r"\1", text)
+    text = _HTML_RE.sub("", text)
 
-    # normalize loooove → loove
-    text = re.sub(r"(.)\1{2,}", r"\1\1", text)
+    # normalize !!!! → ! y loooove → loove (un solo pase)
+    text = _REPEAT_RE.sub(_REPEAT_REPL, text)
 
     # remove non-alphanumeric except typical punctuation
-    text = re.sub(r"[^a-zA-Z0-9áéíóúÁÉÍÓÚüÜñÑ.,!?'\s]", " ", text)
+    text = _NON_ALLOWED_RE.sub(" ", text)
 
-    # collapse spaces
-    text = re.sub(r"\s+", " ", text).strip()
+    # collapse spaces (split() usa la misma definición de espacio que \s)
+    text = " ".join(text.split())
 
     # lowercase
     text = text.lower()
 
     # strip punctuation at ends
-    text = text.strip(".,!?'-_()[]{};:\"")
+    text = text.strip(_STRIP_CHARS)
 
     return text
 
 
 # =========================================================
-# 2. Stopwords (tu código real)
+# 2. Stopwords
 # =========================================================
-# Nota: se recomienda ejecutar en tu entorno:
-#   import nltk
-#   nltk.download("stopwords")
-stop_words = [clean_text(x) for x in stopwords.words("english")]
+# Se cargan la primera vez que se usan, desde el archivo incluido en
+# utils/data/ (lista english de NLTK ya pasada por clean_text). NLTK
+# solo se usa como respaldo si ese archivo no existe, así importar
+# este módulo no toca la red ni el disco de nltk_data.
+_stop_words = None
+_stop_words_lock = threading.Lock()
+
+
+def _load_bundled_stop_words(path=STOPWORDS_PATH):
+    with open(path, encoding="utf-8") as f:
+        return frozenset(
+            line.strip() for line in f
+            if line.strip() and not line.startswith("#")
+        )
+
+
+def _load_nltk_stop_words():
+    import nltk
+
+    try:
+        nltk.data.find("corpora/stopwords")
+    except LookupError:
+        nltk.download("stopwords")
+
+    from nltk.corpus import stopwords
+    return frozenset(clean_text(x) for x in stopwords.words("english"))
+
+
+def get_stop_words():
+    """
+    frozenset de stopwords: cada consulta `w in stop_words` es O(1).
+    """
+    global _stop_words
+
+    if _stop_words is None:
+        with _stop_words_lock:
+            if _stop_words is None:
+                if os.path.exists(STOPWORDS_PATH):
+                    _stop_words = _load_bundled_stop_words()
+                else:
+                    _stop_words = _load_nltk_stop_words()
+
+    return _stop_words
+
+
+def export_stop_words(path=STOPWORDS_PATH):
+    """
+    Regenera el archivo incluido a partir de NLTK.
+    """
+    words = sorted(_load_nltk_stop_words())
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Stopwords en inglés de NLTK (corpora/stopwords/english), ya pasadas por clean_text.\n")
+        f.write("# Regenerar con: python -m utils.cli export-stopwords\n")
+        f.write("\n".join(words) + "\n")
+    return path
+
+
+def __getattr__(name):
+    # Compatibilidad: `from utils.text_processing import stop_words`
+    # sigue funcionando, pero ya no se calcula al importar el módulo.
+    if name == "stop_words":
+        return get_stop_words()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def remove_stopwords(text):
+    """
+    Quita las stopwords de un texto ya limpio.
+    """
+    stop_words = get_stop_words()
+    return " ".join([w for w in text.split() if w not in stop_words])
+
+
+def clean_plot(text):
+    """
+    clean_text + remove_stopwords: el texto final que se embebe.
+    """
+    return remove_stopwords(clean_text(text))
@@ -1,16 +1,185 @@
 # utils/tmdb_api.py
 
-import requests
+import contextvars
+import os
+import threading
+from contextlib import contextmanager
+
 import pandas as pd
 
+from utils.http_client import http_get
+from utils.http_cache import get_response_cache, request_key, ttl_for
+from utils.rate_limit import QuotaExhaustedError
+from utils.tracing import record_cache
+
+
+DEFAULT_OMDB_URL = "http://www.omdbapi.com/"
+DEFAULT_TMDB_URL = "https://api.themoviedb.org/3"
+
+# Se pueden redirigir (p. ej. al servidor falso de utils/fake_server.py)
+# con OMDB_BASE_URL / TMDB_BASE_URL o con set_base_urls()
+OMDB_URL = os.environ.get("OMDB_BASE_URL", DEFAULT_OMDB_URL)
+TMDB_URL = os.environ.get("TMDB_BASE_URL", DEFAULT_TMDB_URL).rstrip("/")
+
+
+def set_base_urls(omdb_url=None, tmdb_url=None):
+    """
+    Cambia las URLs base de OMDb y TMDb para todo el proceso.
+    None restablece la URL real.
+    """
+    global OMDB_URL, TMDB_URL
+    OMDB_URL = omdb_url or DEFAULT_OMDB_URL
+    TMDB_URL = (tmdb_url or DEFAULT_TMDB_URL).rstrip("/")
+
+
+def get_base_urls():
+    return OMDB_URL, TMDB_URL
+
+
+# =========================================================
+# 0. Contexto de descarga por predicción
+# =========================================================
+# Las funciones de este módulo devuelven {} / None cuando una llamada
+# falla, igual que cuando el recurso no existe. Quien necesite
+# distinguirlo (p. ej. para no persistir un registro incompleto)
+# abre un track_fetch_failures().
+_fetch_failures = contextvars.ContextVar("subtext_fetch_failures", default=None)
+
+
+@contextmanager
+def track_fetch_failures():
+    """
+    Devuelve una lista que se llena con las URLs cuyas descargas
+    fallaron (error de red o respuesta distinta de 200/404) dentro del
+    bloque, incluidos los hilos de run_task_graph.
+    """
+    failures = []
+    token = _fetch_failures.set(failures)
+    try:
+        yield failures
+    finally:
+        _fetch_failures.reset(token)
+
+
+def _note_failure(url):
+    failures = _fetch_failures.get()
+    if failures is not None:
+        failures.append(url)
+
+
+def _fetch_json(url, params=None, timeout=None):
+    """
+    Descarga un recurso pasando por la caché persistente
+    (ver utils/http_cache.py). Solo se guardan respuestas 200; los
+    errores de OMDb, unos minutos.
+    """
+    cache = get_response_cache()
+    key = request_key(url, params)
+
+    if cache is not None:
+        data = cache.get(key)
+        record_cache("http_cache", data is not None)
+        if data is not None:
+            return data
+
+    try:
+        r = http_get(url, params=params, timeout=timeout)
+    except Exception:
+        _note_failure(url)
+        raise
+
+    if r.status_code != 200:
+        # 404 es "no existe" (TMDb); el resto, un fallo transitorio
+        if r.status_code != 404:
+            _note_failure(url)
+        return {}
+
+    data = r.json()
+    if cache is not None:
+        cache.set(key, data, ttl_for(url, data))
+
+    return data
+
+
+class FetchContext:
+    """
+    Guarda las respuestas JSON descargadas durante UNA predicción.
+
+    Varias features leen el mismo recurso (OMDb ?i=, TMDb /movie/{id},
+    /person/{id}/movie_credits, búsqueda del director...). Con un
+    contexto compartido cada recurso se descarga una sola vez, aunque
+    lo pidan varios hilos a la vez: el segundo espera al primero.
+    """
+
+    def __init__(self):
+        self._responses = {}
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.requests_made = 0
+        self.requests_saved = 0
+
+    def get_json(self, url, params=None, timeout=None):
+        key = request_key(url, params)
+
+        while True:
+            with self._lock:
+                if key in self._responses:
+                    self.requests_saved += 1
+                    record_cache("fetch_context", True)
+                    data, failed = self._responses[key]
+                    break
+
+                event = self._inflight.get(key)
+                if event is None:
+                    event = threading.Event()
+                    self._inflight[key] = event
+                    record_cache("fetch_context", False)
+                    data = None
+                    break
+
+            # Otro hilo ya está descargando este recurso
+            event.wait()
+
+        if data is not None:
+            # Una descarga fallida se reutiliza como {}, pero cada
+            # lector la vuelve a anotar en su track_fetch_failures()
+            for failed_url in failed:
+                _note_failure(failed_url)
+            return data
+
+        failed = []
+        try:
+            with track_fetch_failures() as failed:
+                data = _fetch_json(url, params, timeout)
+            with self._lock:
+                self._responses[key] = (data, failed)
+                self.requests_made += 1
+            return data
+        finally:
+            for failed_url in failed:
+                _note_failure(failed_url)
+            with self._lock:
+                self._inflight.pop(key, None)
+            event.set()
+
+
+def _get_json(url, params=None, ctx=None, timeout=None):
+    """
+    GET que devuelve el JSON de la respuesta ({} si no es 200).
+    Sin `timeout` se usa el de utils/http_client.py.
+    Si se pasa un FetchContext, reutiliza lo ya descargado.
+    """
+    if ctx is None:
+        return _fetch_json(url, params, timeout)
+    return ctx.get_json(url, params, timeout)
+
 
 # =========================================================
 # 1. Obtener información básica de la película (OMDb + TMDb)
 # =========================================================
-def get_basic_movie_info_df(title, omdb_key, tmdb_key):
+def get_basic_movie_info_df(title, omdb_key, tmdb_key, ctx=None):
     # 1) Buscar en OMDb
-    omdb_url = f"http://www.omdbapi.com/?t={title}&apikey={omdb_key}"
-    omdb_data = requests.get(omdb_url).json()
+    omdb_data = _get_json(OMDB_URL, {"t": title, "apikey": omdb_key}, ctx)
 
     if omdb_data.get("Response") == "False":
         return pd.DataFrame([{
@@ -26,10 +195,9 @@ def get_basic_movie_info_df(title, omdb_key, tmdb_key):
     official_title = omdb_data.get("Title")
 
     # 2) Buscar en TMDb
-    tmdb_search_url = (
-        f"https://api.themoviedb.org/3/search/movie?api_key={tmdb_key}&query={title}"
+    tmdb_search = _get_json(
+        f"{TMDB_URL}/search/movie", {"api_key": tmdb_key, "query": title}, ctx
     )
-    tmdb_search = requests.get(tmdb_search_url).json()
 
     if len(tmdb_search.get("results", [])) == 0:
         tmdb_id = None
@@ -50,18 +218,16 @@ def get_basic_movie_info_df(title, omdb_key, tmdb_key):
 # =========================================================
 # 2. Obtener rating y el director de OMDb
 # =========================================================
-def get_movie_info(imdb_id, omdb_key):
+def get_movie_info(imdb_id, omdb_key, ctx=None):
     if pd.isna(imdb_id):
         return pd.Series([None, None])
     
-    url = "http://www.omdbapi.com/"
     params = {
         "apikey": omdb_key,
         "i": imdb_id
     }
     
-    r = requests.get(url, params=params)
-    data = r.json()
+    data = _get_json(OMDB_URL, params, ctx)
     
     rating = float(data.get("imdbRating")) if data.get("imdbRating") not in [None, "N/A"] else None
     director = data.get("Director")
@@ -72,17 +238,16 @@ def get_movie_info(imdb_id, omdb_key):
 # =========================================================
 # 3. Obtener runtime, genre, plot desde OMDb
 # =========================================================
-def get_omdb_details(imdb_id, omdb_key):
+def get_omdb_details(imdb_id, omdb_key, ctx=None):
     if pd.isna(imdb_id):
         return pd.Series([None, None, None])
     
-    url = "http://www.omdbapi.com/"
     params = {
         "apikey": omdb_key,
         "i": imdb_id
     }
     
-    r = requests.get(url, params=params).json()
+    r = _get_json(OMDB_URL, params, ctx)
 
     # 1. Duración (runtime)
     runtime_str = r.get("Runtime")
@@ -130,15 +295,17 @@ def get_omdb_details(imdb_id, omdb_key):
 # =========================================================
 # 4. Obtener TMDb ID del director / escritor / actor / etc.
 # =========================================================
-def get_director_or_writer_tmdb_id(name, tmdb_key):
-    url = "https://api.themoviedb.org/3/search/person"
+def get_director_or_writer_tmdb_id(name, tmdb_key, ctx=None):
+    url = f"{TMDB_URL}/search/person"
     params = {
         "api_key": tmdb_key,
         "query": name
     }
     
     try:
-        r = requests.get(url, params=params, timeout=10).json()
+        r = _get_json(url, params, ctx)
+    except QuotaExhaustedError:
+        raise
     except:
         return None
     
@@ -198,15 +365,19 @@ def get_previous_director_imdb_rating(
     nomination_year,
     imdb_rating_actual,
     omdb_key,
-    tmdb_key
+    tmdb_key,
+    ctx=None
 ):
     try:
         nomination_year = int(nomination_year)
     except:
         return imdb_rating_actual
     
-    url = f"https://api.themoviedb.org/3/person/{director_tmdb_id}/movie_credits?api_key={tmdb_key}"
-    data = requests.get(url).json()
+    data = _get_json(
+        f"{TMDB_URL}/person/{director_tmdb_id}/movie_credits",
+        {"api_key": tmdb_key},
+        ctx
+    )
     
     if "crew" not in data:
         return imdb_rating_actual
@@ -230,11 +401,11 @@ def get_previous_director_imdb_rating(
     
     movies = sorted(movies, key=lambda x: x["year"])
     
-    lookup_url = (
-        f"https://api.themoviedb.org/3/find/{current_imdb_id}"
-        f"?api_key={tmdb_key}&external_source=imdb_id"
+    lookup = _get_json(
+        f"{TMDB_URL}/find/{current_imdb_id}",
+        {"api_key": tmdb_key, "external_source": "imdb_id"},
+        ctx
     )
-    lookup = requests.get(lookup_url).json()
     
     if "movie_results" not in lookup or len(lookup["movie_results"]) == 0:
         return imdb_rating_actual
@@ -255,17 +426,15 @@ def get_previous_director_imdb_rating(
     
     prev_tmdb_id = movies[idx - 1]["tmdb_id"]
     
-    prev_lookup_url = (
-        f"https://api.themoviedb.org/3/movie/{prev_tmdb_id}/external_ids?api_key={tmdb_key}"
+    prev_lookup = _get_json(
+        f"{TMDB_URL}/movie/{prev_tmdb_id}/external_ids", {"api_key": tmdb_key}, ctx
     )
-    prev_lookup = requests.get(prev_lookup_url).json()
     
     prev_imdb_id = prev_lookup.get("imdb_id")
     if not prev_imdb_id:
         return imdb_rating_actual
     
-    omdb_url = f"http://www.omdbapi.com/?i={prev_imdb_id}&apikey={omdb_key}"
-    omdb_data = requests.get(omdb_url).json()
+    omdb_data = _get_json(OMDB_URL, {"i": prev_imdb_id, "apikey": omdb_key}, ctx)
     
     if omdb_data.get("Response") == "False":
         return imdb_rating_actual
@@ -281,14 +450,19 @@ def get_previous_director_imdb_rating(
 # =========================================================
 # 6. Obtener detalles TMDb: budget, revenue, popularity, production_companies
 # =========================================================
-def get_tmdb_movie_details(tmdb_id, tmdb_key):
+def _get_tmdb_movie(tmdb_id, tmdb_key, ctx=None):
+    # /movie/{id} alimenta detalles, mes de estreno y poster: se pide
+    # siempre con los mismos parámetros para que el contexto lo reutilice.
+    url = f"{TMDB_URL}/movie/{tmdb_id}"
+    params = {"api_key": tmdb_key, "language": "en-US"}
+    return _get_json(url, params, ctx)
+
+
+def get_tmdb_movie_details(tmdb_id, tmdb_key, ctx=None):
     if pd.isna(tmdb_id):
         return pd.Series([None, None, None, None])
     
-    url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-    params = {"api_key": tmdb_key, "language": "en-US"}
-    
-    r = requests.get(url, params=params).json()
+    r = _get_tmdb_movie(tmdb_id, tmdb_key, ctx)
     
     budget = r.get("budget")
     revenue = r.get("revenue")
@@ -303,12 +477,14 @@ def get_tmdb_movie_details(tmdb_id, tmdb_key):
 # =========================================================
 # 7. Obtener el número de películas dirigidas por el director
 # =========================================================
-def get_directed_movies_from_tmdb(person_id, tmdb_key):
-    url = f"https://api.themoviedb.org/3/person/{person_id}/movie_credits"
+def get_directed_movies_from_tmdb(person_id, tmdb_key, ctx=None):
+    url = f"{TMDB_URL}/person/{person_id}/movie_credits"
     params = {"api_key": tmdb_key}
 
     try:
-        r = requests.get(url, params=params, timeout=10).json()
+        r = _get_json(url, params, ctx)
+    except QuotaExhaustedError:
+        raise
     except:
         return []
 
@@ -320,21 +496,20 @@ def get_directed_movies_from_tmdb(person_id, tmdb_key):
 # =========================================================
 # 8. Obtener fecha de nacimiento del director
 # =========================================================
-def get_birthdate_from_tmdb(tmdb_id, tmdb_key):
+def get_birthdate_from_tmdb(tmdb_id, tmdb_key, ctx=None):
     if pd.isna(tmdb_id):
         return None
     
-    url = f"https://api.themoviedb.org/3/person/{tmdb_id}"
+    url = f"{TMDB_URL}/person/{tmdb_id}"
     params = {"api_key": tmdb_key}
     
     try:
-        r = requests.get(url, params=params, timeout=10)
-        if r.status_code != 200:
-            return None
-        
-        data = r.json()
+        # _get_json devuelve {} si la respuesta no es 200
+        data = _get_json(url, params, ctx)
         return data.get("birthday")
     
+    except QuotaExhaustedError:
+        raise
     except:
         return None
 
@@ -342,14 +517,11 @@ def get_birthdate_from_tmdb(tmdb_id, tmdb_key):
 # =========================================================
 # 9. Obtener mes de estreno
 # =========================================================
-def get_release_month_tmdb(tmdb_id, tmdb_key):
+def get_release_month_tmdb(tmdb_id, tmdb_key, ctx=None):
     if tmdb_id is None:
         return None
     
-    url = f"https://api.themoviedb.org/3/movie/{tmdb_id}"
-    params = {"api_key": tmdb_key}
-    
-    r = requests.get(url, params=params).json()
+    r = _get_tmdb_movie(tmdb_id, tmdb_key, ctx)
     date_str = r.get("release_date")
     
     if not date_str:
@@ -364,10 +536,87 @@ def get_release_month_tmdb(tmdb_id, tmdb_key):
 # =========================================================
 # 10. Obtener poster
 # =========================================================
-def get_movie_poster_url(tmdb_id, tmdb_key):
-    url = f"https://api.themoviedb.org/3/movie/{tmdb_id}?api_key={tmdb_key}"
-    data = requests.get(url).json()
+def get_movie_poster_url(tmdb_id, tmdb_key, ctx=None):
+    data = _get_tmdb_movie(tmdb_id, tmdb_key, ctx)
     poster_path = data.get("poster_path")
     if poster_path:
         return f"https://image.tmdb.org/t/p/w500{poster_path}"
     return None
+
+
+# =========================================================
+# 11. Datos crudos de una persona (ver utils/director_profile.py)
+# =========================================================
+def get_person_movie_credits(person_id, tmdb_key, ctx=None):
+    """
+    JSON de /person/{id}/movie_credits ({} si la respuesta no es 200).
+    """
+    return _get_json(f"{TMDB_URL}/person/{person_id}/movie_credits", {"api_key": tmdb_key}, ctx)
+
+
+def get_person_details(person_id, tmdb_key, ctx=None):
+    """
+    JSON de /person/{id} ({} si la respuesta no es 200).
+    """
+    return _get_json(f"{TMDB_URL}/person/{person_id}", {"api_key": tmdb_key}, ctx)
+
+
+def get_tmdb_id_from_imdb_id(imdb_id, tmdb_key, ctx=None):
+    lookup = _get_json(
+        f"{TMDB_URL}/find/{imdb_id}",
+        {"api_key": tmdb_key, "external_source": "imdb_id"},
+        ctx
+    )
+    results = lookup.get("movie_results") or []
+    return results[0]["id"] if results else None
+
+
+def get_imdb_id_from_tmdb_id(tmdb_id, tmdb_key, ctx=None):
+    data = _get_json(f"{TMDB_URL}/movie/{tmdb_id}/external_ids", {"api_key": tmdb_key}, ctx)
+    return data.get("imdb_id") or None
+
+
+def get_imdb_rating(imdb_id, omdb_key, ctx=None):
+    """
+    imdbRating de OMDb como float, o None si no hay.
+    """
+    data = _get_json(OMDB_URL, {"i": imdb_id, "apikey": omdb_key}, ctx)
+
+    if data.get("Response") == "False":
+        return None
+
+    try:
+        return float(data.get("imdbRating"))
+    except (TypeError, ValueError):
+        return None
+
+
+# =========================================================
+# 12. Estrenos de un año (ver utils/prediction_index.py)
+# =========================================================
+def discover_movies_by_year(year, tmdb_key, max_pages=5, ctx=None):
+    """
+    Películas estrenadas en `year` según /discover/movie, de más a
+    menos populares (20 por página). Devuelve la lista de resultados
+    crudos de TMDb (id, title, original_title, release_date...).
+    """
+    movies = []
+
+    for page in range(1, max_pages + 1):
+        data = _get_json(
+            f"{TMDB_URL}/discover/movie",
+            {
+                "api_key": tmdb_key,
+                "primary_release_year": year,
+                "sort_by": "popularity.desc",
+                "include_adult": "false",
+                "page": page,
+            },
+            ctx
+        )
+        movies += data.get("results") or []
+
+        if page >= (data.get("total_pages") or 0):
+            break
+
+    return movies
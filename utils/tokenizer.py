@@ -0,0 +1,161 @@
+# utils/tokenizer.py
+
+import json
+
+
+# =========================================================
+# 1. Tokenizer sin TensorFlow
+# =========================================================
+class JsonTokenizer:
+    """
+    Reimplementación en Python puro de `texts_to_sequences` del
+    Tokenizer de Keras (keras.src.legacy.preprocessing.text), a partir
+    de su configuración y su word_index exportados a JSON.
+
+    Expone lo único que usa la inferencia: texts_to_sequences,
+    word_index e index_word. Cargarlo no importa TensorFlow.
+    """
+
+    def __init__(
+        self,
+        word_index,
+        num_words=None,
+        filters='!"#$%&()*+,-./:;<=>?@[\\]^_`{|}~\t\n',
+        lower=True,
+        split=" ",
+        char_level=False,
+        oov_token=None
+    ):
+        self.word_index = dict(word_index)
+        self.index_word = {i: w for w, i in self.word_index.items()}
+        self.num_words = num_words
+        self.filters = filters
+        self.lower = lower
+        self.split = split
+        self.char_level = char_level
+        self.oov_token = oov_token
+
+        # Igual que text_to_word_sequence: cada filtro → separador
+        self._translate_map = str.maketrans({c: split for c in filters})
+
+    def _text_to_word_sequence(self, text):
+        if self.lower:
+            text = text.lower()
+        text = text.translate(self._translate_map)
+        return [w for w in text.split(self.split) if w]
+
+    def texts_to_sequences(self, texts):
+        num_words = self.num_words
+        oov_token_index = self.word_index.get(self.oov_token)
+        sequences = []
+
+        for text in texts:
+            if self.char_level or isinstance(text, list):
+                if self.lower:
+                    if isinstance(text, list):
+                        text = [t.lower() for t in text]
+                    else:
+                        text = text.lower()
+                seq = text
+            else:
+                seq = self._text_to_word_sequence(text)
+
+            vect = []
+            for w in seq:
+                i = self.word_index.get(w)
+                if i is not None:
+                    if num_words and i >= num_words:
+                        if oov_token_index is not None:
+                            vect.append(oov_token_index)
+                    else:
+                        vect.append(i)
+                elif self.oov_token is not None:
+                    vect.append(oov_token_index)
+
+            sequences.append(vect)
+
+        return sequences
+
+    # ---------------------------------------------
+    # Lectura / escritura
+    # ---------------------------------------------
+    def to_config(self):
+        return {
+            "num_words": self.num_words,
+            "filters": self.filters,
+            "lower": self.lower,
+            "split": self.split,
+            "char_level": self.char_level,
+            "oov_token": self.oov_token,
+            "word_index": self.word_index,
+        }
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_config(), f, ensure_ascii=False)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            return cls(**json.load(f))
+
+
+# =========================================================
+# 2. Exportar el tokenizer de Keras y verificarlo
+# =========================================================
+def from_keras_tokenizer(tokenizer):
+    """
+    Construye un JsonTokenizer con la configuración de un Tokenizer
+    de Keras ya entrenado.
+    """
+    if getattr(tokenizer, "analyzer", None) is not None:
+        raise ValueError("No se puede exportar un Tokenizer con analyzer propio")
+
+    return JsonTokenizer(
+        word_index=tokenizer.word_index,
+        num_words=tokenizer.num_words,
+        filters=tokenizer.filters,
+        lower=tokenizer.lower,
+        split=tokenizer.split,
+        char_level=tokenizer.char_level,
+        oov_token=tokenizer.oov_token
+    )
+
+
+def verify_tokenizer(original, exported, texts):
+    """
+    Compara texts_to_sequences e index_word de ambos tokenizers.
+    Devuelve la lista de textos cuya secuencia difiere (vacía = OK).
+    """
+    if dict(original.index_word) != exported.index_word:
+        raise ValueError("index_word no coincide con el del tokenizer original")
+
+    texts = list(texts)
+    expected = original.texts_to_sequences(texts)
+    got = exported.texts_to_sequences(texts)
+
+    return [t for t, a, b in zip(texts, expected, got) if a != b]
+
+
+def export_tokenizer(tokenizer, path, texts=None):
+    """
+    Exporta un Tokenizer de Keras a JSON y verifica que el resultado
+    reproduce exactamente su salida sobre `texts` (por defecto, las
+    propias palabras del vocabulario).
+    """
+    exported = from_keras_tokenizer(tokenizer)
+
+    if texts is None:
+        words = list(tokenizer.word_index)
+        texts = [" ".join(words[i:i + 50]) for i in range(0, len(words), 50)]
+
+    mismatches = verify_tokenizer(tokenizer, exported, texts)
+    if mismatches:
+        raise ValueError(
+            f"El tokenizer exportado difiere en {len(mismatches)} textos, "
+            f"p. ej.: {mismatches[0][:80]!r}"
+        )
+
+    exported.save(path)
+    return exported
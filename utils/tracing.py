@@ -0,0 +1,352 @@
+# utils/tracing.py
+
+import contextvars
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# =========================================================
+# 1. Métricas del proceso (formato de texto de Prometheus)
+# =========================================================
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRIC_HELP = {
+    "subtext_stage_duration_seconds": ("histogram", "Duración de cada etapa del pipeline."),
+    "subtext_http_requests_total": ("counter", "Peticiones HTTP a las APIs (incluye reintentos)."),
+    "subtext_http_response_bytes_total": ("counter", "Bytes recibidos de las APIs."),
+    "subtext_cache_requests_total": ("counter", "Consultas a las cachés, por capa y resultado."),
+    "subtext_rate_limit_acquired_total": ("counter", "Tokens tomados del limitador de cada API."),
+    "subtext_rate_limit_waited_total": ("counter", "Tokens que obligaron a esperar."),
+    "subtext_rate_limit_wait_seconds_total": ("counter", "Segundos esperando tokens del limitador."),
+    "subtext_rate_limit_quota_exhausted_total": ("counter", "Llamadas rechazadas por presupuesto diario agotado."),
+}
+
+
+class Metrics:
+    """
+    Contadores e histogramas en memoria, compartidos por todo el
+    proceso. render() los devuelve en el formato de texto que lee
+    Prometheus.
+    """
+
+    def __init__(self, buckets=DURATION_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, labels=(), value=1):
+        key = (name, tuple(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, labels, value):
+        key = (name, tuple(labels))
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * len(self.buckets), 0.0, 0]
+            counts = hist[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            hist[1] += value
+            hist[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    @staticmethod
+    def _labels(labels, extra=()):
+        pairs = list(labels) + list(extra)
+        if not pairs:
+            return ""
+        body = ",".join(
+            f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+            for k, v in pairs
+        )
+        return "{" + body + "}"
+
+    def render(self):
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: (list(h[0]), h[1], h[2]) for k, h in self._histograms.items()}
+
+        lines = []
+        names = sorted({k[0] for k in counters} | {k[0] for k in histograms})
+
+        for name in names:
+            kind, help_text = METRIC_HELP.get(name, ("untyped", ""))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{self._labels(labels)} {value}")
+
+            for (metric, labels), (counts, total, count) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                for bound, c in zip(self.buckets, counts):
+                    lines.append(f"{name}_bucket{self._labels(labels, [('le', bound)])} {c}")
+                lines.append(f"{name}_bucket{self._labels(labels, [('le', '+Inf')])} {count}")
+                lines.append(f"{name}_sum{self._labels(labels)} {total}")
+                lines.append(f"{name}_count{self._labels(labels)} {count}")
+
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+# =========================================================
+# 2. Traza de una predicción
+# =========================================================
+_trace_var = contextvars.ContextVar("subtext_trace", default=None)
+_stage_var = contextvars.ContextVar("subtext_stage", default=None)
+
+
+class Trace:
+    """
+    Acumula, por etapa, lo ocurrido durante UNA predicción:
+    duración, llamadas HTTP, bytes, errores y aciertos/fallos de caché.
+
+    Las etapas anidadas se nombran con su ruta ("features/movie_info");
+    las llamadas HTTP se atribuyen a la etapa más interna.
+    """
+
+    FIELDS = [
+        "calls",
+        "duration_s",
+        "http_requests",
+        "http_errors",
+        "http_bytes",
+        "cache_hits",
+        "cache_misses",
+        "rate_limit_waits",
+        "rate_limit_wait_s",
+    ]
+
+    def __init__(self, name="trace"):
+        self.name = name
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.duration_s = None
+        self._stages = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _stats(self, stage):
+        stats = self._stages.get(stage)
+        if stats is None:
+            stats = self._stages[stage] = dict.fromkeys(self.FIELDS, 0)
+        return stats
+
+    def add(self, stage, **values):
+        with self._lock:
+            stats = self._stats(stage or "(sin etapa)")
+            for field, value in values.items():
+                stats[field] += value
+
+    def finish(self):
+        self.duration_s = time.perf_counter() - self._start
+
+    def rows(self):
+        """
+        Una fila por etapa, en orden de inicio.
+        """
+        with self._lock:
+            return [{"stage": stage, **stats} for stage, stats in self._stages.items()]
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_s": self.duration_s,
+            "stages": self.rows(),
+        }
+
+    def format(self):
+        lines = [f"{'etapa':<50}{'ms':>10}{'http':>6}{'KB':>8}{'hit':>5}{'miss':>5}{'espera ms':>11}"]
+        for row in self.rows():
+            lines.append(
+                f"{row['stage']:<50}{row['duration_s'] * 1000:>10.1f}{row['http_requests']:>6}"
+                f"{row['http_bytes'] / 1024:>8.1f}{row['cache_hits']:>5}{row['cache_misses']:>5}"
+                f"{row['rate_limit_wait_s'] * 1000:>11.1f}"
+            )
+        return "\n".join(lines)
+
+
+@contextmanager
+def trace(name="trace"):
+    """
+    Abre una traza para todo lo que se ejecute dentro del bloque
+    (incluidos los hilos de run_task_graph):
+
+        with trace("prediccion") as t:
+            run_full_pipeline(...)
+        print(t.format())
+    """
+    t = Trace(name)
+    token = _trace_var.set(t)
+    try:
+        yield t
+    finally:
+        t.finish()
+        _trace_var.reset(token)
+
+
+def current_trace():
+    return _trace_var.get()
+
+
+def current_stage():
+    return _stage_var.get()
+
+
+# =========================================================
+# 3. Etapas
+# =========================================================
+@contextmanager
+def stage(name):
+    """
+    Mide una etapa. Siempre alimenta el histograma del proceso; si hay
+    una traza activa, también la traza.
+    """
+    parent = _stage_var.get()
+    path = f"{parent}/{name}" if parent else name
+    token = _stage_var.set(path)
+
+    # Registrar la etapa al entrar: las filas quedan en orden de inicio
+    t = _trace_var.get()
+    if t is not None:
+        t.add(path)
+
+    start = time.perf_counter()
+    try:
+        yield path
+    finally:
+        elapsed = time.perf_counter() - start
+        _stage_var.reset(token)
+
+        METRICS.observe("subtext_stage_duration_seconds", [("stage", path)], elapsed)
+        if t is not None:
+            t.add(path, calls=1, duration_s=elapsed)
+
+
+def traced(name):
+    """
+    Decorador: ejecuta la función dentro de stage(name).
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def staged(name, fn):
+    """
+    Envuelve fn para que cada llamada se mida como stage(name).
+    Pensado para las tareas de run_task_graph.
+    """
+    def wrapper(*args):
+        with stage(name):
+            return fn(*args)
+    return wrapper
+
+
+# =========================================================
+# 4. Eventos (HTTP y cachés)
+# =========================================================
+def record_http(api, status, nbytes):
+    """
+    Una respuesta HTTP (o un error de red si status es None).
+    """
+    METRICS.inc("subtext_http_requests_total", [("api", api), ("status", status or "error")])
+    METRICS.inc("subtext_http_response_bytes_total", [("api", api)], nbytes)
+
+    t = _trace_var.get()
+    if t is not None:
+        failed = status is None or status >= 400
+        t.add(_stage_var.get(), http_requests=1, http_errors=int(failed), http_bytes=nbytes)
+
+
+def record_cache(layer, hit):
+    """
+    - layer: "http_cache", "fetch_context", ...
+    """
+    METRICS.inc("subtext_cache_requests_total", [("layer", layer), ("result", "hit" if hit else "miss")])
+
+    t = _trace_var.get()
+    if t is not None:
+        if hit:
+            t.add(_stage_var.get(), cache_hits=1)
+        else:
+            t.add(_stage_var.get(), cache_misses=1)
+
+
+def record_rate_limit(api, wait_seconds=0.0, exhausted=False):
+    """
+    Un token del limitador de `api` (ver utils/rate_limit.py): los
+    segundos que hubo que esperar o, con exhausted=True, una llamada
+    rechazada por el presupuesto diario.
+    """
+    labels = [("api", api)]
+    if exhausted:
+        METRICS.inc("subtext_rate_limit_quota_exhausted_total", labels)
+        return
+
+    METRICS.inc("subtext_rate_limit_acquired_total", labels)
+    if wait_seconds <= 0:
+        return
+
+    METRICS.inc("subtext_rate_limit_waited_total", labels)
+    METRICS.inc("subtext_rate_limit_wait_seconds_total", labels, wait_seconds)
+
+    t = _trace_var.get()
+    if t is not None:
+        t.add(_stage_var.get(), rate_limit_waits=1, rate_limit_wait_s=wait_seconds)
+
+
+# =========================================================
+# 5. Endpoint /metrics
+# =========================================================
+def start_metrics_server(port=9108, host=None, metrics=METRICS):
+    """
+    Sirve GET /metrics en un hilo de fondo y devuelve el servidor
+    (server.shutdown() para pararlo).
+
+    - host: por defecto SUBTEXT_METRICS_HOST o, si no está, 127.0.0.1
+      (las métricas no se exponen fuera de la máquina sin pedirlo)
+    """
+    if host is None:
+        host = os.environ.get("SUBTEXT_METRICS_HOST", "127.0.0.1")
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            payload = metrics.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server